@@ -1,99 +1,175 @@
+import asyncio
 import time
+from pathlib import Path
 from typing import Any, cast
 
+from beanie import PydanticObjectId
 from fastapi import APIRouter, File, Form, HTTPException, UploadFile
 from loguru import logger
 
+from app.api.v1.schemas import BatchDiagnoseResponse, DiagnoseResponse
+from app.core.config import settings
 from app.core.label_mapping import normalize_names
 from app.models.diagnosis import Diagnosis
-from app.models.plant import Plant
 from app.services import inference
-from app.services.storage import LocalFileStorage
+from app.services.catalog import CatalogSnapshot, get_catalog
+from app.services.metrics import DIAGNOSE_RESULTS, record_stage, stage
+from app.services.prediction_cache import get_prediction_cache
+from app.services.rollups import get_rollups
+from app.services.storage import (
+    EmptyUpload,
+    StoredUpload,
+    UploadTooLarge,
+    get_storage,
+)
+from app.services.tracing import current_trace_id, span, trace_summary
+from app.services.write_behind import WriteBufferFull, get_diagnosis_writer
 
 router = APIRouter()
-_storage = LocalFileStorage()
+_storage = get_storage()
 
 
-async def _enrich_candidates_with_embedded(raw, threshold):
-    enriched = []
-    decided = None
+def _candidate_labels(item: dict[str, Any]) -> tuple[str, str, str | None, str]:
+    """(plant_label_raw, disease_label_raw, plant_name_ua, disease_name_ua)"""
+    plant_label_raw = item.get("plant_label") or item.get("plant_name") or "unknown_plant"
 
-    for item in raw:
-        conf = float(item.get("confidence", 0.0))
+    disease_label_raw = item.get("disease_label") or item.get("disease_name") or "unknown_disease"
 
-        plant_label_raw = (
-            item.get("plant_label") or item.get("plant_name") or "unknown_plant"
-        )
+    plant_name_ua, disease_name_ua = normalize_names(plant_label_raw, disease_label_raw)
+    return plant_label_raw, disease_label_raw, plant_name_ua, disease_name_ua
 
-        disease_label_raw = (
-            item.get("disease_label") or item.get("disease_name") or "unknown_disease"
-        )
 
-        plant_name_ua, disease_name_ua = normalize_names(
-            plant_label_raw, disease_label_raw
-        )
+def _enriched_candidate(item: dict[str, Any], catalog: CatalogSnapshot) -> dict[str, Any]:
+    """Один кандидат у форматі відповіді, збагачений зі знімка каталогу."""
+    _, disease_label_raw, plant_name_ua, disease_name_ua = _candidate_labels(item)
 
-        plant_id = None
-        disease_name_final = disease_name_ua
+    plant = catalog.plant_by_name(plant_name_ua)
+    disease_name_final = catalog.match_disease(plant_name_ua, disease_name_ua) or disease_name_ua
 
-        try:
-            plant_doc = await Plant.find_one(Plant.plantName == plant_name_ua)
-        except Exception:
-            plant_doc = None
+    return {
+        "plant_id": str(plant.get("_id")) if plant else None,
+        "plant_name": plant_name_ua,
+        "disease_id": disease_label_raw,  # RAW
+        "disease_name": disease_name_final,
+        "confidence": float(item.get("confidence", 0.0)),
+    }
 
-        if plant_doc:
-            plant_id = str(getattr(plant_doc, "id", None))
-            try:
-                for d in plant_doc.diseases:
-                    name = d.get("diseaseName")
-                    if name and disease_name_ua in name:
-                        disease_name_final = name
-                        break
-            except Exception:
-                pass
-
-        enriched.append(
-            {
-                "plant_id": plant_id,
-                "plant_name": plant_name_ua,
-                "disease_id": disease_label_raw,  # RAW
-                "disease_name": disease_name_final,
-                "confidence": conf,
-            }
+
+def _decide(enriched: list[dict[str, Any]], threshold: float) -> str | None:
+    for c in enriched:
+        if c["confidence"] >= threshold:
+            return c["disease_id"]
+    return None
+
+
+def _enrich_candidates_with_embedded(raw, threshold):
+    """Збагачення кандидатів без походів у Mongo — лише знімок каталогу."""
+    catalog = get_catalog().snapshot
+    enriched = [_enriched_candidate(item, catalog) for item in raw]
+    return enriched, _decide(enriched, threshold)
+
+
+async def _store_diagnoses(docs: list[Diagnosis], single: bool = False) -> None:
+    """
+    Запис Diagnosis: через буфер відкладеного запису, якщо він увімкнений
+    (id уже призначено — відповідь не чекає на Mongo), інакше — одразу.
+    Записані документи потрапляють у лічильники агрегатів (для буфера —
+    після фактичного запису пачки).
+    """
+    writer = get_diagnosis_writer()
+    rollups = get_rollups()
+    try:
+        with stage("db_insert"):
+            if writer is not None:
+                await writer.submit(docs)
+            elif single:
+                await docs[0].insert()
+            else:
+                await Diagnosis.insert_many(docs)
+    except WriteBufferFull as e:
+        logger.warning("diagnosis_write_buffer_full: {}", e)
+        raise HTTPException(status_code=503, detail="write_buffer_full") from e
+    except Exception as e:
+        logger.exception("diagnosis_insert_failed")
+        raise HTTPException(status_code=500, detail=f"insert_failed: {e}") from e
+    if writer is None and rollups is not None:
+        rollups.record(docs)
+
+
+def _batch_outcome(item: dict[str, Any]) -> str:
+    """Мітка outcome у plantio_diagnose_results_total для елемента пачки."""
+    if item["status"] == "ok":
+        return "decided"
+    if item["status"] == "low_confidence":
+        return "low_confidence"
+    error = item.get("error", "")
+    return "too_large" if error.startswith("file_too_large") else error.split(":")[0]
+
+
+def _check_topk(topk: int) -> None:
+    """
+    topK поза 1..diagnose_max_topk — 400, як і решта помилок запиту
+    (422 у цього ендпоінта означає low_confidence).
+    """
+    if not 1 <= topk <= settings.diagnose_max_topk:
+        raise HTTPException(
+            status_code=400,
+            detail=f"invalid_topk: expected 1..{settings.diagnose_max_topk}",
         )
 
-        if decided is None and conf >= threshold:
-            decided = disease_label_raw
 
-    return enriched, decided
+async def _save_upload(image: UploadFile) -> StoredUpload:
+    try:
+        with span("upload", backend=_storage.backend):
+            stored = await _storage.save_upload(image)
+    except EmptyUpload as e:
+        DIAGNOSE_RESULTS.inc("empty_file")
+        raise HTTPException(status_code=400, detail="empty_file") from e
+    except UploadTooLarge as e:
+        DIAGNOSE_RESULTS.inc("too_large")
+        raise HTTPException(status_code=413, detail=f"file_too_large: max {e.limit} bytes") from e
+    _storage.persist(stored)
+    return stored
 
 
-@router.post("/diagnose")
+@router.post("/diagnose", response_model=DiagnoseResponse)
 async def diagnose(
     image: UploadFile = File(...),  # noqa: B008
     topK: int = Form(default=3),
     threshold: float = Form(default=0.6),
 ):
-    content = await image.read()
-    if not content:
-        raise HTTPException(status_code=400, detail="empty_file")
+    _check_topk(topK)
+    stored = await _save_upload(image)
+    sha256 = stored.sha256
 
-    _, sha256 = _storage.save(image.filename, content)
+    cache = get_prediction_cache()
 
     t0 = time.perf_counter()
     try:
-        candidates_raw = inference.predict_topk(content, topk=topK)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"invalid_image: {e}") from e
+        with stage("prediction_cache"):
+            candidates_raw = await cache.get(sha256, topK) if cache is not None else None
+        if candidates_raw is None:
+            try:
+                with stage("inference"):
+                    candidates_raw = await inference.predict_topk_async(stored.path, topk=topK)
+            except Exception as e:
+                DIAGNOSE_RESULTS.inc("invalid_image")
+                raise HTTPException(status_code=400, detail=f"invalid_image: {e}") from e
+            if cache is not None:
+                cache.put(sha256, topK, candidates_raw)
+    finally:
+        # локальну копію більше ніхто з цього запиту не читає
+        _storage.release(stored)
     ms = int((time.perf_counter() - t0) * 1000)
 
     try:
         effective_threshold = threshold
 
-        enriched, decided = await _enrich_candidates_with_embedded(
-            candidates_raw,
-            effective_threshold,
-        )
+        with stage("enrich"):
+            enriched, decided = _enrich_candidates_with_embedded(
+                candidates_raw,
+                effective_threshold,
+            )
     except Exception as e:
         logger.exception("_enrich_candidates_with_embedded failed")
         raise HTTPException(status_code=500, detail=f"enrich_failed: {e}") from e
@@ -105,26 +181,160 @@ async def diagnose(
     }
 
     doc = Diagnosis(
+        id=PydanticObjectId(),
         status="DONE",
         request={"imageSha256": sha256, "filename": image.filename},
         result=cast(Any, result_payload),
         inference_ms=ms,
+        trace_id=current_trace_id(),
+        spans=trace_summary(),
     )
-    try:
-        await doc.insert()
-    except Exception as e:
-        logger.exception("diagnosis_insert_failed")
-        raise HTTPException(status_code=500, detail=f"insert_failed: {e}") from e
+    await _store_diagnoses([doc], single=True)
 
     if decided is None:
+        DIAGNOSE_RESULTS.inc("low_confidence")
         raise HTTPException(
             status_code=422,
             detail={"message": "low_confidence", "candidates": enriched},
         )
 
+    DIAGNOSE_RESULTS.inc("decided")
     return {
         "diagnosisId": str(getattr(doc, "id", "")),
         "decidedDiseaseId": decided,
         "candidates": enriched,
         "inferenceMs": ms,
     }
+
+
+@router.post(
+    "/diagnose/batch",
+    response_model=BatchDiagnoseResponse,
+    # поля, яких елемент не має (error у успішного, candidates у битого), —
+    # відсутні, а не null
+    response_model_exclude_unset=True,
+)
+async def diagnose_batch(
+    images: list[UploadFile] = File(...),  # noqa: B008
+    topK: int = Form(default=3),
+    threshold: float = Form(default=0.6),
+):
+    """
+    Діагностика кількох фото за один запит (наприклад, усі листки з ділянки).
+
+    Зображення проходять модель справжніми батчами, каталог рослин береться
+    зі знімка в пам'яті, усі Diagnosis пишуться одним insert_many. Низька
+    впевненість чи бите зображення — статус конкретного елемента,
+    а не 422/400 для всього запиту.
+    """
+    _check_topk(topK)
+    if not images:
+        raise HTTPException(status_code=400, detail="no_files")
+    if len(images) > settings.diagnose_batch_max_files:
+        raise HTTPException(
+            status_code=400,
+            detail=f"too_many_files: max {settings.diagnose_batch_max_files}",
+        )
+
+    with span("upload", backend=_storage.backend, files=len(images)):
+        stored = await asyncio.gather(
+            *(_storage.save_upload(img) for img in images), return_exceptions=True
+        )
+
+    try:
+        items: list[dict[str, Any]] = []
+        shas: list[str | None] = []
+        paths: dict[str, Path] = {}
+        for idx, (img, res) in enumerate(zip(images, stored, strict=True)):
+            item: dict[str, Any] = {"index": idx, "filename": img.filename}
+            if isinstance(res, StoredUpload):
+                _storage.persist(res)
+                shas.append(res.sha256)
+                paths.setdefault(res.sha256, res.path)
+            elif isinstance(res, EmptyUpload):
+                item.update(status="error", error="empty_file")
+                shas.append(None)
+            elif isinstance(res, UploadTooLarge):
+                item.update(status="error", error=f"file_too_large: max {res.limit} bytes")
+                shas.append(None)
+            else:
+                raise res
+            items.append(item)
+
+        cache = get_prediction_cache()
+        raw_by_sha: dict[str, list[dict[str, Any]] | Exception] = {}
+
+        t0 = time.perf_counter()
+        with stage("prediction_cache"):
+            for sha256 in {s for s in shas if s is not None}:
+                cached = await cache.get(sha256, topK) if cache is not None else None
+                if cached is not None:
+                    raw_by_sha[sha256] = cached
+
+        # однакові фото в одному запиті проганяємо через модель один раз
+        pending = {sha: path for sha, path in paths.items() if sha not in raw_by_sha}
+
+        with stage("inference"):
+            results = await inference.predict_batch_async(list(pending.values()), topk=topK)
+        for sha256, res in zip(pending, results, strict=True):
+            raw_by_sha[sha256] = res
+            if cache is not None and not isinstance(res, Exception):
+                cache.put(sha256, topK, res)
+    finally:
+        for upload in stored:
+            if isinstance(upload, StoredUpload):
+                _storage.release(upload)
+    ms = int((time.perf_counter() - t0) * 1000)
+
+    catalog = get_catalog().snapshot
+    t_enrich = time.perf_counter()
+    trace_id = current_trace_id()
+    spans = trace_summary()
+
+    docs: list[Diagnosis] = []
+    for item, sha256, img in zip(items, shas, images, strict=True):
+        if sha256 is None:
+            continue
+        raw = raw_by_sha[sha256]
+        if isinstance(raw, Exception):
+            item.update(status="error", error=f"invalid_image: {raw}")
+            continue
+
+        enriched = [_enriched_candidate(c, catalog) for c in raw]
+        decided = _decide(enriched, threshold)
+
+        doc = Diagnosis(
+            id=PydanticObjectId(),
+            status="DONE",
+            request={"imageSha256": sha256, "filename": img.filename, "batch": True},
+            result=cast(
+                Any,
+                {
+                    "plantId": enriched[0].get("plant_id") if enriched else None,
+                    "candidates": enriched,
+                    "decidedDiseaseId": decided,
+                },
+            ),
+            inference_ms=ms,
+            trace_id=trace_id,
+            spans=spans,
+        )
+        docs.append(doc)
+        item.update(
+            status="ok" if decided is not None else "low_confidence",
+            diagnosisId=str(doc.id),
+            decidedDiseaseId=decided,
+            candidates=enriched,
+        )
+    record_stage("enrich", time.perf_counter() - t_enrich)
+    for item in items:
+        DIAGNOSE_RESULTS.inc(_batch_outcome(item))
+
+    if docs:
+        await _store_diagnoses(docs)
+
+    return {
+        "items": items,
+        "count": len(items),
+        "inferenceMs": ms,
+    }
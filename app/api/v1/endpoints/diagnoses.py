@@ -0,0 +1,185 @@
+import base64
+import binascii
+import json
+from datetime import UTC, datetime
+from typing import Any, Literal
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import APIRouter, HTTPException, Query
+
+from app.api.v1.schemas import DiagnosesPage
+from app.models.diagnosis import Diagnosis
+
+router = APIRouter()
+
+# поле відповіді (fields=) → шлях у документі; id і created_at є завжди
+FIELDS = (
+    "status",
+    "inference_ms",
+    "request",
+    "request.imageSha256",
+    "request.filename",
+    "request.batch",
+    "result",
+    "result.plantId",
+    "result.decidedDiseaseId",
+    "result.candidates",
+    "trace_id",
+    "spans",
+)
+# списку історії не потрібні масиви кандидатів — їх треба просити явно
+DEFAULT_FIELDS = (
+    "status",
+    "inference_ms",
+    "request",
+    "result.plantId",
+    "result.decidedDiseaseId",
+)
+
+
+def _utc(value: datetime) -> datetime:
+    # Motor без tz_aware повертає naive UTC; naive з query теж вважаємо UTC
+    return value.replace(tzinfo=UTC) if value.tzinfo is None else value
+
+
+def encode_cursor(created_at: datetime, diagnosis_id: ObjectId) -> str:
+    """Непрозорий курсор: (created_at у мс — точність BSON Date, _id)."""
+    ms = int(_utc(created_at).timestamp() * 1000)
+    raw = json.dumps([ms, str(diagnosis_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("ascii")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, ObjectId]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        ms, oid = json.loads(raw.decode("ascii"))
+        return datetime.fromtimestamp(int(ms) / 1000, UTC), ObjectId(oid)
+    except (binascii.Error, ValueError, TypeError, InvalidId, OverflowError) as e:
+        raise HTTPException(status_code=400, detail="invalid_cursor") from e
+
+
+def parse_fields(fields: str | None) -> tuple[str, ...]:
+    """fields=a,b.c → перелік шляхів без тих, що вже покриті батьківським."""
+    if fields is None or not fields.strip():
+        return DEFAULT_FIELDS
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"invalid_fields: {', '.join(unknown)}")
+    # Mongo не приймає в одній проєкції і "result", і "result.plantId"
+    return tuple(
+        f for f in dict.fromkeys(requested) if "." not in f or f.split(".", 1)[0] not in requested
+    )
+
+
+def build_filter(
+    status: str | None,
+    disease_id: str | None,
+    decided: bool | None,
+    created_from: datetime | None,
+    created_to: datetime | None,
+    cursor: tuple[datetime, ObjectId] | None,
+    order: str,
+) -> dict[str, Any]:
+    clauses: list[dict[str, Any]] = []
+    if status:
+        clauses.append({"status": status})
+    if disease_id:
+        clauses.append({"result.decidedDiseaseId": disease_id})
+    elif decided is not None:
+        clauses.append({"result.decidedDiseaseId": {"$ne": None} if decided else None})
+
+    created: dict[str, datetime] = {}
+    if created_from is not None:
+        created["$gte"] = _utc(created_from)
+    if created_to is not None:
+        created["$lt"] = _utc(created_to)
+    if created:
+        clauses.append({"created_at": created})
+
+    if cursor is not None:
+        # keyset: усе, що в порядку (created_at, _id) іде після курсора
+        op = "$lt" if order == "desc" else "$gt"
+        created_at, oid = cursor
+        clauses.append(
+            {
+                "$or": [
+                    {"created_at": {op: created_at}},
+                    {"created_at": created_at, "_id": {op: oid}},
+                ]
+            }
+        )
+
+    if not clauses:
+        return {}
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def _item(doc: dict[str, Any]) -> dict[str, Any]:
+    item = {k: v for k, v in doc.items() if k != "_id"}
+    item["id"] = str(doc["_id"])
+    item["created_at"] = _utc(doc["created_at"])
+    return item
+
+
+@router.get("", response_model=DiagnosesPage, response_model_exclude_unset=True)
+async def list_diagnoses(
+    status: str | None = Query(default=None, description="Напр. DONE"),
+    disease_id: str | None = Query(default=None, description="decidedDiseaseId з /diagnose"),
+    decided: bool | None = Query(
+        default=None,
+        description="true — з рішенням, false — low confidence (без disease_id)",
+    ),
+    created_from: datetime | None = Query(  # noqa: B008
+        default=None, description="Від (включно), ISO 8601; без зони — UTC"
+    ),
+    created_to: datetime | None = Query(  # noqa: B008
+        default=None, description="До (не включно), ISO 8601; без зони — UTC"
+    ),
+    fields: str | None = Query(
+        default=None,
+        description=(
+            "Поля через кому: " + ", ".join(FIELDS) + ". За замовчуванням — без result.candidates"
+        ),
+    ),
+    order: Literal["desc", "asc"] = Query(default="desc", description="desc — від нових до старих"),
+    cursor: str | None = Query(default=None, description="next_cursor з попередньої сторінки"),
+    size: int = Query(50, ge=1, le=500),
+):
+    """
+    Історія діагнозів, відсортована за (created_at, _id).
+
+    Пагінація лише keyset: наступна сторінка — від next_cursor, без skip
+    і без count, тож вивантаження всієї колекції йде по індексу
+    (created_at, _id) з однаковою ціною кожної сторінки. Фільтри
+    status / disease_id мають власні складені індекси з тим самим
+    хвостом (created_at, _id).
+    """
+    projected = parse_fields(fields)
+    filter_spec = build_filter(
+        status,
+        disease_id,
+        decided,
+        created_from,
+        created_to,
+        decode_cursor(cursor) if cursor else None,
+        order,
+    )
+    direction = -1 if order == "desc" else 1
+
+    collection = Diagnosis.get_pymongo_collection()
+    find = collection.find(filter_spec, projection={"created_at": 1, **dict.fromkeys(projected, 1)})
+    # на один більше: так відомо, чи є наступна сторінка, без count
+    find = find.sort([("created_at", direction), ("_id", direction)]).limit(size + 1)
+    docs = await find.to_list(length=size + 1)
+
+    has_more = len(docs) > size
+    docs = docs[:size]
+    next_cursor = encode_cursor(docs[-1]["created_at"], docs[-1]["_id"]) if has_more else None
+
+    return {
+        "items": [_item(doc) for doc in docs],
+        "size": size,
+        "next_cursor": next_cursor,
+    }
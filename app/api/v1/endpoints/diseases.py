@@ -1,8 +1,14 @@
+import inspect
+import re
 from typing import Any
 
+from bson import ObjectId
 from fastapi import APIRouter, HTTPException, Query
 
+from app.api.v1.schemas import DiseaseItem, DiseasesPage
 from app.models.plant import Plant
+from app.services.catalog import get_catalog
+from app.services.disease_search import get_disease_lookup, get_search_index
 
 router = APIRouter()
 
@@ -47,7 +53,161 @@ async def _load_flat_diseases() -> list[dict[str, Any]]:
     return flat
 
 
-@router.get("")
+RISK_ORDER = {"high": 3, "medium": 2, "low": 1, "none": 0}
+DISEASE_FIELDS = (
+    "description",
+    "symptoms",
+    "prevention",
+    "treatment",
+    "riskLevel",
+    "images",
+)
+TEXT_FIELDS = ("diseaseName", "description", "symptoms", "prevention", "treatment")
+# поле відповіді → поле документа після $unwind (лише скалярні поля)
+SORT_FIELDS = {
+    "plantId": "_id",
+    "plantName": "plantName",
+    "diseaseName": "diseases.diseaseName",
+    "description": "diseases.description",
+    "riskLevel": "_risk",
+}
+
+
+def _plant_id_match(plant_id: str) -> dict[str, Any]:
+    if ObjectId.is_valid(plant_id):
+        return {"_id": {"$in": [ObjectId(plant_id), plant_id]}}
+    return {"_id": plant_id}
+
+
+def _risk_rank_expr() -> dict[str, Any]:
+    """riskLevel → число для сортування: high > medium > low > none/інше."""
+    risk = {"$toLower": {"$ifNull": ["$diseases.riskLevel", ""]}}
+    return {
+        "$switch": {
+            "branches": [
+                {"case": {"$eq": [risk, level]}, "then": rank}
+                for level, rank in RISK_ORDER.items()
+                if rank
+            ],
+            "default": 0,
+        }
+    }
+
+
+def _build_diseases_pipeline(
+    q: str | None,
+    plant_id: str | None,
+    sort: str | None,
+    skip: int,
+    limit: int,
+) -> list[dict[str, Any]]:
+    plant_match: dict[str, Any] = {"diseases.0": {"$exists": True}}
+    if plant_id:
+        plant_match.update(_plant_id_match(plant_id))
+
+    disease_match: dict[str, Any] = {"diseases.diseaseName": {"$nin": [None, ""]}}
+    if q:
+        regex = {"$regex": re.escape(q), "$options": "i"}
+        text_match = [{f"diseases.{f}": regex} for f in TEXT_FIELDS]
+        # до $unwind — відкидає рослини без жодного збігу, щоб не розгортати
+        # їх; після — лишає саме ті хвороби, що збіглися
+        plant_match["$or"] = text_match
+        disease_match["$or"] = text_match
+
+    pipeline: list[dict[str, Any]] = [
+        {"$match": plant_match},
+        {
+            "$project": {
+                "plantName": 1,
+                "diseases.diseaseName": 1,
+                **{f"diseases.{f}": 1 for f in DISEASE_FIELDS},
+            }
+        },
+        {"$unwind": {"path": "$diseases", "includeArrayIndex": "_pos"}},
+        {"$match": disease_match},
+    ]
+
+    sort_spec: dict[str, int] = {}
+    parts = [p.strip() for p in (sort or "").split(",") if p.strip()]
+    if parts:
+        desc = parts[0].startswith("-")
+        field_name = parts[0].lstrip("-")
+        db_field = SORT_FIELDS.get(field_name)
+        if db_field == "_risk":
+            pipeline.append({"$addFields": {"_risk": _risk_rank_expr()}})
+        if db_field:
+            sort_spec[db_field] = -1 if desc else 1
+    # рівні значення — у порядку каталогу, як у стабільному sort
+    sort_spec.setdefault("_id", 1)
+    sort_spec["_pos"] = 1
+    pipeline.append({"$sort": sort_spec})
+
+    pipeline.append(
+        {
+            "$facet": {
+                "items": [{"$skip": skip}, {"$limit": limit}],
+                "total": [{"$count": "n"}],
+            }
+        }
+    )
+    return pipeline
+
+
+def _sort_key(field_name: str):
+    """Ключ сортування в Python з тією ж семантикою, що й у pipeline."""
+
+    def key_fn(item: dict[str, Any]):
+        v = item.get(field_name)
+        if field_name == "riskLevel":
+            return RISK_ORDER.get(str(v).lower(), 0) if v is not None else 0
+        return "" if v is None else str(v)
+
+    return key_fn
+
+
+def _search_page(
+    q: str, plant_id: str | None, sort: str | None, page: int, size: int
+) -> dict[str, Any]:
+    """q-пошук через інвертований індекс каталогу (BM25, стеми, префікси)."""
+    hits = get_search_index().search(q)
+    if plant_id:
+        hits = [h for h in hits if h.entry.get("plantId") == plant_id]
+
+    parts = [p.strip() for p in (sort or "").split(",") if p.strip()]
+    first = parts[0] if parts else "relevance"
+    if first.lstrip("-") != "relevance":
+        desc = first.startswith("-")
+        field_name = first.lstrip("-")
+        hits.sort(key=lambda h: h.order)
+        if field_name in SORT_FIELDS:
+            key_fn = _sort_key(field_name)
+            hits.sort(key=lambda h: key_fn(h.entry), reverse=desc)
+
+    start = page * size
+    return {
+        "items": [h.entry for h in hits[start : start + size]],
+        "page": page,
+        "size": size,
+        "count": len(hits),
+    }
+
+
+def _flat_item(doc: dict[str, Any]) -> dict[str, Any]:
+    d = doc.get("diseases") or {}
+    return {
+        "plantId": str(doc.get("_id")),
+        "plantName": doc.get("plantName"),
+        "diseaseName": d.get("diseaseName"),
+        "description": d.get("description"),
+        "symptoms": d.get("symptoms", []),
+        "prevention": d.get("prevention", []),
+        "treatment": d.get("treatment", []),
+        "riskLevel": d.get("riskLevel"),
+        "images": d.get("images", []),
+    }
+
+
+@router.get("", response_model=DiseasesPage)
 async def list_diseases(
     q: str | None = Query(
         default=None,
@@ -59,76 +219,45 @@ async def list_diseases(
     ),
     sort: str | None = Query(
         default="-diseaseName",
-        description="Сортування, напр. '-diseaseName' або 'plantName'",
+        description=("Сортування, напр. '-diseaseName', 'plantName' або 'relevance' (лише з q)"),
     ),
     page: int = Query(0, ge=0),
     size: int = Query(20, ge=1, le=100),
 ):
     """
     Повертає плаский список хвороб (по всіх рослинах), з фільтрами та пагінацією.
-    """
-    all_items = await _load_flat_diseases()
 
-    if plant_id:
-        all_items = [d for d in all_items if d.get("plantId") == plant_id]
-
-    if q:
-        q_lower = q.lower()
-
-        def matches(d: dict[str, Any]) -> bool:
-            parts: list[str] = []
-
-            for key in ("diseaseName", "description"):
-                val = d.get(key)
-                if isinstance(val, str):
-                    parts.append(val)
-
-            for key in ("symptoms", "prevention", "treatment"):
-                arr = d.get(key) or []
-                if isinstance(arr, list):
-                    parts.extend(str(x) for x in arr)
-
-            haystack = " ".join(parts).lower()
-            return q_lower in haystack
-
-        all_items = [d for d in all_items if matches(d)]
-
-    if sort:
-        parts = [p.strip() for p in sort.split(",") if p.strip()]
-        if parts:
-            first = parts[0]
-            desc = first.startswith("-")
-            field_name = first[1:] if desc else first
-
-            def key_fn(item: dict[str, Any]):
-                v = item.get(field_name)
-                if v is None:
-                    return ""
-
-                if field_name == "riskLevel":
-                    order = {"high": 3, "medium": 2, "low": 1, "none": 0}
-                    return order.get(str(v).lower(), 0)
-
-                return str(v)
-
-            all_items.sort(key=key_fn, reverse=desc)
-
-    total = len(all_items)
+    Без q фільтрація, сортування і пагінація виконуються в MongoDB одним
+    aggregation ($unwind → $match → $sort → $facet зі сторінкою і total),
+    тож у Python потрапляє лише запитана сторінка. З q — пошук в
+    інвертованому індексі знімка каталогу (стеми, префікс останнього
+    слова, BM25 для sort=relevance); поки знімок не завантажено — regex
+    у тому ж aggregation.
+    """
     size = max(size, 1)
     page = max(page, 0)
-    start = page * size
-    end = start + size
-    page_items = all_items[start:end]
+    if q and get_catalog().snapshot.version is not None:
+        return _search_page(q, plant_id, sort, page, size)
+    pipeline = _build_diseases_pipeline(q, plant_id, sort, page * size, size)
+
+    collection = Plant.get_pymongo_collection()
+    cursor = collection.aggregate(pipeline)
+    if inspect.isawaitable(cursor):
+        cursor = await cursor
+    result = await cursor.to_list(length=1)
+
+    facet = result[0] if result else {}
+    total_rows = facet.get("total") or []
 
     return {
-        "items": page_items,
+        "items": [_flat_item(doc) for doc in facet.get("items", [])],
         "page": page,
         "size": size,
-        "count": total,
+        "count": total_rows[0]["n"] if total_rows else 0,
     }
 
 
-@router.get("/{disease_id}")
+@router.get("/{disease_id}", response_model=DiseaseItem)
 async def get_disease(disease_id: str):
     """
     Деталі конкретної хвороби.
@@ -139,7 +268,17 @@ async def get_disease(disease_id: str):
     Алгоритм:
     1) спочатку шукаємо точний збіг diseaseName;
     2) якщо немає — шукаємо за підрядком (для запитів типу /diseases/гниль).
+
+    Обидва кроки — у lookup-структурах знімка каталогу в пам'яті (словник
+    і триграмний індекс), без звернення до Mongo. Поки знімок не
+    завантажено — лінійний перебір каталогу, прочитаного з БД.
     """
+    if get_catalog().snapshot.version is not None:
+        found = get_disease_lookup().get(disease_id)
+        if found is None:
+            raise HTTPException(status_code=404, detail="disease_not_found")
+        return found
+
     all_items = await _load_flat_diseases()
 
     for d in all_items:
@@ -1,9 +1,26 @@
+import os
+
 from fastapi import APIRouter, status
 from fastapi.responses import JSONResponse
 
 from app.core.config import settings
 from app.models.diagnosis import Diagnosis
-from app.services.inference import model_backend
+from app.services.catalog import get_catalog
+from app.services.disease_search import get_disease_lookup, get_search_index
+from app.services.inference import (
+    batching_stats,
+    is_ready,
+    load_state,
+    model_backend,
+    model_version,
+)
+from app.services.prediction_cache import cache_stats
+from app.services.response_cache import response_cache_stats
+from app.services.rollups import rollup_stats
+from app.services.storage import get_storage
+from app.services.tracing import tracing_stats
+from app.services.write_behind import write_behind_stats
+from app.utils.memory import process_memory
 
 router = APIRouter()
 
@@ -16,7 +33,7 @@ async def health_root():
     - база даних (простий запит через Diagnosis)
     """
     backend = model_backend()
-    model_ok = backend != "dummy"
+    model_ok = is_ready() and backend != "dummy"
 
     try:
         await Diagnosis.find_one()
@@ -35,9 +52,31 @@ async def health_root():
         "status": overall,
         "db": "ok" if db_ok else "error",
         "model_backend": backend,
+        "catalog_version": get_catalog().snapshot.version,
     }
 
 
+@router.get("/live")
+def health_live():
+    """Liveness: процес живий і обслуговує event loop. Нічого не перевіряє."""
+    return {"status": "alive"}
+
+
+@router.get("/ready")
+def health_ready():
+    """
+    Readiness: 200, коли модель завантажена і прогріта,
+    інакше 503 зі станом (loading / warming / failed).
+    """
+    state = load_state()
+    if not is_ready():
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "not_ready", **state},
+        )
+    return {"status": "ready", **state}
+
+
 @router.get("/db")
 async def health_db():
     """
@@ -58,7 +97,52 @@ async def health_db():
 
 @router.get("/model")
 def health_model():
-    return {"backend": model_backend()}
+    return {
+        "backend": model_backend(),
+        "version": model_version(),
+        "state": load_state()["state"],
+    }
+
+
+@router.get("/catalog")
+def health_catalog():
+    """
+    Знімок каталогу в пам'яті: версія (відбиток вмісту), покоління,
+    кількість рослин/хвороб, режим оновлення (change_stream / polling)
+    стан пошукового індексу, lookup для /diseases/{id} і кешу відповідей.
+    """
+    return {
+        **get_catalog().status(),
+        "search_index": get_search_index().stats(),
+        "disease_lookup": get_disease_lookup().stats(),
+        "response_cache": response_cache_stats(),
+    }
+
+
+@router.get("/inference")
+def health_inference():
+    """
+    Метрики мікробатчингу (розміри батчів, час очікування в черзі,
+    тривалість forward pass, глибина черги), hit/miss кешу передбачень,
+    буфер відкладеного запису Diagnosis, лічильники агрегатів для /stats
+    і пам'ять цього воркера (RSS/PSS).
+    """
+    return {
+        "batching": settings.inference_batching,
+        **batching_stats(),
+        "cache": cache_stats(),
+        "write_behind": write_behind_stats(),
+        "rollups": rollup_stats(),
+        "tracing": tracing_stats(),
+        "pid": os.getpid(),
+        "memory": process_memory(),
+    }
+
+
+@router.get("/storage")
+def health_storage():
+    """Сховище фото; для s3 — черга фонових завантажень і лічильники."""
+    return get_storage().stats()
 
 
 @router.get("/app")
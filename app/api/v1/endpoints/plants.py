@@ -1,44 +1,143 @@
-from typing import Any
+import asyncio
+import base64
+import binascii
+import json
+import re
+from typing import Any, Literal
 
-from fastapi import APIRouter, Query
+from bson import ObjectId
+from fastapi import APIRouter, HTTPException, Query
 
-from app.models.plant import Plant
+from app.api.v1.schemas import PlantsPage
+from app.models.plant import PLANT_NAME_COLLATION, Plant
 
 router = APIRouter()
 
+# у кореневій collation CLDR U+FFFF має найбільшу вагу — верхня межа префікса
+PREFIX_UPPER = "\uffff"
 
-@router.get("")
+
+def encode_cursor(plant_name: str | None, plant_id: Any) -> str:
+    """Непрозорий курсор: позиція останнього елемента сторінки."""
+    oid = {"$oid": str(plant_id)} if isinstance(plant_id, ObjectId) else plant_id
+    raw = json.dumps([plant_name, oid], ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str | None, Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        plant_name, oid = json.loads(raw.decode("utf-8"))
+        if isinstance(oid, dict):
+            oid = ObjectId(oid["$oid"])
+    except (binascii.Error, ValueError, TypeError, KeyError) as e:
+        raise HTTPException(status_code=400, detail="invalid_cursor") from e
+    if plant_name is not None and not isinstance(plant_name, str):
+        raise HTTPException(status_code=400, detail="invalid_cursor")
+    return plant_name, oid
+
+
+def _search_filter(q: str | None, mode: str) -> dict[str, Any]:
+    """
+    substring — входження в plantName / scientificName / description без
+    урахування регістру (як було завжди, повний скан); prefix — початок
+    plantName або scientificName без урахування регістру (діапазон по
+    індексах з collation); text — слова з plantName / scientificName /
+    description через текстовий індекс.
+    """
+    q = (q or "").strip()
+    if not q:
+        return {}
+    if mode == "substring":
+        regex = {"$regex": re.escape(q), "$options": "i"}
+        return {
+            "$or": [
+                {"plantName": regex},
+                {"scientificName": regex},
+                {"description": regex},
+            ]
+        }
+    if mode == "text":
+        return {"$text": {"$search": q}}
+    bounds = {"$gte": q, "$lt": q + PREFIX_UPPER}
+    return {"$or": [{"plantName": bounds}, {"scientificName": bounds}]}
+
+
+def _after_cursor(plant_name: str | None, plant_id: Any) -> dict[str, Any]:
+    """Keyset: усе, що в порядку (plantName, _id) іде після курсора."""
+    return {
+        "$or": [
+            {"plantName": {"$gt": plant_name}},
+            {"plantName": plant_name, "_id": {"$gt": plant_id}},
+        ]
+    }
+
+
+def _and(*filters: dict[str, Any]) -> dict[str, Any]:
+    parts = [f for f in filters if f]
+    if not parts:
+        return {}
+    return parts[0] if len(parts) == 1 else {"$and": parts}
+
+
+async def _count(collection, filter_spec: dict[str, Any], collation) -> int:
+    if not filter_spec:
+        return await collection.estimated_document_count()
+    kwargs = {"collation": collation} if collation else {}
+    return await collection.count_documents(filter_spec, **kwargs)
+
+
+@router.get("", response_model=PlantsPage)
 async def list_plants(
     q: str | None = Query(default=None, description="Пошук по назві/опису рослини"),
+    mode: Literal["substring", "prefix", "text"] = Query(
+        default="substring",
+        description=(
+            "substring — входження в назву чи опис, prefix — початок назви "
+            "(латинської теж, по індексу), text — слова з назви та опису"
+        ),
+    ),
+    cursor: str | None = Query(default=None, description="next_cursor з попередньої сторінки"),
+    with_total: bool = Query(default=True, description="Рахувати загальну кількість (count)"),
     page: int = Query(0, ge=0),
     size: int = Query(20, ge=1, le=100),
 ):
     """
-    Повертає список рослин з колекції MongoDB `plants`.
+    Повертає список рослин з колекції MongoDB `plants`, відсортований
+    за (plantName, _id); у режимі prefix — з collation uk.
 
-    - q: case-insensitive пошук по plantName / scientificName / description
-    - page/size: пагінація
+    - q/mode: пошук — входження (за замовчуванням), префіксний по індексу
+      з collation або текстовий
+    - cursor: keyset-пагінація — наступна сторінка від next_cursor,
+      без skip; page використовується лише без cursor
+    - with_total: count рахується паралельно зі сторінкою
+      (count_documents, без фільтра — оцінка за метаданими колекції);
+      false — count = null
     """
     size = max(size, 1)
     page = max(page, 0)
-    skip = page * size
-    limit = size
 
     collection = Plant.get_pymongo_collection()
+    # collation — лише там, де її використовує індекс: $text її не
+    # підтримує, а substring зберігає звичний бінарний порядок
+    collation = PLANT_NAME_COLLATION if mode == "prefix" else None
 
-    filter_spec: dict[str, Any] = {}
-    if q:
-        regex = {"$regex": q, "$options": "i"}
-        filter_spec = {
-            "$or": [
-                {"plantName": regex},
-                {"scientificName": regex},
-                {"description": regex},
-            ]
-        }
+    base_filter = _search_filter(q, mode)
+    filter_spec = base_filter
+    skip = page * size
+    if cursor:
+        filter_spec = _and(base_filter, _after_cursor(*decode_cursor(cursor)))
+        skip = 0
+
+    find = collection.find(filter_spec, collation=collation)
+    find = find.sort([("plantName", 1), ("_id", 1)]).skip(skip).limit(size)
 
-    cursor = collection.find(filter_spec).sort("plantName", 1).skip(skip).limit(limit)
-    docs = await cursor.to_list(length=limit)
+    if with_total:
+        docs, total = await asyncio.gather(
+            find.to_list(length=size), _count(collection, base_filter, collation)
+        )
+    else:
+        docs, total = await find.to_list(length=size), None
 
     items = [
         {
@@ -50,10 +149,14 @@ async def list_plants(
         }
         for doc in docs
     ]
+    next_cursor = (
+        encode_cursor(docs[-1].get("plantName"), docs[-1].get("_id")) if len(docs) == size else None
+    )
 
     return {
         "items": items,
         "page": page,
         "size": size,
-        "count": len(items),
+        "count": total,
+        "next_cursor": next_cursor,
     }
@@ -0,0 +1,151 @@
+import inspect
+from datetime import UTC, datetime, timedelta
+from typing import Any, Literal
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.api.v1.schemas import StatsResponse
+from app.models.diagnosis_rollup import DiagnosisRollup
+from app.services.catalog import get_catalog
+from app.services.rollups import DECIDED, LOW_CONFIDENCE, bucket_start
+
+router = APIRouter()
+
+DEFAULT_RANGE = timedelta(days=7)
+
+
+def _utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=UTC) if value.tzinfo is None else value
+
+
+def build_stats_pipeline(
+    granularity: str,
+    since: datetime,
+    until: datetime,
+    plant_id: str | None,
+    top: int,
+) -> list[dict[str, Any]]:
+    match: dict[str, Any] = {
+        "granularity": granularity,
+        "bucket": {"$gte": bucket_start(since, granularity), "$lt": until},
+    }
+    if plant_id:
+        match["plantId"] = plant_id
+
+    return [
+        {"$match": match},
+        {
+            "$facet": {
+                "plants": [
+                    {
+                        "$group": {
+                            "_id": {
+                                "plantId": "$plantId",
+                                "diseaseId": "$diseaseId",
+                                "outcome": "$outcome",
+                            },
+                            "count": {"$sum": "$total"},
+                        }
+                    },
+                    {"$sort": {"count": -1, "_id.diseaseId": 1}},
+                    {
+                        "$group": {
+                            "_id": "$_id.plantId",
+                            "total": {"$sum": "$count"},
+                            "diseases": {
+                                "$push": {
+                                    "diseaseId": "$_id.diseaseId",
+                                    "outcome": "$_id.outcome",
+                                    "count": "$count",
+                                }
+                            },
+                        }
+                    },
+                    {"$sort": {"total": -1, "_id": 1}},
+                    {
+                        "$project": {
+                            "total": 1,
+                            "diseases": {"$slice": ["$diseases", top]},
+                        }
+                    },
+                ],
+                "series": [
+                    {
+                        "$group": {
+                            "_id": {"bucket": "$bucket", "outcome": "$outcome"},
+                            "count": {"$sum": "$total"},
+                        }
+                    },
+                    {"$sort": {"_id.bucket": 1}},
+                ],
+            }
+        },
+    ]
+
+
+def _series(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    by_bucket: dict[datetime, dict[str, Any]] = {}
+    for row in rows:
+        bucket = _utc(row["_id"]["bucket"])
+        point = by_bucket.setdefault(bucket, {"bucket": bucket, DECIDED: 0, LOW_CONFIDENCE: 0})
+        point[row["_id"]["outcome"]] = point.get(row["_id"]["outcome"], 0) + int(row["count"])
+    return [by_bucket[b] for b in sorted(by_bucket)]
+
+
+@router.get("", response_model=StatsResponse)
+async def diagnosis_stats(
+    granularity: Literal["hour", "day"] = Query(default="day"),
+    since: datetime | None = Query(  # noqa: B008
+        default=None, description="Від (включно), ISO 8601; за замовчуванням −7 днів"
+    ),
+    until: datetime | None = Query(  # noqa: B008
+        default=None, description="До (не включно), ISO 8601; за замовчуванням зараз"
+    ),
+    plant_id: str | None = Query(default=None),
+    top: int = Query(10, ge=1, le=100, description="Хвороб на рослину"),
+):
+    """
+    Найчастіші діагнози по рослинах і ряд за годинами/добами.
+
+    Читає лише diagnosis_rollups (лічильники, що оновлюються при записі
+    Diagnosis), тож ціна запиту залежить від кількості годин/діб і
+    ключів у діапазоні, а не від кількості діагнозів. Межі округлюються
+    до початку години/доби.
+    """
+    until = _utc(until) if until is not None else datetime.now(UTC)
+    since = _utc(since) if since is not None else until - DEFAULT_RANGE
+    if since >= until:
+        raise HTTPException(status_code=400, detail="invalid_range")
+
+    collection = DiagnosisRollup.get_pymongo_collection()
+    cursor = collection.aggregate(build_stats_pipeline(granularity, since, until, plant_id, top))
+    if inspect.isawaitable(cursor):
+        cursor = await cursor
+    result = await cursor.to_list(length=1)
+    facet = result[0] if result else {}
+
+    catalog = get_catalog().snapshot
+    plants = []
+    for row in facet.get("plants", []):
+        plant = catalog.plant_by_id(row["_id"]) if row["_id"] else None
+        plants.append(
+            {
+                "plantId": row["_id"],
+                "plantName": plant.get("plantName") if plant else None,
+                "total": row["total"],
+                "diseases": row["diseases"],
+            }
+        )
+
+    series = _series(facet.get("series", []))
+    return {
+        "granularity": granularity,
+        "since": bucket_start(since, granularity),
+        "until": until,
+        "totals": {
+            DECIDED: sum(p[DECIDED] for p in series),
+            LOW_CONFIDENCE: sum(p[LOW_CONFIDENCE] for p in series),
+        },
+        "plants": plants,
+        "series": series,
+    }
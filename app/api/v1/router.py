@@ -1,10 +1,19 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import diagnose, diseases, health, plants
+from app.api.v1.endpoints import (
+    diagnose,
+    diagnoses,
+    diseases,
+    health,
+    plants,
+    stats,
+)
 
 api_router = APIRouter(prefix="/api/v1")
 
 api_router.include_router(health.router, prefix="/health", tags=["health"])
 api_router.include_router(diagnose.router, prefix="", tags=["diagnose"])
+api_router.include_router(diagnoses.router, prefix="/diagnoses", tags=["diagnoses"])
 api_router.include_router(plants.router, prefix="/plants", tags=["plants"])
 api_router.include_router(diseases.router, prefix="/diseases", tags=["diseases"])
+api_router.include_router(stats.router, prefix="/stats", tags=["stats"])
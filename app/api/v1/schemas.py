@@ -0,0 +1,128 @@
+"""
+Моделі відповідей API v1.
+
+Ендпоінти з response_model FastAPI серіалізує одразу в JSON-байти ядром
+pydantic (Rust), без проміжного jsonable_encoder → dict → json.dumps.
+Поля — рівно ті, що ендпоінти віддавали раніше; старі "криві" документи
+каталогу (null замість списку тощо) проходять як null.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Literal
+
+from pydantic import BaseModel
+
+
+class Candidate(BaseModel):
+    plant_id: str | None = None
+    plant_name: str | None = None
+    disease_id: str | None = None
+    disease_name: str | None = None
+    confidence: float
+
+
+class DiagnoseResponse(BaseModel):
+    diagnosisId: str
+    decidedDiseaseId: str | None = None
+    candidates: list[Candidate]
+    inferenceMs: int
+
+
+class BatchItem(BaseModel):
+    index: int
+    filename: str | None = None
+    status: Literal["ok", "low_confidence", "error"]
+    error: str | None = None
+    diagnosisId: str | None = None
+    decidedDiseaseId: str | None = None
+    candidates: list[Candidate] | None = None
+
+
+class BatchDiagnoseResponse(BaseModel):
+    items: list[BatchItem]
+    count: int
+    inferenceMs: int
+
+
+class PlantItem(BaseModel):
+    id: str
+    plantName: str | None = None
+    scientificName: str | None = None
+    description: str | None = None
+    imageUrl: str | None = None
+
+
+class PlantsPage(BaseModel):
+    items: list[PlantItem]
+    page: int
+    size: int
+    count: int | None = None
+    next_cursor: str | None = None
+
+
+class DiseaseItem(BaseModel):
+    plantId: str
+    plantName: str | None = None
+    diseaseName: str | None = None
+    description: str | None = None
+    symptoms: list[str] | None = None
+    prevention: list[str] | None = None
+    treatment: list[str] | None = None
+    riskLevel: str | None = None
+    images: list[str] | None = None
+
+
+class DiseasesPage(BaseModel):
+    items: list[DiseaseItem]
+    page: int
+    size: int
+    count: int
+
+
+class DiagnosisItem(BaseModel):
+    """Поля поза id/created_at присутні, лише якщо їх запитано у fields=."""
+
+    id: str
+    created_at: datetime
+    status: str | None = None
+    inference_ms: int | None = None
+    request: dict[str, Any] | None = None
+    result: dict[str, Any] | None = None
+    trace_id: str | None = None
+    spans: list[dict[str, Any]] | None = None
+
+
+class DiagnosesPage(BaseModel):
+    items: list[DiagnosisItem]
+    size: int
+    next_cursor: str | None = None
+
+
+class StatsDisease(BaseModel):
+    diseaseId: str | None = None
+    outcome: Literal["decided", "low_confidence"]
+    count: int
+
+
+class StatsPlant(BaseModel):
+    plantId: str | None = None
+    plantName: str | None = None
+    total: int
+    diseases: list[StatsDisease]
+
+
+class StatsPoint(BaseModel):
+    bucket: datetime
+    decided: int = 0
+    low_confidence: int = 0
+
+
+class StatsResponse(BaseModel):
+    granularity: Literal["hour", "day"]
+    since: datetime
+    until: datetime
+    totals: dict[str, int]
+    plants: list[StatsPlant]
+    series: list[StatsPoint]
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Callable
+
+from app.core.config import settings
+
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class BodySizeLimitMiddleware:
+    """
+    413 ще до читання тіла: запит на ендпоінт завантаження з
+    Content-Length понад ліміт відхиляється, не потрапляючи в парсер
+    multipart (той спершу спулить увесь файл у тимчасовий файл).
+    Без Content-Length (chunked) ліміт перевіряє сам ендпоінт під час
+    потокового читання.
+    """
+
+    def __init__(self, app, limits: Callable[[str], int | None]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            limit = self.limits(scope["path"])
+            if limit is not None:
+                length = dict(scope["headers"]).get(b"content-length")
+                if length is not None and length.isdigit() and int(length) > limit:
+                    await self._reject(send, limit)
+                    return
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _reject(send, limit: int) -> None:
+        body = json.dumps({"detail": f"request_too_large: max {limit} bytes"})
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 413,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"connection", b"close"),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body.encode()})
+
+
+def upload_limits(path: str) -> int | None:
+    """Максимальний Content-Length для ендпоінтів завантаження фото."""
+    if path.endswith("/diagnose"):
+        return settings.upload_max_bytes + MULTIPART_OVERHEAD
+    if path.endswith("/diagnose/batch"):
+        max_files = settings.diagnose_batch_max_files
+        return (settings.upload_max_bytes + MULTIPART_OVERHEAD) * max_files
+    return None
@@ -0,0 +1,140 @@
+"""
+Стиснення відповідей за Accept-Encoding: br (якщо встановлено
+requirements-compression.txt), інакше gzip.
+
+Стискаються лише великі текстові/JSON тіла, віддані одним повідомленням;
+потокові відповіді і ті, що вже мають Content-Encoding (кеш відповідей
+/plants і /diseases зберігає тіла стиснутими), проходять як є.
+"""
+
+from __future__ import annotations
+
+import gzip
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - залежить від оточення
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def accepted_encodings(header: str) -> set[str]:
+    out = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        if name:
+            out.add(name.strip().lower())
+    return out
+
+
+def available_encodings() -> tuple[str, ...]:
+    """Кодування, які вміє цей процес, у порядку переваги."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    accepted = accepted_encodings(accept_encoding)
+    for encoding in available_encodings():
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+def compress(
+    body: bytes,
+    encoding: str,
+    gzip_level: int = GZIP_LEVEL,
+    brotli_quality: int = BROTLI_QUALITY,
+) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    # mtime=0: однакове тіло → однакові байти (і той самий ETag у проксі)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+def _compressible(media_type: str) -> bool:
+    media_type = media_type.split(";", 1)[0].strip().lower()
+    return (
+        media_type.startswith("text/")
+        or media_type == "application/json"
+        or media_type.endswith("+json")
+    )
+
+
+class CompressionMiddleware:
+    """Відповідь ендпоінта буферизується до першого body-повідомлення."""
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        gzip_level: int = GZIP_LEVEL,
+        brotli_quality: int = BROTLI_QUALITY,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = b""
+        for k, v in scope["headers"]:
+            if k.lower() == b"accept-encoding":
+                accept = v
+                break
+        encoding = choose_encoding(accept.decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: dict | None = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if passthrough or start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = {k.lower(): v for k, v in start.get("headers", [])}
+            if (
+                message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or b"content-encoding" in headers
+                or not _compressible(headers.get(b"content-type", b"").decode("latin-1"))
+            ):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding, self.gzip_level, self.brotli_quality)
+            vary = headers.get(b"vary", b"")
+            if b"accept-encoding" not in vary.lower():
+                vary = vary + b", Accept-Encoding" if vary else b"Accept-Encoding"
+            raw = [
+                (k, v)
+                for k, v in start.get("headers", [])
+                if k.lower() not in (b"content-length", b"vary")
+            ]
+            raw += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(compressed)).encode()),
+                (b"vary", vary),
+            ]
+            await send({**start, "headers": raw})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
@@ -5,6 +5,7 @@ import os
 import re
 from functools import lru_cache
 from pathlib import Path
+from typing import Literal
 
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -13,6 +14,9 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 class Settings(BaseSettings):
     app_name: str = "Plantio API"
     app_version: str = "0.1.0"
+    # ідентифікатор збірки (git sha) для ETag кешу відповідей; порожній —
+    # відбиток вихідного коду app/
+    build_id: str | None = None
     env: str = "dev"
 
     mongo_uri_local: str = "mongodb://localhost:27017/plantio"
@@ -28,10 +32,119 @@ class Settings(BaseSettings):
 
     allowed_origins: list[str] = []
 
+    # завантаження фото: максимальний розмір файлу (більші — 413) і розмір
+    # шматка потокового читання
+    upload_max_bytes: int = 20 * 1024 * 1024
+    upload_chunk_bytes: int = 1024 * 1024
+
+    # сховище фото: local (upload_dir) або s3 — локальна робоча копія
+    # + фонове завантаження в бакет (потрібен requirements-storage-s3.txt)
+    storage_backend: Literal["local", "s3"] = "local"
+    s3_bucket: str | None = None
+    s3_prefix: str = "uploads/"
+    s3_endpoint_url: str | None = None  # MinIO / інше S3-сумісне
+    s3_region: str | None = None
+    s3_access_key_id: str | None = None
+    s3_secret_access_key: str | None = None
+    s3_max_pool_connections: int = 16
+    s3_multipart_threshold_bytes: int = 8 * 1024 * 1024
+    s3_part_bytes: int = 8 * 1024 * 1024
+    s3_upload_queue_size: int = 1000
+    s3_upload_concurrency: int = 4
+    s3_upload_retries: int = 5
+    # скільки байт уже завантажених у бакет копій тримати на локальному диску
+    s3_local_cache_bytes: int = 1024 * 1024 * 1024
+
+    # POST /diagnose/batch: максимум файлів в одному запиті
+    diagnose_batch_max_files: int = 50
+    # верхня межа topK у /diagnose і /diagnose/batch
+    diagnose_max_topk: int = 20
+
     min_confidence: float = 0.6
     allow_healthy: bool = False
     min_margin: float = 0.0
 
+    # мікробатчинг інференсу: скільки запитів збирати і скільки чекати (мс)
+    inference_batching: bool = True
+    inference_max_batch_size: int = 16
+    inference_max_wait_ms: float = 5.0
+
+    # пул виконавців інференсу: thread | process; 0 потоків torch = cores // workers
+    inference_mode: Literal["thread", "process"] = "thread"
+    inference_workers: int = 1
+    inference_torch_threads: int = 0
+    # JPEG draft (DCT scaling): декодувати великі фото одразу близько до 224x224
+    inference_jpeg_draft: bool = True
+    # auto: *.onnx → onnxruntime, інакше torch (TorchScript / pickled nn.Module)
+    inference_backend: Literal["auto", "torch", "onnx"] = "auto"
+    # оптимізований варіант з scripts/optimize_model.py: <model_dir>/variants/<name>.pt
+    model_variant: str | None = None
+    # torch.jit.optimize_for_inference для TorchScript-моделей при завантаженні
+    inference_jit_optimize: bool = False
+
+    # python -m app.serve: кількість процесів uvicorn (модель спільна через fork)
+    # і як часто логувати RSS/PSS воркерів (0 — лише один раз після старту)
+    serve_workers: int = 1
+    serve_memory_report_s: float = 300.0
+
+    # завантаження моделі у фоні з lifespan; /health/ready = 503, доки не прогріта
+    model_load_in_background: bool = True
+    # прогрів: N forward pass на кожному розмірі батча ([] = 1 і max_batch_size)
+    inference_warmup_iters: int = 2
+    inference_warmup_batch_sizes: list[int] = []
+
+    # знімок каталогу plants у пам'яті: change streams (якщо Mongo вміє),
+    # інакше опитування раз на catalog_refresh_s (0 — лише при старті)
+    catalog_watch: bool = True
+    catalog_refresh_s: float = 60.0
+
+    # відкладений запис Diagnosis: відповідь не чекає на Mongo, документи
+    # пишуться пачками insert_many (batch_size або раз на flush_ms)
+    diagnosis_write_behind: bool = False
+    diagnosis_write_batch_size: int = 100
+    diagnosis_write_flush_ms: float = 200.0
+    diagnosis_write_max_pending: int = 10_000
+    diagnosis_write_retries: int = 5
+
+    # лічильники діагнозів за годину/добу для /stats: $inc-upsert'и
+    # пачкою раз на flush_ms
+    rollups_enabled: bool = True
+    rollups_flush_ms: float = 1000.0
+
+    # кеш відповідей /plants і /diseases: ключ — query + версія каталогу,
+    # ETag/304, тіла зберігаються стиснутими; max_age — Cache-Control
+    response_cache_enabled: bool = True
+    response_cache_size: int = 1024
+    response_cache_max_mb: int = 64
+    response_cache_max_age_s: int = 60
+
+    # gzip/br для решти великих JSON-відповідей (напр. /diagnose/batch);
+    # br — лише з requirements-compression.txt
+    response_compression_enabled: bool = True
+    response_compression_min_bytes: int = 1024
+
+    # GET /metrics (Prometheus text); Server-Timing зі стадіями /diagnose
+    # у відповіді — для налагодження, за замовчуванням вимкнено
+    metrics_enabled: bool = True
+    server_timing_enabled: bool = False
+
+    # трасування: trace id з traceparent або новий, span'и стадій — у
+    # Diagnosis і loguru extra; у JSONL (OTLP/JSON) іде частка sample_rate
+    # (і запити з traceparent ...-01); порожній export_path — без файлу
+    tracing_enabled: bool = True
+    tracing_sample_rate: float = 0.01
+    tracing_export_path: str = "./storage/traces/traces.jsonl"
+    tracing_export_max_mb: int = 64
+    tracing_flush_ms: float = 1000.0
+    tracing_service_name: str = "plantio-api"
+
+    # кеш передбачень за (sha256, версія моделі, topK): LRU у пам'яті + Mongo
+    prediction_cache_enabled: bool = True
+    prediction_cache_size: int = 2048
+    prediction_cache_ttl_s: float = 3600.0
+    prediction_cache_persistent: bool = True
+    prediction_cache_persistent_ttl_s: int = 7 * 24 * 3600
+
     @property
     def mongo_uri(self) -> str:
         return self.mongo_uri_atlas or self.mongo_uri_local
@@ -75,9 +188,7 @@ def _read_env_selector(file: str = ".env") -> str | None:
             if not m:
                 continue
             val = m.group(1).strip()
-            if "#" in val and not (
-                val.startswith(("'", '"')) and val.endswith(("'", '"'))
-            ):
+            if "#" in val and not (val.startswith(("'", '"')) and val.endswith(("'", '"'))):
                 val = val.split("#", 1)[0].strip()
             val = val.strip().strip('"').strip("'")
             return val or None
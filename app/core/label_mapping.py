@@ -65,6 +65,9 @@ PAIR_DISEASE_MAP = {
 PLANT_NAME_MAP["unknown_plant"] = None
 DISEASE_NAME_MAP["unknown_disease"] = "Невідома хвороба"
 
+# UA-назви хвороб для O(1) перевірки «мітка вже нормалізована»
+_DISEASE_NAMES_UA = frozenset(DISEASE_NAME_MAP.values())
+
 
 # -------------------------------------------------------
 # 4. Основна функція нормалізації
@@ -72,7 +75,7 @@ DISEASE_NAME_MAP["unknown_disease"] = "Невідома хвороба"
 def normalize_names(plant_label, disease_label):
     plant = PLANT_NAME_MAP.get(plant_label, plant_label)
 
-    if disease_label in DISEASE_NAME_MAP.values():
+    if disease_label in _DISEASE_NAMES_UA:
         return plant, disease_label
 
     disease = DISEASE_NAME_MAP.get(disease_label, disease_label)
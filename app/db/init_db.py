@@ -3,8 +3,10 @@ from motor.motor_asyncio import AsyncIOMotorClient
 
 from app.core.config import settings
 from app.models.diagnosis import Diagnosis
+from app.models.diagnosis_rollup import DiagnosisRollup
 from app.models.disease import Disease
 from app.models.plant import Plant
+from app.models.prediction import CachedPrediction
 
 _client: AsyncIOMotorClient | None = None
 
@@ -13,4 +15,7 @@ async def init_db():
     global _client
     _client = AsyncIOMotorClient(settings.mongo_uri)
     db = _client.get_database(settings.database_name)
-    await beanie_init(database=db, document_models=[Plant, Disease, Diagnosis])
+    await beanie_init(
+        database=db,
+        document_models=[Plant, Disease, Diagnosis, DiagnosisRollup, CachedPrediction],
+    )
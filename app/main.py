@@ -1,10 +1,64 @@
-from contextlib import asynccontextmanager
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from loguru import logger
 
 from app.api.v1.router import api_router
+from app.core.body_limit import BodySizeLimitMiddleware, upload_limits
+from app.core.compression import CompressionMiddleware
+from app.core.config import settings
 from app.db.init_db import _client, init_db
+from app.services import inference
+from app.services.catalog import get_catalog
+from app.services.metrics import CONTENT_TYPE, MetricsMiddleware, render_metrics
+from app.services.prediction_cache import get_prediction_cache
+from app.services.response_cache import ResponseCacheMiddleware
+from app.services.rollups import get_rollups
+from app.services.storage import get_storage
+from app.services.tracing import (
+    TracingMiddleware,
+    get_trace_exporter,
+    install_log_context,
+)
+from app.services.write_behind import get_diagnosis_writer
+
+
+def _process_started_at() -> float:
+    """
+    Момент старту процесу у шкалі time.perf_counter() (Linux: /proc/self/stat),
+    щоб час до bind/ready включав імпорт інтерпретатора і залежностей.
+    Деінде — момент імпорту цього модуля.
+    """
+    now = time.perf_counter()
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        uptime = time.clock_gettime(time.CLOCK_BOOTTIME) - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return now
+    return now - max(0.0, uptime)
+
+
+_STARTED_AT = _process_started_at()
+
+
+async def _load_model() -> None:
+    await inference.load_and_warmup(_STARTED_AT)
+    if not inference.is_ready():
+        return
+
+    cache = get_prediction_cache()
+    if cache is not None:
+        try:
+            purged = await cache.purge_stale_versions()
+            if purged:
+                logger.info("Prediction cache: purged {} stale entries", purged)
+        except Exception:
+            logger.exception("Prediction cache purge failed")
 
 
 @asynccontextmanager
@@ -14,16 +68,98 @@ async def lifespan(app: FastAPI):
     await init_db()
     logger.info("Database initialized")
 
+    catalog = get_catalog()
+    await catalog.start()
+
+    writer = get_diagnosis_writer()
+    if writer is not None:
+        await writer.start()
+
+    rollups = get_rollups()
+    if rollups is not None:
+        await rollups.start()
+
+    storage = get_storage()
+    await storage.start()
+
+    exporter = get_trace_exporter()
+    if exporter is not None:
+        await exporter.start()
+
+    # модель вантажиться і прогрівається у фоні: сервер одразу приймає
+    # з'єднання, а /health/ready віддає 503, доки модель не готова
+    if settings.model_load_in_background:
+        load_task = asyncio.create_task(_load_model(), name="model-load")
+    else:
+        load_task = None
+        await _load_model()
+
+    logger.info(
+        "Startup complete in {:.2f}s — accepting connections",
+        time.perf_counter() - _STARTED_AT,
+    )
+
     try:
         yield
     finally:
         logger.info("Shutting down…")
 
+        if load_task is not None and not load_task.done():
+            load_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await load_task
+
+        await catalog.stop()
+        await inference.shutdown()
+
+        prediction_cache = get_prediction_cache()
+        if prediction_cache is not None:
+            await prediction_cache.flush()
+
+        # до закриття клієнта Mongo: дописуємо відкладені Diagnosis
+        if writer is not None:
+            await writer.stop()
+        # після буфера: дописані ним Diagnosis теж потрапляють у лічильники
+        if rollups is not None:
+            await rollups.stop()
+        await storage.stop()
+        if exporter is not None:
+            await exporter.stop()
+
         if _client is not None:
             _client.close()
             logger.info("MongoDB client closed")
 
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(BodySizeLimitMiddleware, limits=upload_limits)
+app.add_middleware(
+    ResponseCacheMiddleware,
+    prefixes=("/api/v1/plants", "/api/v1/diseases"),
+    max_age_s=settings.response_cache_max_age_s,
+    min_compress_size=settings.response_compression_min_bytes,
+)
+# зовнішній шар: тіла з кешу відповідей уже стиснуті і проходять як є
+if settings.response_compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.response_compression_min_bytes,
+    )
+# найзовнішній: латентність включає кеш і стиснення
+if settings.metrics_enabled or settings.server_timing_enabled:
+    app.add_middleware(
+        MetricsMiddleware,
+        server_timing=settings.server_timing_enabled,
+    )
+# ще зовнішніший: кореневий span охоплює і метрики, і кеш
+if settings.tracing_enabled:
+    install_log_context()
+    app.add_middleware(TracingMiddleware, sample_rate=settings.tracing_sample_rate)
 
 app.include_router(api_router)
+
+if settings.metrics_enabled:
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics() -> PlainTextResponse:
+        return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
@@ -3,6 +3,7 @@ from typing import Any
 
 from beanie import Document
 from pydantic import Field
+from pymongo import ASCENDING, DESCENDING, IndexModel
 
 
 def now_utc() -> datetime:
@@ -16,7 +17,35 @@ class Diagnosis(Document):
     request: dict[str, Any]
     result: dict[str, Any] | None = None
     inference_ms: int | None = None
+    # trace запиту (W3C trace id) і його завершені span'и:
+    # [{"name", "start_ms", "duration_ms"}] — див. app.services.tracing
+    trace_id: str | None = None
+    spans: list[dict[str, Any]] | None = None
 
     class Settings:
         name = "diagnoses"
-        indexes = ["status", "-created_at"]
+        # історія (GET /diagnoses): keyset по (created_at, _id) від нових до
+        # старих, фільтри status / decidedDiseaseId — префіксом того ж ключа;
+        # заміняють колишні одиночні "status" і "-created_at"
+        indexes = [
+            IndexModel(
+                [("created_at", DESCENDING), ("_id", DESCENDING)],
+                name="created_at_id",
+            ),
+            IndexModel(
+                [
+                    ("status", ASCENDING),
+                    ("created_at", DESCENDING),
+                    ("_id", DESCENDING),
+                ],
+                name="status_created_at_id",
+            ),
+            IndexModel(
+                [
+                    ("result.decidedDiseaseId", ASCENDING),
+                    ("created_at", DESCENDING),
+                    ("_id", DESCENDING),
+                ],
+                name="decided_created_at_id",
+            ),
+        ]
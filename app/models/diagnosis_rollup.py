@@ -0,0 +1,41 @@
+from datetime import UTC, datetime
+
+from beanie import Document
+from pydantic import Field
+from pymongo import ASCENDING, IndexModel
+
+
+def now_utc() -> datetime:
+    return datetime.now(UTC)
+
+
+class DiagnosisRollup(Document):
+    """
+    Лічильник діагнозів за годину/добу: один документ на
+    (granularity, bucket, plantId, diseaseId, outcome). Оновлюється
+    $inc-upsert'ами, тож дашборди не сканують diagnoses.
+    """
+
+    granularity: str  # "hour" | "day"
+    bucket: datetime  # початок години/доби, UTC
+    plantId: str | None = None
+    diseaseId: str | None = None  # decidedDiseaseId; None для low_confidence
+    outcome: str  # "decided" | "low_confidence"
+    total: int = 0
+    updated_at: datetime = Field(default_factory=now_utc)
+
+    class Settings:
+        name = "diagnosis_rollups"
+        indexes = [
+            IndexModel(
+                [
+                    ("granularity", ASCENDING),
+                    ("bucket", ASCENDING),
+                    ("plantId", ASCENDING),
+                    ("diseaseId", ASCENDING),
+                    ("outcome", ASCENDING),
+                ],
+                name="rollup_key",
+                unique=True,
+            ),
+        ]
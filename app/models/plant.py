@@ -2,6 +2,11 @@ from __future__ import annotations
 
 from beanie import Document, PydanticObjectId
 from pydantic import BaseModel, ConfigDict, Field
+from pymongo import ASCENDING, TEXT, IndexModel
+
+# порівняння без урахування регістру: префіксний пошук і keyset-пагінація
+# /plants ідуть по індексах з тією ж collation
+PLANT_NAME_COLLATION = {"locale": "uk", "strength": 2}
 
 
 class DiseaseInPlant(BaseModel):
@@ -28,3 +33,29 @@ class Plant(Document):
 
     class Settings:
         name = "plants"
+        # індексів на diseases.* немає: /diseases шукає regex без якоря по
+        # кількох полях і сортує після $unwind — індекс цього не обслуговує
+        indexes = [
+            "plantName",
+            IndexModel(
+                [("plantName", ASCENDING), ("_id", ASCENDING)],
+                name="plantName_id_ci",
+                collation=PLANT_NAME_COLLATION,
+            ),
+            IndexModel(
+                [("scientificName", ASCENDING)],
+                name="scientificName_ci",
+                collation=PLANT_NAME_COLLATION,
+            ),
+            # Mongo не має стемера для української — лише токенізація
+            IndexModel(
+                [
+                    ("plantName", TEXT),
+                    ("scientificName", TEXT),
+                    ("description", TEXT),
+                ],
+                name="plants_text",
+                default_language="none",
+                weights={"plantName": 10, "scientificName": 5, "description": 1},
+            ),
+        ]
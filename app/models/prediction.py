@@ -0,0 +1,35 @@
+from datetime import UTC, datetime
+from typing import Any
+
+from beanie import Document
+from pydantic import Field
+from pymongo import ASCENDING, IndexModel
+
+
+def now_utc() -> datetime:
+    return datetime.now(UTC)
+
+
+class CachedPrediction(Document):
+    sha256: str
+    model_version: str
+    topk: int
+    candidates: list[dict[str, Any]]
+    created_at: datetime = Field(default_factory=now_utc)
+    # термін зберігання — у документі, а не в опціях індексу: зміна
+    # PLANTIO_PREDICTION_CACHE_PERSISTENT_TTL_S не конфліктує з наявним індексом
+    expires_at: datetime | None = None
+
+    class Settings:
+        name = "prediction_cache"
+        indexes = [
+            IndexModel(
+                [
+                    ("sha256", ASCENDING),
+                    ("model_version", ASCENDING),
+                    ("topk", ASCENDING),
+                ],
+                unique=True,
+            ),
+            IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+        ]
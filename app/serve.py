@@ -0,0 +1,212 @@
+"""
+Продакшн-запуск: N процесів uvicorn, які ділять одну копію ваг моделі.
+
+Батьківський процес імпортує torch і завантажує модель один раз, потім
+fork'ає воркерів: параметри моделі — read-only сторінки, спільні між
+усіма процесами (copy-on-write), а не N окремих копій, як з
+`uvicorn --workers N`. Кожен воркер слухає спільний сокет, сам
+прогріває модель (lifespan) і отримує cores // (N × inference_workers)
+потоків torch.
+
+    python -m app.serve --workers 4
+    PLANTIO_SERVE_WORKERS=4 python -m app.serve --port 8000
+
+Батько перезапускає воркерів, що впали, і періодично логує RSS/PSS
+кожного процесу (PSS ділить спільні сторінки — сума PSS і є реальним
+споживанням пам'яті).
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import signal
+import sys
+import time
+
+import uvicorn
+from loguru import logger
+
+from app.core.config import settings
+from app.utils.memory import process_memory
+
+GRACEFUL_TIMEOUT_S = 30.0
+
+
+def _preload_model() -> None:
+    """
+    Завантаження моделі в батьківському процесі. Forward pass тут не робимо:
+    пул потоків OpenMP, запущений до fork, у дочірніх процесах непридатний.
+    """
+    from app.services import executor, inference
+
+    executor._configure_torch_threads(1)
+    t0 = time.perf_counter()
+    inference._ensure_loaded()
+    logger.info(
+        "Model preloaded in parent in {:.2f}s (backend: {})",
+        time.perf_counter() - t0,
+        inference.model_backend(),
+    )
+
+
+def _run_worker(config: uvicorn.Config, sock, index: int) -> None:
+    from app.services import executor
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    threads = executor.torch_threads_per_worker()
+    executor._configure_torch_threads(threads)
+    logger.info("Worker {} started (pid {}, {} torch threads)", index, os.getpid(), threads)
+
+    try:
+        uvicorn.Server(config).run(sockets=[sock])
+    except BaseException:  # noqa: BLE001
+        logger.exception("Worker {} crashed", index)
+        os._exit(1)
+    os._exit(0)
+
+
+def _log_memory(children: dict[int, int]) -> None:
+    rows = [("parent", os.getpid())] + [
+        (f"worker {i}", pid) for pid, i in sorted(children.items(), key=lambda x: x[1])
+    ]
+    total_pss = 0.0
+    for name, pid in rows:
+        mem = process_memory(pid)
+        if mem is None:
+            continue
+        total_pss += mem["pss_mb"]
+        logger.info(
+            "memory {:<9} pid={:<7} rss={:>7.1f}MB pss={:>7.1f}MB "
+            "shared={:>7.1f}MB private={:>7.1f}MB",
+            name,
+            pid,
+            mem["rss_mb"],
+            mem["pss_mb"],
+            mem["shared_mb"],
+            mem["private_mb"],
+        )
+    if total_pss:
+        logger.info("memory total pss={:.1f}MB ({} workers)", total_pss, len(children))
+
+
+def _stop_children(children: dict[int, int]) -> None:
+    for pid in children:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    deadline = time.monotonic() + GRACEFUL_TIMEOUT_S
+    while children and time.monotonic() < deadline:
+        pid, _ = os.waitpid(-1, os.WNOHANG)
+        if pid:
+            children.pop(pid, None)
+        else:
+            time.sleep(0.1)
+
+    for pid in children:
+        logger.warning("Worker pid {} did not stop in time — killing", pid)
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+def serve(host: str, port: int, workers: int, memory_report_s: float) -> None:
+    if not hasattr(os, "fork"):
+        logger.warning("os.fork unavailable — falling back to uvicorn --workers")
+        uvicorn.run("app.main:app", host=host, port=port, workers=workers)
+        return
+
+    # воркери діляться ядрами: torch_threads_per_worker враховує serve_workers
+    settings.serve_workers = workers
+    if settings.inference_mode == "process":
+        # батько моделі не виконує — копія в ньому була б зайвою
+        logger.warning(
+            "PLANTIO_INFERENCE_MODE=process: spawned pool workers load their own "
+            "model copies; shared weights only work with thread mode"
+        )
+    else:
+        _preload_model()
+
+    from app.main import app
+
+    config = uvicorn.Config(app, host=host, port=port, log_config=None)
+    sock = config.bind_socket()
+
+    # об'єкти, що вже є, не потрапляють у збирач сміття воркерів —
+    # GC не торкається їхніх сторінок і не ламає copy-on-write
+    gc.collect()
+    gc.freeze()
+
+    stopping = False
+
+    def _on_signal(signum, _frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, _on_signal)
+    signal.signal(signal.SIGTERM, _on_signal)
+
+    children: dict[int, int] = {}
+
+    def _spawn(index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(config, sock, index)
+        children[pid] = index
+
+    for i in range(workers):
+        _spawn(i)
+    logger.info("Serving on http://{}:{} with {} workers", host, port, workers)
+
+    # перший звіт — після прогріву воркерів, далі раз на memory_report_s
+    next_report = time.monotonic() + 15.0
+    while not stopping:
+        pid, status = os.waitpid(-1, os.WNOHANG)
+        if pid and pid in children:
+            index = children.pop(pid)
+            logger.warning(
+                "Worker {} (pid {}) exited with status {} — restarting",
+                index,
+                pid,
+                os.waitstatus_to_exitcode(status),
+            )
+            time.sleep(1.0)
+            _spawn(index)
+            continue
+
+        if time.monotonic() >= next_report:
+            _log_memory(children)
+            next_report = (
+                time.monotonic() + memory_report_s if memory_report_s > 0 else float("inf")
+            )
+        time.sleep(0.2)
+
+    logger.info("Stopping {} workers…", len(children))
+    _stop_children(children)
+    sock.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Plantio multi-worker server")
+    parser.add_argument("--host", default=settings.host)
+    parser.add_argument("--port", type=int, default=settings.port)
+    parser.add_argument("--workers", type=int, default=settings.serve_workers)
+    parser.add_argument(
+        "--memory-report",
+        type=float,
+        default=settings.serve_memory_report_s,
+        help="інтервал звіту RSS/PSS, с (0 — один раз після старту)",
+    )
+    args = parser.parse_args(argv)
+
+    serve(args.host, args.port, max(1, args.workers), args.memory_report)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
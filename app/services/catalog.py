@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import inspect
+import json
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from loguru import logger
+
+from app.models.plant import Plant
+from app.utils.time import utcnow_tz
+
+WATCH_RETRY_S = 5.0
+
+
+def disease_entry(plant: dict[str, Any], disease: dict[str, Any]) -> dict[str, Any]:
+    """Хвороба з масиву plants.diseases у плаский формат відповіді /diseases."""
+    return {
+        "plantId": str(plant.get("_id")),
+        "plantName": plant.get("plantName"),
+        "diseaseName": disease.get("diseaseName"),
+        "description": disease.get("description"),
+        "symptoms": disease.get("symptoms", []),
+        "prevention": disease.get("prevention", []),
+        "treatment": disease.get("treatment", []),
+        "riskLevel": disease.get("riskLevel"),
+        "images": disease.get("images", []),
+    }
+
+
+def _catalog_version(plants: list[dict[str, Any]]) -> str:
+    """
+    Відбиток вмісту каталогу: однаковий у всіх воркерах і після рестарту,
+    незалежно від порядку, в якому Mongo віддала документи.
+    """
+    ordered = sorted(plants, key=lambda d: (d["plantName"], str(d.get("_id"))))
+    payload = json.dumps(ordered, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """
+    Незмінний знімок колекції plants з індексами для пошуку в пам'яті.
+    Оновлення каталогу — це заміна знімка цілком, тож запит, що вже
+    взяв знімок, бачить узгоджені дані до кінця.
+
+    Документи лишаються в порядку find({}) (природний порядок Mongo), тож
+    при однакових plantName обирається та сама рослина, що й у
+    Plant.find_one, а хвороби перебираються в порядку масиву diseases.
+    """
+
+    plants: tuple[dict[str, Any], ...] = ()
+    by_name: dict[str, dict[str, Any]] = field(default_factory=dict)
+    by_id: dict[str, dict[str, Any]] = field(default_factory=dict)
+    # diseaseName → записи у форматі disease_entry (назва може повторюватись)
+    diseases: dict[str, list[dict[str, Any]]] = field(default_factory=dict)
+    # plantName → {diseaseName: diseaseName} для точного збігу без перебору
+    _disease_names: dict[str, dict[str, str]] = field(default_factory=dict)
+    version: str | None = None
+    generation: int = 0
+    loaded_at: datetime | None = None
+
+    @classmethod
+    def build(cls, docs: list[dict[str, Any]], generation: int = 1) -> CatalogSnapshot:
+        plants = [d for d in docs if d.get("plantName")]
+        by_name: dict[str, dict[str, Any]] = {}
+        by_id: dict[str, dict[str, Any]] = {}
+        diseases: dict[str, list[dict[str, Any]]] = {}
+        disease_names: dict[str, dict[str, str]] = {}
+
+        for plant in plants:
+            # як find_one: з кількох рослин з однією назвою — перша
+            first = by_name.setdefault(plant["plantName"], plant) is plant
+            by_id[str(plant.get("_id"))] = plant
+            names = disease_names.setdefault(plant["plantName"], {})
+            for d in plant.get("diseases") or []:
+                name = d.get("diseaseName") if isinstance(d, dict) else None
+                if not name:
+                    continue
+                if first:
+                    names.setdefault(name, name)
+                diseases.setdefault(name, []).append(disease_entry(plant, d))
+
+        return cls(
+            plants=tuple(plants),
+            by_name=by_name,
+            by_id=by_id,
+            diseases=diseases,
+            _disease_names=disease_names,
+            version=_catalog_version(plants),
+            generation=generation,
+            loaded_at=utcnow_tz(),
+        )
+
+    def plant_by_name(self, name: str | None) -> dict[str, Any] | None:
+        return self.by_name.get(name) if name else None
+
+    def plant_by_id(self, plant_id: str) -> dict[str, Any] | None:
+        return self.by_id.get(plant_id)
+
+    def match_disease(self, plant_name: str | None, needle: str) -> str | None:
+        """
+        Назва хвороби рослини з каталогу для мітки моделі: точний збіг
+        за словником, інакше перша назва, що містить needle як підрядок.
+        """
+        if not plant_name or not needle:
+            return None
+        names = self._disease_names.get(plant_name)
+        if not names:
+            return None
+        exact = names.get(needle)
+        if exact is not None:
+            return exact
+        for name in names:
+            if needle in name:
+                return name
+        return None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "version": self.version,
+            "generation": self.generation,
+            "plants": len(self.plants),
+            "diseases": sum(len(v) for v in self.diseases.values()),
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+        }
+
+
+class CatalogService:
+    """
+    Тримає актуальний CatalogSnapshot. Після початкового завантаження
+    слухає change stream колекції plants; якщо Mongo їх не підтримує
+    (standalone-сервер, mongomock) — опитує колекцію раз на refresh_s.
+    Помилка оновлення лишає попередній знімок.
+    """
+
+    def __init__(self, refresh_s: float, watch: bool = True):
+        self.refresh_s = float(refresh_s)
+        self.watch = watch
+        self.mode = "idle"  # idle | change_stream | polling | static
+        self.refreshes = 0
+        self.last_error: str | None = None
+        self._snapshot = CatalogSnapshot()
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._listeners: list[Callable[[CatalogSnapshot], Any]] = []
+
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        return self._snapshot
+
+    def on_change(self, callback: Callable[[CatalogSnapshot], Any]) -> None:
+        """
+        callback(snapshot) викликається після кожної заміни знімка —
+        похідні індекси (пошук, lookup) оновлюються разом із каталогом.
+        """
+        self._listeners.append(callback)
+
+    async def refresh(self) -> bool:
+        """Перечитує каталог; True, якщо вміст змінився."""
+        async with self._lock:
+            cursor = Plant.get_pymongo_collection().find({})
+            docs = await cursor.to_list(length=None)
+            current = self._snapshot
+            snapshot = CatalogSnapshot.build(docs, generation=current.generation + 1)
+            self.refreshes += 1
+            self.last_error = None
+            if snapshot.version == current.version:
+                return False
+            self._snapshot = snapshot
+            for callback in self._listeners:
+                try:
+                    callback(snapshot)
+                except Exception:
+                    logger.exception("Catalog change listener {} failed", callback)
+        logger.info(
+            "Catalog snapshot {} (gen {}): {} plants, {} diseases",
+            snapshot.version,
+            snapshot.generation,
+            len(snapshot.plants),
+            sum(len(v) for v in snapshot.diseases.values()),
+        )
+        return True
+
+    async def _safe_refresh(self) -> None:
+        try:
+            await self.refresh()
+        except Exception as e:  # noqa: BLE001
+            self.last_error = repr(e)
+            logger.warning("Catalog refresh failed, keeping previous snapshot: {}", e)
+
+    async def start(self) -> None:
+        await self._safe_refresh()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="catalog-refresh")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.mode = "idle"
+
+    async def _run(self) -> None:
+        while self.watch:
+            try:
+                await self._watch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:  # noqa: BLE001
+                if self.mode != "change_stream":
+                    logger.info("Catalog change streams unavailable ({}) — polling", e)
+                    break
+                self.last_error = repr(e)
+                logger.warning("Catalog change stream failed: {}", e)
+            # обрив уже відкритого stream: перечитуємо і підписуємось знову
+            self.mode = "idle"
+            await asyncio.sleep(WATCH_RETRY_S)
+            await self._safe_refresh()
+
+        if self.refresh_s <= 0:
+            self.mode = "static"
+            return
+        self.mode = "polling"
+        while True:
+            await asyncio.sleep(self.refresh_s)
+            await self._safe_refresh()
+
+    async def _watch(self) -> None:
+        stream = Plant.get_pymongo_collection().watch(max_await_time_ms=1000)
+        if inspect.isawaitable(stream):
+            stream = await stream
+        async with stream:
+            self.mode = "change_stream"
+            # зміни між початковим завантаженням і підпискою
+            await self._safe_refresh()
+            async for _change in stream:
+                # пачка змін (імпорт каталогу) — одне перечитування
+                while await stream.try_next() is not None:
+                    pass
+                await self._safe_refresh()
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "refreshes": self.refreshes,
+            "last_error": self.last_error,
+            **self._snapshot.as_dict(),
+        }
+
+
+_CATALOG: CatalogService | None = None
+
+
+def get_catalog() -> CatalogService:
+    global _CATALOG
+    if _CATALOG is None:
+        from app.core.config import settings
+
+        _CATALOG = CatalogService(settings.catalog_refresh_s, watch=settings.catalog_watch)
+    return _CATALOG
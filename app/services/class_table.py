@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+from loguru import logger
+
+from app.core.label_mapping import DISEASE_NAME_MAP, PLANT_NAME_MAP
+
+HEALTHY_NAME = "Здорова рослина"
+
+
+def _compile_row(idx: int, meta: dict[str, Any]) -> dict[str, Any]:
+    """Усе, що відповідь знає про клас, крім впевненості — рахується один раз."""
+    plant_label = meta.get("plant_label")
+    disease_label = meta.get("disease_label")
+
+    plant_name = meta.get("plant_name") or PLANT_NAME_MAP.get(plant_label)
+    disease_name = meta.get("disease_name")
+    if not disease_name and disease_label == "healthy":
+        disease_name = HEALTHY_NAME
+    if not disease_name:
+        disease_name = DISEASE_NAME_MAP.get(disease_label)
+
+    return {
+        "class_index": idx,
+        "confidence": 0.0,
+        "plant_name": plant_name,
+        "plant_label": plant_label,
+        "disease_name": disease_name,
+        "disease_label": disease_label,
+        "plant_id": meta.get("plant_id"),
+        "disease_id": meta.get("disease_id"),
+    }
+
+
+class ClassTable:
+    """
+    class_map.json, скомпільований у масив: індекс класу → готовий рядок
+    кандидата. Перетворення top-k індексів моделі на кандидатів — один
+    gather по numpy-масиву замість збирання словників на кожен клас.
+    """
+
+    def __init__(self, rows: list[dict[str, Any]]):
+        self._rows = np.empty(len(rows), dtype=object)
+        self._rows[:] = rows
+
+    @classmethod
+    def compile(cls, class_map: dict[int, dict[str, Any]]) -> ClassTable:
+        size = max(class_map) + 1 if class_map else 0
+        missing = [i for i in range(size) if i not in class_map]
+        if missing:
+            logger.warning("class_map has no entries for classes {}", missing)
+        return cls([_compile_row(i, class_map.get(i, {})) for i in range(size)])
+
+    @classmethod
+    def coerce(cls, classes: ClassTable | dict[int, dict[str, Any]]) -> ClassTable:
+        return classes if isinstance(classes, ClassTable) else cls.compile(classes)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def validate(self, num_outputs: int) -> None:
+        """Розмір class_map має збігатися з кількістю виходів моделі."""
+        if num_outputs != len(self):
+            raise ValueError(
+                f"class_map describes {len(self)} classes, model outputs {num_outputs} logits"
+            )
+
+    def first(self, n: int) -> list[dict[str, Any]]:
+        return list(self._rows[:n])
+
+    def candidates(self, vals: np.ndarray, idxs: np.ndarray) -> list[list[dict[str, Any]]]:
+        """(B, k) впевненостей та індексів → B списків кандидатів."""
+        picked = self._rows[idxs]
+        confs = np.asarray(vals, dtype=np.float64).tolist()
+        return [
+            [{**row, "confidence": conf} for row, conf in zip(rows, row_confs, strict=True)]
+            for rows, row_confs in zip(picked.tolist(), confs, strict=True)
+        ]
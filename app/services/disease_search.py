@@ -0,0 +1,362 @@
+from __future__ import annotations
+
+import bisect
+import hashlib
+import json
+import math
+import re
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from app.services.catalog import CatalogSnapshot, disease_entry
+
+# вага поля в tf: збіг у назві важить більше, ніж у тексті лікування
+FIELD_WEIGHTS = {
+    "diseaseName": 3.0,
+    "symptoms": 1.5,
+    "description": 1.0,
+    "prevention": 1.0,
+    "treatment": 1.0,
+}
+BM25_K1 = 1.2
+BM25_B = 0.75
+PREFIX_PENALTY = 0.7  # збіг за префіксом (ще не дописане слово) трохи слабший
+MIN_PREFIX_LEN = 2
+
+_APOSTROPHES = re.compile(r"[’'ʼ`]")
+_TOKEN = re.compile(r"\w+")
+
+# найчастіші закінчення іменників і прикметників; найдовші перевіряються першими
+_SUFFIXES = tuple(
+    sorted(
+        set(
+            "ами ями ого ому ими іми ових ний ною ної ним них ах ях ів їв ою ею єю "
+            "ом ем ій ий их ої ам ям ей а я і ї и у ю е є о ь й".split()
+        ),
+        key=lambda x: (-len(x), x),
+    )
+)
+_MIN_STEM = 3
+
+
+def normalize(text: str) -> list[str]:
+    """Нижній регістр, без апострофів (в’янення → вянення), слова з \\w."""
+    return _TOKEN.findall(_APOSTROPHES.sub("", text.lower()))
+
+
+def stem(token: str) -> str:
+    """
+    Легкий стемер для української: відкидає одне найдовше типове
+    закінчення, якщо лишається хоча б 3 літери (плями → плям,
+    гнилі → гнил, листя → лист). Латиниця й цифри не змінюються.
+    """
+    if not ("а" <= token[-1] <= "я" or token[-1] in "іїєґ"):
+        return token
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= _MIN_STEM:
+            return token[: -len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    return [stem(t) for t in normalize(text)]
+
+
+def _field_texts(entry: dict[str, Any]) -> dict[str, str]:
+    out: dict[str, str] = {}
+    for field in FIELD_WEIGHTS:
+        value = entry.get(field)
+        if isinstance(value, str):
+            out[field] = value
+        elif isinstance(value, list):
+            out[field] = " ".join(str(x) for x in value)
+    return out
+
+
+def _plant_fingerprint(plant: dict[str, Any]) -> str:
+    payload = json.dumps(plant, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _Doc:
+    entry: dict[str, Any]
+    length: float
+    position: int
+
+    @property
+    def order(self) -> tuple[str, int]:
+        """Порядок каталогу: id рослини, далі позиція в її масиві diseases."""
+        return self.entry["plantId"], self.position
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    entry: dict[str, Any]
+    score: float
+    order: tuple[str, int]
+
+
+class DiseaseSearchIndex:
+    """
+    Інвертований індекс пласких записів хвороб з BM25-ранжуванням.
+
+    Терміни — стеми слів з усіх текстових полів (з вагами полів); останнє
+    слово запиту шукається ще й за префіксом (пошук під час набору). Час
+    запиту залежить від кількості документів зі збігами, а не від обсягу
+    тексту каталогу. Оновлюється інкрементно: при зміні каталогу
+    переіндексуються лише рослини, чий вміст змінився.
+    """
+
+    def __init__(self) -> None:
+        self.version: str | None = None
+        self._docs: dict[int, _Doc] = {}
+        self._postings: dict[str, dict[int, float]] = defaultdict(dict)
+        self._terms: list[str] = []  # відсортований словник для префіксів
+        self._plants: dict[str, tuple[str, list[int]]] = {}
+        self._next_id = 0
+        self._total_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    # ---------- побудова ----------
+
+    def _add(self, entry: dict[str, Any], position: int) -> int:
+        doc_id = self._next_id
+        self._next_id += 1
+
+        tf: dict[str, float] = defaultdict(float)
+        for field, text in _field_texts(entry).items():
+            weight = FIELD_WEIGHTS[field]
+            for term in tokenize(text):
+                tf[term] += weight
+
+        for term, freq in tf.items():
+            postings = self._postings[term]
+            if not postings:
+                bisect.insort(self._terms, term)
+            postings[doc_id] = freq
+
+        length = sum(tf.values())
+        self._docs[doc_id] = _Doc(entry, length, position)
+        self._total_length += length
+        return doc_id
+
+    def _remove(self, doc_id: int) -> None:
+        doc = self._docs.pop(doc_id)
+        self._total_length -= doc.length
+        for text in _field_texts(doc.entry).values():
+            for term in set(tokenize(text)):
+                postings = self._postings.get(term)
+                if postings is None or postings.pop(doc_id, None) is None:
+                    continue
+                if not postings:
+                    del self._postings[term]
+                    i = bisect.bisect_left(self._terms, term)
+                    if i < len(self._terms) and self._terms[i] == term:
+                        del self._terms[i]
+
+    def sync(self, snapshot: CatalogSnapshot) -> dict[str, int]:
+        """Приводить індекс до знімка каталогу; повертає лічильники змін."""
+        seen: set[str] = set()
+        added = removed = 0
+
+        for plant in snapshot.plants:
+            plant_id = str(plant.get("_id"))
+            seen.add(plant_id)
+            fingerprint = _plant_fingerprint(plant)
+            indexed = self._plants.get(plant_id)
+            if indexed is not None and indexed[0] == fingerprint:
+                continue
+            if indexed is not None:
+                for doc_id in indexed[1]:
+                    self._remove(doc_id)
+                removed += len(indexed[1])
+
+            doc_ids = []
+            for pos, d in enumerate(plant.get("diseases") or []):
+                if isinstance(d, dict) and d.get("diseaseName"):
+                    doc_ids.append(self._add(disease_entry(plant, d), pos))
+            self._plants[plant_id] = (fingerprint, doc_ids)
+            added += len(doc_ids)
+
+        for plant_id in set(self._plants) - seen:
+            _, doc_ids = self._plants.pop(plant_id)
+            for doc_id in doc_ids:
+                self._remove(doc_id)
+            removed += len(doc_ids)
+
+        self.version = snapshot.version
+        return {"added": added, "removed": removed, "docs": len(self._docs)}
+
+    # ---------- пошук ----------
+
+    def _expand(self, raw: str, is_last: bool) -> list[tuple[str, float]]:
+        """Терміни словника для слова запиту: точний стем (+ префікси)."""
+        term = stem(raw)
+        out: list[tuple[str, float]] = []
+        if term in self._postings:
+            out.append((term, 1.0))
+        if is_last and len(raw) >= MIN_PREFIX_LEN:
+            prefix = term if len(term) < len(raw) else raw
+            i = bisect.bisect_left(self._terms, prefix)
+            while i < len(self._terms) and self._terms[i].startswith(prefix):
+                if self._terms[i] != term:
+                    out.append((self._terms[i], PREFIX_PENALTY))
+                i += 1
+        return out
+
+    def search(self, query: str) -> list[SearchHit]:
+        """
+        Записи, що містять усі слова запиту (останнє — можливо недописане),
+        з BM25-скором, від найрелевантніших. Рівні скори — у порядку каталогу.
+        """
+        words = normalize(query)
+        if not words or not self._docs:
+            return []
+
+        n_docs = len(self._docs)
+        avg_len = self._total_length / n_docs or 1.0
+        scores: dict[int, float] | None = None
+
+        for i, word in enumerate(words):
+            word_scores: dict[int, float] = defaultdict(float)
+            for term, boost in self._expand(word, is_last=i == len(words) - 1):
+                postings = self._postings[term]
+                df = len(postings)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                for doc_id, tf in postings.items():
+                    dl = self._docs[doc_id].length
+                    norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * dl / avg_len)
+                    score = boost * idf * tf * (BM25_K1 + 1) / norm
+                    # префікси одного слова не сумуються — беремо найкращий
+                    if score > word_scores[doc_id]:
+                        word_scores[doc_id] = score
+            if scores is None:
+                scores = dict(word_scores)
+            else:
+                scores = {d: s + word_scores[d] for d, s in scores.items() if d in word_scores}
+            if not scores:
+                return []
+
+        hits = [
+            SearchHit(self._docs[d].entry, score, self._docs[d].order)
+            for d, score in scores.items()
+        ]
+        hits.sort(key=lambda h: (-h.score, h.order))
+        return hits
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "version": self.version,
+            "docs": len(self._docs),
+            "terms": len(self._terms),
+        }
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class DiseaseLookup:
+    """
+    Пошук деталей хвороби за disease_id (= diseaseName): точний збіг —
+    словник, підрядок без урахування регістру — триграмний індекс.
+    Кандидати з перетину триграм перевіряються `needle in name`, тож
+    результат той самий, що й у лінійного перебору: перший запис у
+    порядку каталогу.
+    """
+
+    def __init__(self) -> None:
+        self.version: str | None = None
+        self._entries: list[dict[str, Any]] = []
+        self._lowered: list[str] = []
+        self._exact: dict[str, dict[str, Any]] = {}
+        self._grams: dict[str, list[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def sync(self, snapshot: CatalogSnapshot) -> None:
+        """Перебудовує структури і підміняє їх разом (без часткового стану)."""
+        entries: list[dict[str, Any]] = []
+        for plant in snapshot.plants:
+            for d in plant.get("diseases") or []:
+                if isinstance(d, dict) and d.get("diseaseName"):
+                    entries.append(disease_entry(plant, d))
+
+        lowered = [str(e["diseaseName"]).lower() for e in entries]
+        exact: dict[str, dict[str, Any]] = {}
+        grams: dict[str, list[int]] = defaultdict(list)
+        for i, entry in enumerate(entries):
+            exact.setdefault(entry["diseaseName"], entry)
+            for gram in _trigrams(lowered[i]):
+                grams[gram].append(i)  # i зростає — списки відсортовані
+
+        self._entries, self._lowered = entries, lowered
+        self._exact, self._grams = exact, dict(grams)
+        self.version = snapshot.version
+
+    def get(self, disease_id: str) -> dict[str, Any] | None:
+        entry = self._exact.get(disease_id)
+        if entry is not None:
+            return entry
+
+        needle = disease_id.lower()
+        if len(needle) < 3:
+            candidates: Iterable[int] = range(len(self._entries))
+        else:
+            postings = []
+            for gram in _trigrams(needle):
+                ids = self._grams.get(gram)
+                if ids is None:
+                    return None
+                postings.append(ids)
+            postings.sort(key=len)
+            common = set(postings[0]).intersection(*postings[1:])
+            candidates = sorted(common)
+
+        for i in candidates:
+            if needle in self._lowered[i]:
+                return self._entries[i]
+        return None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "version": self.version,
+            "entries": len(self._entries),
+            "trigrams": len(self._grams),
+        }
+
+
+_INDEX: DiseaseSearchIndex | None = None
+_LOOKUP: DiseaseLookup | None = None
+
+
+def get_search_index() -> DiseaseSearchIndex:
+    """Індекс, підписаний на оновлення знімка каталогу."""
+    global _INDEX
+    if _INDEX is None:
+        from app.services.catalog import get_catalog
+
+        catalog = get_catalog()
+        _INDEX = DiseaseSearchIndex()
+        _INDEX.sync(catalog.snapshot)
+        catalog.on_change(_INDEX.sync)
+    return _INDEX
+
+
+def get_disease_lookup() -> DiseaseLookup:
+    """Lookup для /diseases/{id}, підписаний на оновлення знімка каталогу."""
+    global _LOOKUP
+    if _LOOKUP is None:
+        from app.services.catalog import get_catalog
+
+        catalog = get_catalog()
+        _LOOKUP = DiseaseLookup()
+        _LOOKUP.sync(catalog.snapshot)
+        catalog.on_change(_LOOKUP.sync)
+    return _LOOKUP
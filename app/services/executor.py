@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any
+
+from loguru import logger
+
+from app.services.metrics import drain_forwarded, forward_to_parent, replay_forwarded
+
+_EXECUTOR: Executor | None = None
+
+
+def _cpu_count() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def worker_count() -> int:
+    from app.core.config import settings
+
+    return max(1, int(settings.inference_workers))
+
+
+def torch_threads_per_worker() -> int:
+    """
+    Скільки intra-op потоків torch дати кожному воркеру, щоб
+    серверні процеси × workers × threads не перевищувало кількість ядер.
+    """
+    from app.core.config import settings
+
+    if settings.inference_torch_threads > 0:
+        return int(settings.inference_torch_threads)
+    processes = max(1, int(settings.serve_workers))
+    return max(1, _cpu_count() // (processes * worker_count()))
+
+
+def _configure_torch_threads(threads: int) -> None:
+    try:
+        import torch
+    except Exception:  # noqa: BLE001
+        return
+
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # interop-пул уже стартував у цьому процесі — лишаємо як є
+        pass
+
+
+def _init_process_worker(threads: int) -> None:
+    """Ініціалізатор дочірнього процесу: потоки torch + завантаження моделі."""
+    # до завантаження: фолбек на DummyClassifier теж має дійти до батька
+    forward_to_parent()
+    _configure_torch_threads(threads)
+
+    from app.services import inference
+
+    inference._ensure_loaded()
+    logger.info("Inference worker {} ready ({} torch threads)", os.getpid(), threads)
+
+
+def get_executor() -> Executor:
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        from app.core.config import settings
+
+        workers = worker_count()
+        threads = torch_threads_per_worker()
+
+        if settings.inference_mode == "process":
+            _EXECUTOR = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_process_worker,
+                initargs=(threads,),
+            )
+        else:
+            # кожен потік-воркер отримує власну intra-op команду torch,
+            # тож ядра ділимо між воркерами
+            _configure_torch_threads(threads)
+            _EXECUTOR = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inference")
+
+        logger.info(
+            "Inference executor: mode={} workers={} torch_threads={}",
+            settings.inference_mode,
+            workers,
+            threads,
+        )
+    return _EXECUTOR
+
+
+def _pool_call(fn: Callable[..., Any], *args: Any) -> tuple[Any, Any, list]:
+    """Задача в дочірньому процесі: (результат, виняток, його метрики)."""
+    try:
+        return fn(*args), None, drain_forwarded()
+    except Exception as e:  # noqa: BLE001
+        return None, e, drain_forwarded()
+
+
+async def run_in_pool(fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    fn(*args) у пулі інференсу. У режимі process разом з результатом
+    приходять метрики дочірнього процесу (стадії decode/preprocess/forward,
+    фолбеки моделі) — вони записуються тут, у процесі, що віддає /metrics.
+    """
+    from app.core.config import settings
+
+    loop = asyncio.get_running_loop()
+    executor = get_executor()
+    if settings.inference_mode != "process":
+        return await loop.run_in_executor(executor, fn, *args)
+    result, error, records = await loop.run_in_executor(executor, _pool_call, fn, *args)
+    replay_forwarded(records)
+    if error is not None:
+        raise error
+    return result
+
+
+def shutdown_executor() -> None:
+    global _EXECUTOR
+    if _EXECUTOR is not None:
+        _EXECUTOR.shutdown(wait=True, cancel_futures=True)
+        _EXECUTOR = None
@@ -1,26 +1,61 @@
 from __future__ import annotations
 
-import io
+import asyncio
+import contextvars
+import hashlib
 import json
+import threading
 import time
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
-import torchvision.transforms as transforms
+import numpy as np
 from loguru import logger
-from PIL import Image
 
-try:
-    import torch
-    import torch.nn as nn
+from app.services.class_table import ClassTable
+from app.services.executor import (
+    run_in_pool,
+    shutdown_executor,
+    torch_threads_per_worker,
+    worker_count,
+)
+from app.services.metrics import MODEL_FALLBACKS, STAGE_SECONDS
+from app.services.preprocess import ImageInput, ImagePreprocessor
+from app.services.tracing import current_trace_id
+
+# torch / onnxruntime імпортуються ліниво — під час завантаження моделі
+# (у фоні з lifespan), а не при імпорті застосунку
+torch: Any = None
+nn: Any = None
+ort: Any = None
+TORCH_AVAILABLE = False
+ORT_AVAILABLE = False
+_BACKENDS_IMPORTED = False
+
+
+def _import_backends() -> None:
+    global torch, nn, ort, TORCH_AVAILABLE, ORT_AVAILABLE, _BACKENDS_IMPORTED
+    if _BACKENDS_IMPORTED:
+        return
+    try:
+        import torch as _torch
+        import torch.nn as _nn
+
+        torch, nn, TORCH_AVAILABLE = _torch, _nn, True
+    except Exception as e:  # noqa: BLE001
+        logger.warning("Torch is not available: {}", e)
 
-    TORCH_AVAILABLE = True
-except Exception as e:  # noqa: BLE001
-    logger.warning("Torch is not available: {}", e)
-    TORCH_AVAILABLE = False
+    try:
+        import onnxruntime as _ort
 
+        ort, ORT_AVAILABLE = _ort, True
+    except Exception:  # noqa: BLE001
+        pass
+    _BACKENDS_IMPORTED = True
 
-def _load_class_map(path: Path) -> dict[int, dict[str, Any]]:
+
+def _load_class_map(path: Path) -> ClassTable:
     """
     Завантажує class_map.json у новому форматі:
     {
@@ -31,16 +66,17 @@ def _load_class_map(path: Path) -> dict[int, dict[str, Any]]:
             "disease_name": "Чорна гниль"
         }
     }
+    і компілює його в ClassTable (індекс класу → готовий рядок кандидата).
     """
     if not path.exists():
         logger.warning("class_map.json not found at {}", path)
-        return {}
+        return ClassTable.compile({})
 
     try:
         data = json.loads(path.read_text(encoding="utf-8"))
     except Exception as e:
         logger.error("Failed to parse class_map.json: {}", e)
-        return {}
+        return ClassTable.compile({})
 
     out = {}
     for key, v in data.items():
@@ -55,107 +91,259 @@ def _load_class_map(path: Path) -> dict[int, dict[str, Any]]:
         except Exception:
             logger.error("Invalid class_map entry for key {}: {}", key, v)
 
-    return out
+    return ClassTable.compile(out)
 
 
 class _BaseClassifier:
-    def predict_topk(self, image_bytes: bytes, topk: int = 3) -> list[dict[str, Any]]:
+    def predict_topk(self, image_bytes: ImageInput, topk: int = 3) -> list[dict[str, Any]]:
         raise NotImplementedError
 
+    def predict_batch(
+        self, images: list[ImageInput], topk: int = 3
+    ) -> list[list[dict[str, Any]] | Exception]:
+        """
+        Передбачення для кількох зображень. Помилка одного зображення
+        не валить увесь батч — на її місці повертається виняток.
+        """
+        out: list[list[dict[str, Any]] | Exception] = []
+        for image_bytes in images:
+            try:
+                out.append(self.predict_topk(image_bytes, topk=topk))
+            except Exception as e:  # noqa: BLE001
+                out.append(e)
+        return out
+
 
 class _DummyClassifier(_BaseClassifier):
     """Fallback, коли Torch/модель недоступні."""
 
-    def __init__(self, class_map: dict[int, dict[str, str]]):
-        self.class_map = class_map
+    def __init__(self, classes: ClassTable | dict[int, dict[str, Any]]):
+        self.classes = ClassTable.coerce(classes)
         self.backend = "dummy"
 
-    def predict_topk(self, image_bytes: bytes, topk: int = 3) -> list[dict[str, Any]]:
+    def predict_topk(self, image_bytes: ImageInput, topk: int = 3) -> list[dict[str, Any]]:
         confidences = [0.94, 0.88, 0.69, 0.55, 0.42]
         out: list[dict[str, Any]] = []
-        for i, (_cls_idx, meta) in enumerate(list(self.class_map.items())[:topk]):
+        for i, row in enumerate(self.classes.first(topk)):
             out.append(
                 {
-                    "plant_id": meta.get("plant_id"),
-                    "disease_id": meta.get("disease_id"),
-                    "confidence": float(
-                        confidences[i] if i < len(confidences) else 0.4
-                    ),
+                    "plant_id": row["plant_id"],
+                    "disease_id": row["disease_id"],
+                    "confidence": float(confidences[i] if i < len(confidences) else 0.4),
                 }
             )
         return out
 
 
-class _TorchClassifier(_BaseClassifier):
+class _ArrayClassifier(_BaseClassifier):
+    """
+    Спільна частина для класифікаторів, що працюють з батчем float32
+    NCHW: препроцесинг у буфер, top-k по рядках і форматування кандидатів.
+    Нащадки реалізують лише `_forward_topk`.
+    """
+
+    classes: ClassTable
+    preprocessor: ImagePreprocessor
+    _outputs_checked: bool = False
+
+    def _forward_topk(self, x: np.ndarray, topk: int) -> tuple[np.ndarray, np.ndarray]:
+        raise NotImplementedError
+
+    def _check_outputs(self, num_outputs: int) -> None:
+        """
+        Перевірка class_map проти виходу моделі на першому forward pass
+        (для моделей, де кількість виходів не видно статично, напр. frozen
+        TorchScript). Зазвичай спрацьовує ще на прогріві.
+        """
+        if not self._outputs_checked:
+            self.classes.validate(num_outputs)
+            self._outputs_checked = True
+
+    def _fill(self, image_bytes: ImageInput, out: np.ndarray) -> None:
+        """to_array з окремим часом декодування і нормалізації в метриках."""
+        t0 = time.perf_counter()
+        img = self.preprocessor.decode(image_bytes)
+        t1 = time.perf_counter()
+        self.preprocessor.from_image(img, out=out)
+        STAGE_SECONDS.observe(t1 - t0, "decode")
+        STAGE_SECONDS.observe(time.perf_counter() - t1, "preprocess")
+
+    def _timed_forward(self, x: np.ndarray, topk: int) -> tuple[np.ndarray, np.ndarray]:
+        t0 = time.perf_counter()
+        res = self._forward_topk(x, topk)
+        STAGE_SECONDS.observe(time.perf_counter() - t0, "forward")
+        return res
+
+    def _preprocess(self, image_bytes: ImageInput) -> np.ndarray:
+        buf = self.preprocessor.batch_buffer(1)
+        self._fill(image_bytes, buf[0])
+        return buf
+
+    def predict_topk(self, image_bytes: ImageInput, topk: int = 3) -> list[dict[str, Any]]:
+        vals, idxs = self._timed_forward(self._preprocess(image_bytes), topk)
+        return self.classes.candidates(vals, idxs)[0]
+
+    def predict_batch(
+        self, images: list[ImageInput], topk: int = 3
+    ) -> list[list[dict[str, Any]] | Exception]:
+        """
+        Один forward pass на весь батч. Зображення декодуються одразу
+        в попередньо виділений буфер; ті, що не вдалося декодувати,
+        отримують свій виняток і не потрапляють у батч.
+        """
+        out: list[list[dict[str, Any]] | Exception] = []
+        buf = self.preprocessor.batch_buffer(len(images))
+        positions: list[int] = []
+        for image_bytes in images:
+            try:
+                self._fill(image_bytes, buf[len(positions)])
+                positions.append(len(out))
+                out.append([])
+            except Exception as e:  # noqa: BLE001
+                out.append(e)
+
+        if positions:
+            vals, idxs = self._timed_forward(buf[: len(positions)], topk)
+            rows = self.classes.candidates(vals, idxs)
+            for pos, row in zip(positions, rows, strict=True):
+                out[pos] = row
+        return out
+
+
+class _TorchClassifier(_ArrayClassifier):
     """
     Приймає вже завантажений nn.Module (TorchScript або pickled-модель)
     і class_map.
     """
 
     def __init__(
-        self, model: nn.Module, class_map: dict[int, dict[str, str]], backend: str
+        self,
+        model: nn.Module,
+        classes: ClassTable | dict[int, dict[str, Any]],
+        backend: str,
+        jpeg_draft: bool = True,
     ):
         if not TORCH_AVAILABLE:
             raise RuntimeError("Torch not installed")
         self.model: nn.Module = model
         self.model.eval()
-        self.class_map = class_map
+        self.classes = ClassTable.coerce(classes)
         self.backend = backend
+        self.preprocessor = ImagePreprocessor(jpeg_draft=jpeg_draft)
         logger.info("Torch model ready (backend: {})", backend)
 
-    @staticmethod
-    def _preprocess(image_bytes: bytes) -> torch.Tensor:
-        img = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+    def _forward_topk(self, x: np.ndarray, topk: int) -> tuple[np.ndarray, np.ndarray]:
+        with torch.inference_mode():
+            logits = self.model(torch.from_numpy(x))  # type: ignore[operator]
+            if isinstance(logits, tuple | list) and logits:
+                logits = logits[0]
+            self._check_outputs(logits.shape[1])
+            probs = torch.softmax(logits, dim=1)
+            vals, idxs = torch.topk(probs, k=min(topk, probs.shape[1]), dim=1)
+        return vals.float().numpy(), idxs.numpy()
 
-        transform = transforms.Compose(
-            [
-                transforms.Resize((224, 224)),
-                transforms.ToTensor(),  # автоматично /255
-            ]
-        )
 
-        return transform(img).unsqueeze(0)
+class _OnnxClassifier(_ArrayClassifier):
+    """
+    ONNX Runtime сесія (CPU, повні графові оптимізації). Torch не потрібен:
+    препроцесинг і top-k — на numpy.
+    """
+
+    def __init__(
+        self,
+        session: ort.InferenceSession,
+        classes: ClassTable | dict[int, dict[str, Any]],
+        jpeg_draft: bool = True,
+    ):
+        self.session = session
+        self.input_name = session.get_inputs()[0].name
+        self.classes = ClassTable.coerce(classes)
+        self.backend = "onnxruntime"
+        self.preprocessor = ImagePreprocessor(jpeg_draft=jpeg_draft)
+        logger.info("ONNX Runtime model ready (providers: {})", session.get_providers())
+
+    def _forward_topk(self, x: np.ndarray, topk: int) -> tuple[np.ndarray, np.ndarray]:
+        logits = self.session.run(None, {self.input_name: x})[0]
+        self._check_outputs(logits.shape[1])
+        logits = logits - logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+
+        k = min(topk, probs.shape[1])
+        idxs = np.argpartition(-probs, k - 1, axis=1)[:, :k]
+        vals = np.take_along_axis(probs, idxs, axis=1)
+        order = np.argsort(-vals, axis=1, kind="stable")
+        idxs = np.take_along_axis(idxs, order, axis=1)
+        vals = np.take_along_axis(vals, order, axis=1)
+        return vals, idxs
+
+
+def _resolve_backend(model_path: Path) -> str:
+    """'onnx' або 'torch': явне налаштування або розширення файлу моделі."""
+    from app.core.config import settings
 
-    @torch.inference_mode()  # type: ignore[misc]
-    def predict_topk(self, image_bytes: bytes, topk: int = 3) -> list[dict[str, Any]]:
-        x = self._preprocess(image_bytes)
-        logits = self.model(x)  # type: ignore[operator]
-        if isinstance(logits, tuple | list) and logits:
-            logits = logits[0]
-        probs = torch.softmax(logits, dim=1)
-        vals, idxs = torch.topk(probs, k=topk, dim=1)
+    if settings.inference_backend != "auto":
+        return settings.inference_backend
+    return "onnx" if model_path.suffix.lower() == ".onnx" else "torch"
 
-        out: list[dict[str, Any]] = []
-        for conf, cls_idx in zip(vals[0].tolist(), idxs[0].tolist(), strict=False):
-            meta = self.class_map.get(int(cls_idx), {})
-            disease_name = meta.get("disease_name")
-            if (disease_name is None or disease_name == "") and meta.get(
-                "disease_label"
-            ) == "healthy":
-                disease_name = "Здорова рослина"
 
-            out.append(
-                {
-                    "class_index": int(cls_idx),
-                    "confidence": float(conf),
-                    "plant_name": meta.get("plant_name"),
-                    "plant_label": meta.get("plant_label"),
-                    "disease_name": disease_name,
-                    "disease_label": meta.get("disease_label"),
-                    "plant_id": meta.get("plant_id"),
-                    "disease_id": meta.get("disease_id"),
-                }
-            )
-        return out
+def _load_onnx_session(model_path: Path) -> ort.InferenceSession:
+    if not ORT_AVAILABLE:
+        raise RuntimeError("onnxruntime is not available")
+
+    opts = ort.SessionOptions()
+    opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    opts.intra_op_num_threads = torch_threads_per_worker()
+    opts.inter_op_num_threads = 1
+    session = ort.InferenceSession(
+        str(model_path), sess_options=opts, providers=["CPUExecutionProvider"]
+    )
+    logger.info(f"Loaded ONNX model from {model_path}")
+    return session
+
+
+def _maybe_optimize_for_inference(m):
+    from app.core.config import settings
+
+    if not settings.inference_jit_optimize:
+        return m
+    try:
+        return torch.jit.optimize_for_inference(m)
+    except Exception as e:  # noqa: BLE001
+        logger.warning(f"optimize_for_inference failed, using plain TorchScript: {e}")
+        return m
+
+
+def resolve_model_path() -> Path:
+    """Шлях до артефакту моделі з урахуванням PLANTIO_MODEL_VARIANT."""
+    from app.core.config import settings
+
+    model_path = Path(settings.model_path)
+    if settings.model_variant:
+        return model_path.parent / "variants" / f"{settings.model_variant}.pt"
+    return model_path
+
+
+def _class_map_path() -> Path:
+    from app.core.config import settings
+
+    if getattr(settings, "class_map_path", None):
+        return Path(settings.class_map_path)  # type: ignore[arg-type]
+    return Path(settings.model_path).parent / "class_map.json"
 
 
 def _load_model_flexible(model_path: Path):
     """
+    0) *.onnx (або PLANTIO_INFERENCE_BACKEND=onnx) — сесія ONNX Runtime
     1) Пробуємо TorchScript (torch.jit.load)
     2) Якщо не вийшло — pickled nn.Module через torch.load(weights_only=False)
        + allowlist для torchvision MobileNetV2 (за потреби).
     Повертає (model, backend_str)
     """
+    _import_backends()
+    if _resolve_backend(model_path) == "onnx":
+        return _load_onnx_session(model_path), "onnxruntime"
+
     if not TORCH_AVAILABLE:
         raise RuntimeError("Torch is not available")
 
@@ -163,7 +351,7 @@ def _load_model_flexible(model_path: Path):
         m = torch.jit.load(str(model_path), map_location="cpu")
         m.eval()
         logger.info(f"Loaded TorchScript model from {model_path}")
-        return m, "torchscript"
+        return _maybe_optimize_for_inference(m), "torchscript"
     except Exception as e_js:
         logger.error(f"Failed to load TorchScript model: {e_js}")
 
@@ -198,43 +386,112 @@ def _load_model_flexible(model_path: Path):
 
 # ---------- module-level singleton ----------
 _CLASSIFIER: _BaseClassifier | None = None
+_MODEL_VERSION: str | None = None
+# у режимі process модель живе лише у воркерах пулу — батько знає її backend
+_POOL_BACKEND: str | None = None
+_LOAD_LOCK = threading.Lock()
+
+
+def _model_num_outputs(model: Any, backend: str) -> int | None:
+    """
+    Кількість виходів моделі без forward pass: форма виходу ONNX-графа або
+    out_features останнього Linear. None — не видно статично (frozen
+    TorchScript), тоді перевірка відбудеться на першому forward pass.
+    """
+    if backend == "onnxruntime":
+        dim = model.get_outputs()[0].shape[-1]
+        return dim if isinstance(dim, int) else None
+
+    last = None
+    for m in model.modules():
+        if isinstance(m, nn.Linear):
+            last = m.out_features
+        elif getattr(m, "original_name", None) == "Linear":
+            last = int(m.weight.shape[0])
+    return last
 
 
 def _build_classifier() -> _BaseClassifier:
     from app.core.config import settings
 
-    model_path = Path(settings.model_path)
-
-    class_map_path = (
-        Path(settings.class_map_path)
-        if getattr(settings, "class_map_path", None)
-        else model_path.parent / "class_map.json"
-    )
-    class_map = _load_class_map(class_map_path)
+    _import_backends()
+    model_path = resolve_model_path()
+    classes = _load_class_map(_class_map_path())
 
-    if not TORCH_AVAILABLE:
+    if _resolve_backend(model_path) == "torch" and not TORCH_AVAILABLE:
         logger.warning("Torch not available — using DummyClassifier.")
-        return _DummyClassifier(class_map)
+        MODEL_FALLBACKS.inc("torch_unavailable")
+        return _DummyClassifier(classes)
 
     if not model_path.exists():
         logger.warning(f"Model file not found at {model_path} — using DummyClassifier.")
-        return _DummyClassifier(class_map)
+        MODEL_FALLBACKS.inc("model_missing")
+        return _DummyClassifier(classes)
 
     try:
         model, backend = _load_model_flexible(model_path)
-        return _TorchClassifier(model, class_map, backend=backend)
-    except Exception:
-        logger.warning("Falling back to DummyClassifier due to model load failure.")
-        return _DummyClassifier(class_map)
+        num_outputs = _model_num_outputs(model, backend)
+        if num_outputs is not None:
+            classes.validate(num_outputs)
+        if backend == "onnxruntime":
+            return _OnnxClassifier(model, classes, jpeg_draft=settings.inference_jpeg_draft)
+        return _TorchClassifier(
+            model, classes, backend=backend, jpeg_draft=settings.inference_jpeg_draft
+        )
+    except Exception as e:
+        logger.warning("Falling back to DummyClassifier due to model load failure: {}", e)
+        MODEL_FALLBACKS.inc("load_failed")
+        return _DummyClassifier(classes)
 
 
-def _ensure_loaded() -> None:
-    global _CLASSIFIER
-    if _CLASSIFIER is None:
-        _CLASSIFIER = _build_classifier()
+def _file_digest(path: Path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    try:
+        with path.open("rb") as f:
+            while chunk := f.read(chunk_size):
+                h.update(chunk)
+    except OSError:
+        return "missing"
+    return h.hexdigest()
+
+
+def _compute_model_version(classifier: _BaseClassifier) -> str:
+    """
+    Відбиток завантажених артефактів: backend + вміст файлу моделі
+    + вміст class_map + режим препроцесингу. Будь-яка зміна — нова версія,
+    тож кешовані передбачення старої моделі просто перестають збігатися.
+    """
+    from app.core.config import settings
+
+    model_path = resolve_model_path()
+    class_map_path = _class_map_path()
+    backend = getattr(classifier, "backend", "unknown")
 
+    h = hashlib.sha256()
+    h.update(backend.encode())
+    if backend != "dummy":
+        h.update(_file_digest(model_path).encode())
+        h.update(b"draft" if settings.inference_jpeg_draft else b"full")
+        h.update(b"jit-opt" if settings.inference_jit_optimize else b"")
+    h.update(_file_digest(class_map_path).encode())
+    return f"{backend}-{h.hexdigest()[:16]}"
 
-def predict_topk(image_bytes: bytes, topk: int = 3) -> list[dict[str, Any]]:
+
+def _ensure_loaded() -> None:
+    global _CLASSIFIER, _MODEL_VERSION
+    if _CLASSIFIER is not None:
+        return
+    # запит, що прийшов до кінця фонового завантаження, чекає на нього,
+    # а не вантажить модель вдруге
+    with _LOAD_LOCK:
+        if _CLASSIFIER is None:
+            classifier = _build_classifier()
+            _MODEL_VERSION = _compute_model_version(classifier)
+            _CLASSIFIER = classifier
+            logger.info("Model version: {}", _MODEL_VERSION)
+
+
+def predict_topk(image_bytes: ImageInput, topk: int = 3) -> list[dict[str, Any]]:
     """Публічний API для ендпоінта діагностики."""
     _ensure_loaded()
     t0 = time.perf_counter()
@@ -244,12 +501,385 @@ def predict_topk(image_bytes: bytes, topk: int = 3) -> list[dict[str, Any]]:
     return res
 
 
+def _predict_batch(images: list[ImageInput], topk: int) -> list[list[dict[str, Any]] | Exception]:
+    _ensure_loaded()
+    return _CLASSIFIER.predict_batch(images, topk=topk)  # type: ignore[union-attr]
+
+
+# ---------- micro-batching ----------
+@dataclass
+class BatchingStats:
+    batches: int = 0
+    items: int = 0
+    max_batch_size: int = 0
+    last_batch_size: int = 0
+    queue_wait_ms_total: float = 0.0
+    queue_wait_ms_max: float = 0.0
+    forward_ms_total: float = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": (round(self.items / self.batches, 2) if self.batches else 0.0),
+            "max_batch_size": self.max_batch_size,
+            "last_batch_size": self.last_batch_size,
+            "avg_queue_wait_ms": (
+                round(self.queue_wait_ms_total / self.items, 3) if self.items else 0.0
+            ),
+            "max_queue_wait_ms": round(self.queue_wait_ms_max, 3),
+            "avg_forward_ms": (
+                round(self.forward_ms_total / self.batches, 3) if self.batches else 0.0
+            ),
+        }
+
+
+@dataclass
+class _PendingItem:
+    image_bytes: ImageInput
+    topk: int
+    future: asyncio.Future
+    enqueued_at: float
+    # воркер батчера живе поза контекстом запитів — trace_id несе сам елемент
+    trace_id: str | None = None
+
+
+class _MicroBatcher:
+    """
+    Збирає конкурентні запити в батч (до max_batch_size або max_wait_ms),
+    робить один forward pass і роздає результати тим, хто чекає.
+    """
+
+    def __init__(self, max_batch_size: int, max_wait_ms: float, max_inflight: int = 1):
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_s = max(0.0, float(max_wait_ms)) / 1000
+        self.max_inflight = max(1, int(max_inflight))
+        self.stats = BatchingStats()
+        self._queue: asyncio.Queue[_PendingItem] | None = None
+        self._worker: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _ensure_worker(self) -> asyncio.Queue[_PendingItem]:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            # порожній контекст: інакше воркер (і всі його _dispatch) успадкує
+            # trace запиту, який першим його запустив
+            self._worker = loop.create_task(self._run(self._queue), context=contextvars.Context())
+        return self._queue  # type: ignore[return-value]
+
+    async def submit(self, image_bytes: ImageInput, topk: int) -> list[dict[str, Any]]:
+        queue = self._ensure_worker()
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        queue.put_nowait(
+            _PendingItem(image_bytes, topk, fut, time.perf_counter(), current_trace_id())
+        )
+        return await fut
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _collect(self, queue: asyncio.Queue[_PendingItem]) -> list[_PendingItem]:
+        batch = [await queue.get()]
+        deadline = time.perf_counter() + self.max_wait_s
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except TimeoutError:
+                break
+        return batch
+
+    async def _run(self, queue: asyncio.Queue[_PendingItem]) -> None:
+        # поки всі воркери зайняті, нові запити накопичуються в наступний батч
+        slots = asyncio.Semaphore(self.max_inflight)
+        inflight: set[asyncio.Task] = set()
+        try:
+            while True:
+                await slots.acquire()
+                batch = await self._collect(queue)
+                batch = [item for item in batch if not item.future.cancelled()]
+                if not batch:
+                    slots.release()
+                    continue
+
+                task = asyncio.create_task(self._dispatch(batch))
+                inflight.add(task)
+                task.add_done_callback(inflight.discard)
+                task.add_done_callback(lambda _t: slots.release())
+        finally:
+            for task in inflight:
+                task.cancel()
+
+    async def _dispatch(self, batch: list[_PendingItem]) -> None:
+        t_dispatch = time.perf_counter()
+        topk = max(item.topk for item in batch)
+        try:
+            results = await run_in_pool(_predict_batch, [item.image_bytes for item in batch], topk)
+        except Exception as e:  # noqa: BLE001
+            results = [e] * len(batch)
+        forward_ms = (time.perf_counter() - t_dispatch) * 1000
+
+        self._record(batch, t_dispatch, forward_ms)
+        for item, res in zip(batch, results, strict=True):
+            if item.future.done():
+                continue
+            if isinstance(res, Exception):
+                item.future.set_exception(res)
+            else:
+                item.future.set_result(res[: item.topk])
+
+    def _record(self, batch: list[_PendingItem], t_dispatch: float, forward_ms: float) -> None:
+        st = self.stats
+        st.batches += 1
+        st.items += len(batch)
+        st.last_batch_size = len(batch)
+        st.max_batch_size = max(st.max_batch_size, len(batch))
+        st.forward_ms_total += forward_ms
+        for item in batch:
+            STAGE_SECONDS.observe(t_dispatch - item.enqueued_at, "queue_wait")
+            wait_ms = (t_dispatch - item.enqueued_at) * 1000
+            st.queue_wait_ms_total += wait_ms
+            st.queue_wait_ms_max = max(st.queue_wait_ms_max, wait_ms)
+            logger.bind(trace_id=item.trace_id).debug(
+                "Inference batch item: queue_wait={:.1f} ms batch_size={}",
+                wait_ms,
+                len(batch),
+            )
+        logger.debug("Inference batch: size={} forward={:.1f} ms", len(batch), forward_ms)
+
+    async def close(self) -> None:
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+        self._queue = None
+        self._loop = None
+
+
+_BATCHER: _MicroBatcher | None = None
+
+
+def _get_batcher() -> _MicroBatcher:
+    global _BATCHER
+    if _BATCHER is None:
+        from app.core.config import settings
+
+        _BATCHER = _MicroBatcher(
+            settings.inference_max_batch_size,
+            settings.inference_max_wait_ms,
+            max_inflight=worker_count(),
+        )
+    return _BATCHER
+
+
+async def predict_topk_async(image_bytes: ImageInput, topk: int = 3) -> list[dict[str, Any]]:
+    """
+    Асинхронний API для ендпоінта діагностики: запит потрапляє
+    у мікробатчер (або, якщо батчинг вимкнено, напряму в пул інференсу).
+    Event loop ніколи не виконує декодування чи forward pass сам.
+    image_bytes — вміст або шлях до збереженого файлу (декодер читає його сам).
+    """
+    from app.core.config import settings
+
+    if not settings.inference_batching:
+        return await run_in_pool(predict_topk, image_bytes, topk)
+    return await _get_batcher().submit(image_bytes, topk)
+
+
+async def predict_batch_async(
+    images: list[ImageInput], topk: int = 3
+) -> list[list[dict[str, Any]] | Exception]:
+    """
+    Кілька зображень одного запиту. З батчингом усі вони одразу йдуть
+    у чергу мікробатчера і збираються в справжні батчі (разом із чужими
+    запитами); без батчингу — один виклик predict_batch у пулі.
+    Невдале зображення повертає свій виняток на своїй позиції.
+    """
+    from app.core.config import settings
+
+    if not images:
+        return []
+    if not settings.inference_batching:
+        return await run_in_pool(_predict_batch, images, topk)
+
+    batcher = _get_batcher()
+    results = await asyncio.gather(
+        *(batcher.submit(image_bytes, topk) for image_bytes in images),
+        return_exceptions=True,
+    )
+    out: list[list[dict[str, Any]] | Exception] = []
+    for res in results:
+        if isinstance(res, BaseException) and not isinstance(res, Exception):
+            raise res  # CancelledError тощо — не помилка окремого зображення
+        out.append(res)
+    return out
+
+
+def batching_stats() -> dict[str, Any]:
+    if _BATCHER is None:
+        return BatchingStats().as_dict() | {"queue_depth": 0}
+    return _BATCHER.stats.as_dict() | {"queue_depth": _BATCHER.queue_depth()}
+
+
+async def shutdown() -> None:
+    if _BATCHER is not None:
+        await _BATCHER.close()
+    await asyncio.get_running_loop().run_in_executor(None, shutdown_executor)
+
+
+def model_version() -> str:
+    """Версія моделі; "unknown", поки модель ще не завантажена."""
+    return _MODEL_VERSION or "unknown"
+
+
 def model_backend() -> str:
+    """Backend моделі; "loading", поки модель ще не завантажена."""
+    if _CLASSIFIER is None:
+        return _POOL_BACKEND or "loading"
+    return getattr(_CLASSIFIER, "backend", "unknown")
+
+
+def loaded_model_info() -> tuple[str, str]:
+    """Завантажує модель у поточному процесі й повертає (backend, версія)."""
     _ensure_loaded()
-    try:
-        return getattr(_CLASSIFIER, "backend", "unknown")  # type: ignore[union-attr]
-    except Exception:
-        return "unknown"
+    return model_backend(), model_version()
+
+
+# ---------- завантаження і прогрів ----------
+
+
+@dataclass
+class LoadState:
+    state: str = "pending"  # pending | loading | warming | ready | failed
+    error: str | None = None
+    load_s: float | None = None
+    warmup_s: float | None = None
+    ready_s: float | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "error": self.error,
+            "load_s": self.load_s,
+            "warmup_s": self.warmup_s,
+            "ready_s": self.ready_s,
+        }
+
+
+_LOAD_STATE = LoadState()
+
+
+def _warmup_image() -> bytes:
+    """Синтетичне JPEG-фото: прогріває і декодер, і forward pass."""
+    import io
+
+    from PIL import Image
+
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, size=(480, 640, 3), dtype=np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(pixels).save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+def _warmup_batch_sizes() -> list[int]:
+    from app.core.config import settings
+
+    if settings.inference_warmup_batch_sizes:
+        sizes = settings.inference_warmup_batch_sizes
+    elif settings.inference_batching:
+        sizes = [1, settings.inference_max_batch_size]
+    else:
+        sizes = [1]
+    return sorted({max(1, int(n)) for n in sizes})
 
 
-_ensure_loaded()
+def warmup(batch_sizes: list[int], iters: int) -> None:
+    """
+    Кілька forward pass на робочих розмірах батча: ініціалізація
+    аллокатора, ліниве створення ядер/графів, JIT-профілювання TorchScript.
+    Виконується у воркері пулу, де потім і житимуть запити.
+    """
+    _ensure_loaded()
+    image = _warmup_image()
+    for n in batch_sizes:
+        for _ in range(iters):
+            res = _CLASSIFIER.predict_batch([image] * n, topk=3)  # type: ignore[union-attr]
+            errors = [r for r in res if isinstance(r, Exception)]
+            if errors:
+                raise errors[0]
+
+
+def load_state() -> dict[str, Any]:
+    return _LOAD_STATE.as_dict()
+
+
+def is_ready() -> bool:
+    return _LOAD_STATE.state == "ready"
+
+
+async def load_and_warmup(started_at: float | None = None) -> None:
+    """
+    Завантаження моделі + прогрів поза event loop. started_at —
+    time.perf_counter() старту процесу, щоб залогувати час до готовності.
+    """
+    from app.core.config import settings
+
+    global _MODEL_VERSION, _POOL_BACKEND
+
+    started_at = time.perf_counter() if started_at is None else started_at
+    loop = asyncio.get_running_loop()
+
+    try:
+        _LOAD_STATE.state = "loading"
+        t0 = time.perf_counter()
+        if settings.inference_mode == "process":
+            # батько моделі не виконує: вантажать лише воркери пулу
+            # (ініціалізатор), а версію й backend беремо в них
+            infos = await asyncio.gather(
+                *(run_in_pool(loaded_model_info) for _ in range(worker_count()))
+            )
+            _POOL_BACKEND, _MODEL_VERSION = infos[0]
+        else:
+            await loop.run_in_executor(None, _ensure_loaded)
+        _LOAD_STATE.load_s = round(time.perf_counter() - t0, 3)
+
+        _LOAD_STATE.state = "warming"
+        t0 = time.perf_counter()
+        sizes = _warmup_batch_sizes()
+        iters = max(0, settings.inference_warmup_iters)
+        if iters:
+            # по задачі на воркер пулу — кожен прогріває свою копію/потоки
+            # (розподіл між процесами best-effort: задачі беруть вільні воркери)
+            await asyncio.gather(
+                *(run_in_pool(warmup, sizes, iters) for _ in range(worker_count()))
+            )
+        _LOAD_STATE.warmup_s = round(time.perf_counter() - t0, 3)
+    except Exception as e:  # noqa: BLE001
+        _LOAD_STATE.state = "failed"
+        _LOAD_STATE.error = repr(e)
+        logger.exception("Model load/warmup failed")
+        return
+
+    _LOAD_STATE.state = "ready"
+    _LOAD_STATE.ready_s = round(time.perf_counter() - started_at, 3)
+    logger.info(
+        "Model ready in {:.2f}s since start (load {:.2f}s, warmup {:.2f}s, batch sizes {} x{})",
+        _LOAD_STATE.ready_s,
+        _LOAD_STATE.load_s,
+        _LOAD_STATE.warmup_s,
+        sizes,
+        iters,
+    )
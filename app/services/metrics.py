@@ -0,0 +1,470 @@
+"""
+Метрики процесу у форматі Prometheus text (GET /metrics).
+
+Гістограми з фіксованими бакетами і лічильники — прості списки/словники
+під одним замком на метрику: observe() коштує bisect і два додавання,
+тож стадії, які виконуються в потоках інференсу, можна міряти на кожен
+запит. Gauge'і рахуються функціями в момент scrape і нічого не коштують
+між ними.
+
+Метрики — на процес: при `app.serve --workers N` кожен воркер рахує
+своє (мітка pid у plantio_process_info). Дочірні процеси пулу інференсу
+(PLANTIO_INFERENCE_MODE=process) нічого не віддають самі: їхні inc()/observe()
+повертаються разом з результатом задачі і записуються в батьківські метрики.
+
+Час стадій поточного запиту додатково збирається в contextvar, який
+MetricsMiddleware віддає заголовком Server-Timing
+(PLANTIO_SERVER_TIMING_ENABLED).
+"""
+
+from __future__ import annotations
+
+import bisect
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, TypeVar
+
+from loguru import logger
+from starlette.routing import replace_params
+
+from app.services.tracing import span
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# секунди: від швидкого lookup до повільного forward pass на CPU
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+Labels = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Labels, values: Labels, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values, strict=True)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Labels = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _check(self, labels: Labels) -> None:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name}: expected labels {self.labelnames}")
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Labels = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._check(labels)
+        if _FORWARDED is not None:
+            _forward(self.name, labels, amount)
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, v in items:
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_num(v)}"
+
+
+class Gauge(_Metric):
+    """Значення рахує fn() під час scrape: число або {мітки: число}."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        fn: Callable[[], float | dict[Labels, float]],
+        labelnames: Labels = (),
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.fn = fn
+
+    def samples(self) -> Iterator[str]:
+        try:
+            value = self.fn()
+        except Exception as e:  # noqa: BLE001
+            logger.debug("Gauge {} failed: {}", self.name, e)
+            return
+        items = value.items() if isinstance(value, dict) else [((), value)]
+        for labels, v in sorted(items):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_num(v)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Labels = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # мітки → [лічильники по бакетах (+Inf останній), сума, кількість]
+        self._series: dict[Labels, list[Any]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        self._check(labels)
+        if _FORWARDED is not None:
+            _forward(self.name, labels, value)
+            return
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][idx] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted((labels, (list(s[0]), s[1], s[2])) for labels, s in self._series.items())
+        for labels, (counts, total, n) in items:
+            cumulative = 0
+            for bound, c in zip((*self.buckets, float("inf")), counts, strict=True):
+                cumulative += c
+                le = _labels(self.labelnames, labels, f'le="{_num(bound)}"')
+                yield f"{self.name}_bucket{le} {cumulative}"
+            base = _labels(self.labelnames, labels)
+            yield f"{self.name}_sum{base} {_num(total)}"
+            yield f"{self.name}_count{base} {n}"
+
+
+M = TypeVar("M", bound=_Metric)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: M) -> M:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> _Metric | None:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        return "\n".join(m.render() for m in self._metrics.values()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.register(
+    Counter(
+        "plantio_http_requests_total",
+        "HTTP requests by route template and status",
+        ("method", "route", "status"),
+    )
+)
+HTTP_SECONDS = REGISTRY.register(
+    Histogram(
+        "plantio_http_request_duration_seconds",
+        "HTTP request latency by route template",
+        ("route",),
+    )
+)
+STAGE_SECONDS = REGISTRY.register(
+    Histogram(
+        "plantio_diagnose_stage_seconds",
+        "Time spent in each /diagnose pipeline stage",
+        ("stage",),
+    )
+)
+DIAGNOSE_RESULTS = REGISTRY.register(
+    Counter(
+        "plantio_diagnose_results_total",
+        "Diagnosed images by outcome (decided, low_confidence, invalid_image, …)",
+        ("outcome",),
+    )
+)
+MODEL_FALLBACKS = REGISTRY.register(
+    Counter(
+        "plantio_model_fallback_total",
+        "Model loads that fell back to the dummy classifier",
+        ("reason",),
+    )
+)
+
+
+def _queue_depth() -> float:
+    from app.services.inference import batching_stats
+
+    return batching_stats()["queue_depth"]
+
+
+def _model_info() -> dict[Labels, float]:
+    from app.services.inference import model_backend, model_version
+
+    return {(model_backend(), model_version()): 1}
+
+
+def _model_ready() -> float:
+    from app.services.inference import is_ready
+
+    return 1 if is_ready() else 0
+
+
+def _write_behind_depth() -> float:
+    from app.services.write_behind import get_diagnosis_writer
+
+    writer = get_diagnosis_writer()
+    return writer.depth() if writer is not None else 0
+
+
+REGISTRY.register(
+    Gauge(
+        "plantio_process_info",
+        "Worker process (metrics are per process)",
+        lambda: {(str(os.getpid()),): 1},
+        ("pid",),
+    )
+)
+REGISTRY.register(
+    Gauge(
+        "plantio_inference_queue_depth",
+        "Images waiting in the micro-batcher queue",
+        _queue_depth,
+    )
+)
+REGISTRY.register(
+    Gauge(
+        "plantio_model_info",
+        "Loaded model backend and version",
+        _model_info,
+        ("backend", "version"),
+    )
+)
+REGISTRY.register(Gauge("plantio_model_ready", "1 when the model is loaded and warm", _model_ready))
+REGISTRY.register(
+    Gauge(
+        "plantio_write_behind_depth",
+        "Diagnosis documents waiting in the write-behind buffer",
+        _write_behind_depth,
+    )
+)
+
+
+# ---------- метрики дочірніх процесів пулу ----------
+
+# (метрика, мітки, значення) — у дочірньому процесі пулу замість запису;
+# None — звичайний процес, що рахує сам
+_FORWARDED: list[tuple[str, Labels, float]] | None = None
+_FORWARD_LOCK = threading.Lock()
+
+
+def _forward(name: str, labels: Labels, value: float) -> None:
+    with _FORWARD_LOCK:
+        if _FORWARDED is not None:
+            _FORWARDED.append((name, labels, value))
+
+
+def forward_to_parent() -> None:
+    """
+    Вмикається в ініціалізаторі дочірнього процесу пулу: /metrics віддає
+    лише батько, тож Counter.inc() і Histogram.observe() далі тільки
+    накопичуються до drain_forwarded().
+    """
+    global _FORWARDED
+    with _FORWARD_LOCK:
+        if _FORWARDED is None:
+            _FORWARDED = []
+
+
+def drain_forwarded() -> list[tuple[str, Labels, float]]:
+    """Накопичене з часу попереднього виклику (у звичайному процесі — [])."""
+    with _FORWARD_LOCK:
+        if not _FORWARDED:
+            return []
+        records = list(_FORWARDED)
+        _FORWARDED.clear()
+    return records
+
+
+def replay_forwarded(records: list[tuple[str, Labels, float]]) -> None:
+    """Записує в метрики батька те, що повернув дочірній процес."""
+    for name, labels, value in records:
+        metric = REGISTRY.get(name)
+        if isinstance(metric, Histogram):
+            metric.observe(value, *labels)
+        elif isinstance(metric, Counter):
+            metric.inc(*labels, amount=value)
+
+
+# ---------- стадії запиту ----------
+
+_SERVER_TIMING: ContextVar[list[tuple[str, float]] | None] = ContextVar(
+    "plantio_server_timing", default=None
+)
+
+
+def record_stage(name: str, seconds: float) -> None:
+    """
+    Гістограма стадії + Server-Timing поточного запиту. У потоках пулу
+    інференсу contextvar запиту не видно — там лише гістограма.
+    """
+    STAGE_SECONDS.observe(seconds, name)
+    timings = _SERVER_TIMING.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Стадія запиту: гістограма, Server-Timing і span поточного trace."""
+    t0 = time.perf_counter()
+    try:
+        with span(name):
+            yield
+    finally:
+        record_stage(name, time.perf_counter() - t0)
+
+
+def server_timing_header(timings: list[tuple[str, float]], total_s: float) -> bytes:
+    merged: dict[str, float] = {}
+    for name, seconds in timings:
+        merged[name] = merged.get(name, 0.0) + seconds
+    parts = [f"{name};dur={s * 1000:.1f}" for name, s in merged.items()]
+    parts.append(f"total;dur={total_s * 1000:.1f}")
+    return ", ".join(parts).encode("latin-1")
+
+
+RESPONSE_CACHE_SCOPE_KEY = "plantio.response_cache"
+
+
+def route_label(scope) -> str:
+    """
+    Повний шаблон маршруту. Маршрути підключених роутерів знають лише свій
+    локальний шаблон (/diseases/{disease_id}), тож префікс береться з
+    фактичного шляху: шлях мінус локальний шаблон, заповнений path_params.
+    """
+    route = scope.get("route")
+    if route is None:
+        return "response_cache" if scope.get(RESPONSE_CACHE_SCOPE_KEY) else "unmatched"
+    template = getattr(route, "path_format", None) or getattr(route, "path", "")
+    try:
+        rendered, _ = replace_params(
+            template, route.param_convertors, dict(scope.get("path_params") or {})
+        )
+    except Exception:  # noqa: BLE001
+        return template
+    path = scope.get("path", "")
+    if rendered and path.endswith(rendered):
+        return path[: len(path) - len(rendered)] + template
+    return template
+
+
+class MetricsMiddleware:
+    """
+    Лічильник і латентність кожного HTTP-запиту за шаблоном маршруту
+    (/api/v1/diseases/{disease_id}, а не конкретний id); з server_timing —
+    ще й заголовок Server-Timing зі стадіями цього запиту.
+
+    Відповіді кешу відповідей (включно з 304) до роутера не доходять і
+    мають мітку "response_cache"; решта без маршруту — "unmatched", щоб
+    сканери не роздували кардинальність.
+    """
+
+    def __init__(self, app, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        t0 = time.perf_counter()
+        timings: list[tuple[str, float]] | None = [] if self.server_timing else None
+        token = _SERVER_TIMING.set(timings)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if timings is not None:
+                    header = server_timing_header(timings, time.perf_counter() - t0)
+                    message = {
+                        **message,
+                        "headers": [
+                            *message.get("headers", []),
+                            (b"server-timing", header),
+                        ],
+                    }
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _SERVER_TIMING.reset(token)
+            path = route_label(scope)
+            HTTP_REQUESTS.inc(scope["method"], path, str(status))
+            HTTP_SECONDS.observe(time.perf_counter() - t0, path)
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
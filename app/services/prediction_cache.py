@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import copy
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any
+
+from loguru import logger
+
+from app.models.prediction import CachedPrediction, now_utc
+from app.services import inference
+
+CacheKey = tuple[str, str, int]
+
+
+@dataclass
+class CacheStats:
+    memory_hits: int = 0
+    persistent_hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    persistent_errors: int = 0
+    persistent_dropped: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        lookups = self.memory_hits + self.persistent_hits + self.misses
+        hits = self.memory_hits + self.persistent_hits
+        return {
+            "lookups": lookups,
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "persistent_errors": self.persistent_errors,
+            "persistent_dropped": self.persistent_dropped,
+        }
+
+
+class _LRUCache:
+    """LRU з обмеженням за кількістю записів і TTL (monotonic clock)."""
+
+    def __init__(self, maxsize: int, ttl_s: float):
+        self.maxsize = max(0, int(maxsize))
+        self.ttl_s = float(ttl_s)
+        self._data: OrderedDict[CacheKey, tuple[float, list[dict[str, Any]]]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: CacheKey) -> list[dict[str, Any]] | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def put(self, key: CacheKey, value: list[dict[str, Any]]) -> int:
+        """Повертає кількість витіснених записів."""
+        if self.maxsize == 0:
+            return 0
+        self._data[key] = (time.monotonic() + self.ttl_s, value)
+        self._data.move_to_end(key)
+        evicted = 0
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            evicted += 1
+        return evicted
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class PredictionCache:
+    """
+    Дворівневий кеш сирих кандидатів моделі (до збагачення каталогом).
+
+    Ключ — (sha256 зображення, версія моделі, topK). Версія моделі
+    рахується з вмісту файлу моделі та class_map, тож після їх зміни
+    старі записи більше не знаходяться, а LRU у пам'яті скидається.
+    Помилки Mongo ніколи не валять запит — кеш просто пропускається.
+
+    Запис у Mongo — фоновий: put() оновлює пам'ять і ставить задачу, тож
+    повільна Mongo не додає затримки відповіді. Понад max_pending
+    незавершених записів нові лише в пам'яті.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl_s: float,
+        persistent: bool = True,
+        persistent_ttl_s: float = 7 * 24 * 3600,
+        max_pending: int = 256,
+    ):
+        self._memory = _LRUCache(maxsize, ttl_s)
+        self.persistent = persistent
+        self.persistent_ttl_s = float(persistent_ttl_s)
+        self.max_pending = max(0, int(max_pending))
+        self.stats = CacheStats()
+        self._version: str | None = None
+        self._pending: set[asyncio.Task] = set()
+
+    def _key(self, sha256: str, topk: int) -> CacheKey | None:
+        """None, поки модель не завантажена (версія невідома) — кеш пропускаємо."""
+        version = inference.model_version()
+        if version == "unknown":
+            return None
+        if version != self._version:
+            if self._version is not None:
+                logger.info("Model version changed to {} — clearing cache", version)
+            self._memory.clear()
+            self._version = version
+        return sha256, version, int(topk)
+
+    async def get(self, sha256: str, topk: int) -> list[dict[str, Any]] | None:
+        key = self._key(sha256, topk)
+        if key is None:
+            return None
+
+        hit = self._memory.get(key)
+        if hit is not None:
+            self.stats.memory_hits += 1
+            return copy.deepcopy(hit)
+
+        if self.persistent:
+            try:
+                # TTL-монітор Mongo видаляє раз на хвилину — прострочене
+                # відсіюємо самі
+                doc = await CachedPrediction.get_pymongo_collection().find_one(
+                    {
+                        "sha256": key[0],
+                        "model_version": key[1],
+                        "topk": key[2],
+                        "expires_at": {"$gt": now_utc()},
+                    },
+                    projection={"candidates": 1},
+                )
+            except Exception as e:  # noqa: BLE001
+                self.stats.persistent_errors += 1
+                logger.debug("prediction_cache read failed: {}", e)
+                doc = None
+            if doc is not None:
+                self.stats.persistent_hits += 1
+                candidates = doc.get("candidates") or []
+                self.stats.evictions += self._memory.put(key, candidates)
+                return copy.deepcopy(candidates)
+
+        self.stats.misses += 1
+        return None
+
+    def put(self, sha256: str, topk: int, candidates: list[dict[str, Any]]) -> None:
+        key = self._key(sha256, topk)
+        if key is None:
+            return
+        value = copy.deepcopy(candidates)
+        self.stats.stores += 1
+        self.stats.evictions += self._memory.put(key, value)
+
+        if not self.persistent:
+            return
+        if len(self._pending) >= self.max_pending:
+            self.stats.persistent_dropped += 1
+            return
+        # порожній контекст: задача не тримає trace запиту, що її створив
+        task = asyncio.get_running_loop().create_task(
+            self._persist(key, value), context=contextvars.Context()
+        )
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _persist(self, key: CacheKey, value: list[dict[str, Any]]) -> None:
+        now = now_utc()
+        try:
+            await CachedPrediction.get_pymongo_collection().update_one(
+                {"sha256": key[0], "model_version": key[1], "topk": key[2]},
+                {
+                    "$set": {
+                        "candidates": value,
+                        "created_at": now,
+                        "expires_at": now + timedelta(seconds=self.persistent_ttl_s),
+                    }
+                },
+                upsert=True,
+            )
+        except Exception as e:  # noqa: BLE001
+            self.stats.persistent_errors += 1
+            logger.debug("prediction_cache write failed: {}", e)
+
+    async def flush(self) -> None:
+        """Дочікується фонових записів (зупинка застосунку)."""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    async def purge_stale_versions(self) -> int:
+        """Видаляє з Mongo записи інших версій моделі (викликається на старті)."""
+        if not self.persistent or inference.model_version() == "unknown":
+            return 0
+        result = await CachedPrediction.get_pymongo_collection().delete_many(
+            {"model_version": {"$ne": inference.model_version()}}
+        )
+        return int(getattr(result, "deleted_count", 0))
+
+    def clear(self) -> None:
+        self._memory.clear()
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "model_version": self._version,
+            "memory_entries": len(self._memory),
+            "pending_writes": len(self._pending),
+            **self.stats.as_dict(),
+        }
+
+
+_CACHE: PredictionCache | None = None
+
+
+def get_prediction_cache() -> PredictionCache | None:
+    """None, якщо кеш вимкнено (PLANTIO_PREDICTION_CACHE_ENABLED=false)."""
+    global _CACHE
+    from app.core.config import settings
+
+    if not settings.prediction_cache_enabled:
+        return None
+    if _CACHE is None:
+        _CACHE = PredictionCache(
+            settings.prediction_cache_size,
+            settings.prediction_cache_ttl_s,
+            persistent=settings.prediction_cache_persistent,
+            persistent_ttl_s=settings.prediction_cache_persistent_ttl_s,
+        )
+    return _CACHE
+
+
+def cache_stats() -> dict[str, Any]:
+    cache = get_prediction_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.snapshot()}
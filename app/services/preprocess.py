@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import io
+import os
+
+import numpy as np
+from PIL import Image
+
+INPUT_SIZE: tuple[int, int] = (224, 224)
+
+# вміст файлу або шлях до вже збереженого завантаження: PIL читає файл
+# сам, тож велике фото не тримається в пам'яті ще однією копією bytes
+ImageInput = bytes | os.PathLike
+
+
+class ImagePreprocessor:
+    """
+    Декодування + підготовка входу моделі, створюється один раз на класифікатор.
+
+    Для JPEG використовує draft-режим (DCT scaling): libjpeg декодує одразу
+    в 1/2, 1/4 або 1/8 розміру, але не менше за цільовий, тож 12 MP фото
+    з телефона не розгортається в пам'яті повністю. Далі — той самий
+    bilinear resize, що й у transforms.Resize, і перетворення uint8 HWC →
+    float32 CHW за один прохід прямо в переданий буфер.
+    """
+
+    def __init__(self, size: tuple[int, int] = INPUT_SIZE, jpeg_draft: bool = True):
+        self.size = size
+        self.jpeg_draft = jpeg_draft
+
+    def decode(self, image_bytes: ImageInput) -> Image.Image:
+        if isinstance(image_bytes, os.PathLike):
+            img = Image.open(image_bytes)
+        else:
+            img = Image.open(io.BytesIO(image_bytes))
+        if self.jpeg_draft and img.format == "JPEG":
+            img.draft("RGB", self.size)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        if img.size != self.size:
+            img = img.resize(self.size, Image.Resampling.BILINEAR)
+        return img
+
+    def batch_buffer(self, n: int) -> np.ndarray:
+        w, h = self.size
+        return np.empty((n, 3, h, w), dtype=np.float32)
+
+    def to_array(self, image_bytes: ImageInput, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Повертає float32 CHW у [0, 1]. Якщо передано `out` (рядок батч-буфера),
+        результат пишеться туди без проміжних тензорів.
+        """
+        return self.from_image(self.decode(image_bytes), out=out)
+
+    def from_image(self, img: Image.Image, out: np.ndarray | None = None) -> np.ndarray:
+        """Те саме для вже декодованого RGB-зображення потрібного розміру."""
+        hwc = np.asarray(img)
+        if out is None:
+            out = self.batch_buffer(1)[0]
+        np.divide(hwc.transpose(2, 0, 1), np.float32(255), out=out, dtype=np.float32)
+        return out
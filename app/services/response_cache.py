@@ -0,0 +1,345 @@
+"""
+Кеш відповідей довідкових ендпоінтів (/plants, /diseases).
+
+Відповідь повністю визначається вмістом каталогу і параметрами запиту,
+тож ключ — (шлях, нормалізований query, версія каталогу), а сильний
+ETag рахується з нього ж і з ідентифікатора збірки: усі воркери й репліки дають той самий ETag,
+і 304 можна віддати ще до побудови тіла. Стиснуті представлення мають
+власний ETag із суфіксом кодування ("…-gzip", "…-br"), як вимагає
+RFC 9110 §8.8.3 для різних байтів того самого ресурсу. Тіла зберігаються вже
+серіалізованими і стиснутими (gzip, brotli — якщо встановлено
+requirements-compression.txt); при зміні каталогу кеш очищується.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qsl, urlencode
+
+from loguru import logger
+
+from app.core.compression import accepted_encodings, available_encodings, compress
+from app.services.metrics import RESPONSE_CACHE_SCOPE_KEY
+
+CacheKey = tuple[str, str, str]
+
+
+@dataclass(frozen=True)
+class CachedBody:
+    etag: str
+    media_type: str
+    identity: bytes
+    encoded: dict[str, bytes] = field(default_factory=dict)
+
+    def negotiate(self, accept_encoding: str) -> tuple[str | None, bytes]:
+        """Найкраще кодування з Accept-Encoding клієнта: br > gzip > identity."""
+        accepted = accepted_encodings(accept_encoding)
+        for encoding in ("br", "gzip"):
+            if encoding in accepted and encoding in self.encoded:
+                return encoding, self.encoded[encoding]
+        return None, self.identity
+
+    @property
+    def size(self) -> int:
+        return len(self.identity) + sum(len(b) for b in self.encoded.values())
+
+
+def normalize_query(query_string: str) -> str:
+    """
+    Порядок параметрів не створює окремих записів. Порожні значення
+    лишаються в ключі: ендпоінт може відрізняти ?sort= від відсутнього
+    sort (для /diseases це природний порядок проти -diseaseName).
+    """
+    return urlencode(sorted(parse_qsl(query_string, keep_blank_values=True)))
+
+
+@functools.cache
+def build_id() -> str:
+    """
+    Ідентифікатор збірки в ETag: новий деплой зі зміненою схемою чи
+    серіалізацією відповіді не може віддати 304 на тіло старої версії.
+    PLANTIO_BUILD_ID (git sha з CI), інакше версія застосунку + відбиток
+    вихідних файлів app/ — однаковий у всіх воркерах і репліках однієї збірки.
+    """
+    from app.core.config import settings
+
+    if settings.build_id:
+        return settings.build_id
+    root = Path(__file__).resolve().parents[1]
+    h = hashlib.sha256(settings.app_version.encode("utf-8"))
+    for path in sorted(root.rglob("*.py")):
+        h.update(path.relative_to(root).as_posix().encode("utf-8"))
+        h.update(path.read_bytes())
+    return h.hexdigest()[:16]
+
+
+def make_etag(key: CacheKey) -> str:
+    payload = "\x00".join((*key, build_id()))
+    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    return f'"{key[2]}-{digest[:16]}"'
+
+
+ETAG_ENCODINGS = ("br", "gzip")
+
+
+def representation_etag(etag: str, encoding: str | None) -> str:
+    """ETag конкретного представлення: '"v-abc"' + gzip → '"v-abc-gzip"'."""
+    return etag if encoding is None else f'{etag[:-1]}-{encoding}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> str | None:
+    """
+    Представлення з If-None-Match, що відповідає ресурсу з ETag etag:
+    ETag, збережений клієнтом (з суфіксом кодування або без), або etag
+    для "*". None — жоден не підходить.
+    """
+    if if_none_match.strip() == "*":
+        return etag
+    # слабке порівняння, як вимагає RFC 9110 для If-None-Match
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip().removeprefix("W/")
+        if candidate == etag:
+            return candidate
+        for encoding in ETAG_ENCODINGS:
+            if candidate == representation_etag(etag, encoding):
+                return candidate
+    return None
+
+
+def encode_body(etag: str, media_type: str, body: bytes, min_size: int) -> CachedBody:
+    encoded: dict[str, bytes] = {}
+    if len(body) >= min_size:
+        for encoding in available_encodings():
+            encoded[encoding] = compress(body, encoding)
+    return CachedBody(etag, media_type, body, encoded)
+
+
+@dataclass
+class ResponseCacheStats:
+    hits: int = 0
+    misses: int = 0
+    not_modified: int = 0
+    stores: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            **self.__dict__,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class ResponseCache:
+    """LRU готових тіл відповідей з обмеженням за кількістю і байтами."""
+
+    def __init__(self, maxsize: int, max_bytes: int):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.stats = ResponseCacheStats()
+        self._data: OrderedDict[CacheKey, CachedBody] = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: CacheKey) -> CachedBody | None:
+        entry = self._data.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.stats.hits += 1
+        return entry
+
+    def peek(self, key: CacheKey) -> CachedBody | None:
+        """Без оновлення LRU і статистики."""
+        return self._data.get(key)
+
+    def put(self, key: CacheKey, entry: CachedBody) -> None:
+        if entry.size > self.max_bytes:
+            return
+        old = self._data.pop(key, None)
+        if old is not None:
+            self._bytes -= old.size
+        self._data[key] = entry
+        self._bytes += entry.size
+        self.stats.stores += 1
+        while len(self._data) > self.maxsize or self._bytes > self.max_bytes:
+            _, evicted = self._data.popitem(last=False)
+            self._bytes -= evicted.size
+            self.stats.evictions += 1
+
+    def clear(self, _snapshot: Any = None) -> None:
+        if self._data:
+            logger.debug("Response cache invalidated: {} entries", len(self._data))
+        self._data.clear()
+        self._bytes = 0
+        self.stats.invalidations += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "brotli": "br" in available_encodings(),
+            **self.stats.as_dict(),
+        }
+
+
+class ResponseCacheMiddleware:
+    """
+    GET-запити на шляхи з prefixes: If-None-Match з поточним ETag → 304
+    без виклику ендпоінта; збережене тіло → відповідь з кешу у
+    погодженому кодуванні; інакше відповідь ендпоінта (200, JSON)
+    зберігається. Поки каталог не завантажено — кеш не задіяний.
+    """
+
+    def __init__(
+        self,
+        app,
+        prefixes: tuple[str, ...],
+        max_age_s: int,
+        min_compress_size: int = 1024,
+    ):
+        self.app = app
+        self.prefixes = prefixes
+        self.cache_control = f"public, max-age={max_age_s}, must-revalidate".encode()
+        self.min_compress_size = min_compress_size
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "GET"
+            or not scope["path"].startswith(self.prefixes)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        from app.services.catalog import get_catalog
+
+        version = get_catalog().snapshot.version
+        cache = get_response_cache()
+        if version is None or cache is None:
+            await self.app(scope, receive, send)
+            return
+
+        query = normalize_query(scope.get("query_string", b"").decode("latin-1"))
+        key: CacheKey = (scope["path"], query, version)
+        etag = make_etag(key)
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]}
+
+        matched = etag_matches(headers.get("if-none-match", ""), etag)
+        if matched is not None:
+            cache.stats.not_modified += 1
+            scope[RESPONSE_CACHE_SCOPE_KEY] = True
+            # 304 несе ETag того представлення, яке отримав би клієнт;
+            # без тіла в кеші — те, що клієнт уже має
+            entry = cache.peek(key)
+            if entry is not None:
+                encoding, _ = entry.negotiate(headers.get("accept-encoding", ""))
+                matched = representation_etag(etag, encoding)
+            await self._send(send, 304, matched, None, None, b"")
+            return
+
+        entry = cache.get(key)
+        if entry is None:
+            entry = await self._fill(scope, receive, send, etag)
+            if entry is None:
+                return
+            cache.put(key, entry)
+        else:
+            scope[RESPONSE_CACHE_SCOPE_KEY] = True
+
+        encoding, body = entry.negotiate(headers.get("accept-encoding", ""))
+        await self._send(
+            send,
+            200,
+            representation_etag(etag, encoding),
+            entry.media_type,
+            encoding,
+            body,
+        )
+
+    async def _fill(self, scope, receive, send, etag: str) -> CachedBody | None:
+        """
+        Викликає ендпоінт і збирає відповідь. Не-200 або не-JSON
+        відповідь пересилається клієнту як є і не кешується (None).
+        """
+        start: dict[str, Any] = {}
+        chunks: list[bytes] = []
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+
+        resp_headers = {k.lower(): v for k, v in start.get("headers", [])}
+        media_type = resp_headers.get(b"content-type", b"").decode("latin-1")
+        body = b"".join(chunks)
+        if (
+            start.get("status") != 200
+            or not media_type.startswith("application/json")
+            or b"content-encoding" in resp_headers
+        ):
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+            return None
+        return encode_body(etag, media_type, body, self.min_compress_size)
+
+    async def _send(
+        self,
+        send,
+        status: int,
+        etag: str,
+        media_type: str | None,
+        encoding: str | None,
+        body: bytes,
+    ) -> None:
+        headers = [
+            (b"etag", etag.encode()),
+            (b"cache-control", self.cache_control),
+            (b"vary", b"Accept-Encoding"),
+        ]
+        if status != 304:
+            headers.append((b"content-type", (media_type or "").encode()))
+            headers.append((b"content-length", str(len(body)).encode()))
+        if encoding:
+            headers.append((b"content-encoding", encoding.encode()))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+_CACHE: ResponseCache | None = None
+
+
+def get_response_cache() -> ResponseCache | None:
+    """None, якщо кеш вимкнено (PLANTIO_RESPONSE_CACHE_ENABLED=false)."""
+    global _CACHE
+    from app.core.config import settings
+
+    if not settings.response_cache_enabled:
+        return None
+    if _CACHE is None:
+        from app.services.catalog import get_catalog
+
+        _CACHE = ResponseCache(
+            settings.response_cache_size, settings.response_cache_max_mb * 1024 * 1024
+        )
+        get_catalog().on_change(_CACHE.clear)
+    return _CACHE
+
+
+def response_cache_stats() -> dict[str, Any]:
+    cache = get_response_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.snapshot()}
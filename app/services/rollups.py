@@ -0,0 +1,225 @@
+"""
+Агрегати діагнозів для дашбордів: лічильники за годину і добу в
+колекції diagnosis_rollups, ключ — (plantId, decidedDiseaseId,
+decided/low_confidence).
+
+Записані Diagnosis лише збільшують лічильники в пам'яті; фонова задача
+раз на flush_interval_s скидає накопичене одним bulk_write з $inc-upsert'ами
+(по одній операції на ключ, а не на діагноз). Лічильники адитивні, тож
+ключі, які не вдалося записати, повертаються в наступний flush.
+Повний перерахунок з історії — `python -m scripts.backfill_rollups`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
+
+from beanie import Document
+from loguru import logger
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+GRANULARITIES = ("hour", "day")
+DECIDED = "decided"
+LOW_CONFIDENCE = "low_confidence"
+
+# (granularity, bucket, plantId, diseaseId, outcome)
+RollupKey = tuple[str, datetime, str | None, str | None, str]
+
+
+def bucket_start(ts: datetime, granularity: str) -> datetime:
+    """Початок години/доби в UTC; naive datetime вважається UTC."""
+    ts = ts.replace(tzinfo=UTC) if ts.tzinfo is None else ts.astimezone(UTC)
+    ts = ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0) if granularity == "day" else ts
+
+
+def rollup_keys(doc: Any) -> list[RollupKey]:
+    """Ключі лічильників, у які потрапляє один Diagnosis."""
+    result = getattr(doc, "result", None) or {}
+    disease_id = result.get("decidedDiseaseId")
+    outcome = DECIDED if disease_id is not None else LOW_CONFIDENCE
+    plant_id = result.get("plantId")
+    return [
+        (g, bucket_start(doc.created_at, g), plant_id, disease_id, outcome) for g in GRANULARITIES
+    ]
+
+
+def key_filter(key: RollupKey) -> dict[str, Any]:
+    granularity, bucket, plant_id, disease_id, outcome = key
+    return {
+        "granularity": granularity,
+        "bucket": bucket,
+        "plantId": plant_id,
+        "diseaseId": disease_id,
+        "outcome": outcome,
+    }
+
+
+@dataclass
+class RollupStats:
+    recorded: int = 0
+    flushes: int = 0
+    upserts: int = 0
+    requeued: int = 0
+    last_error: str | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return dict(self.__dict__)
+
+
+class RollupAggregator:
+    def __init__(self, model: type[Document], flush_interval_s: float):
+        self.model = model
+        self.flush_interval_s = float(flush_interval_s)
+        self.stats = RollupStats()
+        self._pending: Counter[RollupKey] = Counter()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    def record(self, docs: Iterable[Any]) -> None:
+        """Синхронно і без I/O — можна викликати просто з обробника запиту."""
+        n = 0
+        for doc in docs:
+            self._pending.update(rollup_keys(doc))
+            n += 1
+        self.stats.recorded += n
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, Counter()
+            keys = list(batch)
+            now = datetime.now(UTC)
+            ops = [
+                UpdateOne(
+                    key_filter(key),
+                    {"$inc": {"total": batch[key]}, "$set": {"updated_at": now}},
+                    upsert=True,
+                )
+                for key in keys
+            ]
+            try:
+                await self.model.get_pymongo_collection().bulk_write(ops, ordered=False)
+                failed: list[RollupKey] = []
+            except BulkWriteError as e:
+                # ordered=False: решта застосована; два паралельні upsert'и
+                # нового ключа дають duplicate key — повтор стане $inc
+                errors = e.details.get("writeErrors", [])
+                failed = [keys[err["index"]] for err in errors]
+                self.stats.last_error = errors[0].get("errmsg") if errors else repr(e)
+            except Exception as e:  # noqa: BLE001
+                # результат невідомий: краще можливий подвійний рахунок,
+                # ніж втрата (backfill вирівнює); так само в наступний flush
+                failed = keys
+                self.stats.last_error = repr(e)
+                logger.warning("Rollup flush of {} keys failed: {}", len(keys), e)
+
+            for key in failed:
+                self._pending[key] += batch[key]
+            self.stats.requeued += len(failed)
+            self.stats.upserts += len(keys) - len(failed)
+            self.stats.flushes += 1
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval_s)
+            try:
+                await self.flush()
+            except Exception:  # noqa: BLE001
+                logger.exception("Rollup flush failed")
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="diagnosis-rollups")
+
+    async def stop(self) -> None:
+        """Зупиняє фонову задачу і скидає накопичене."""
+        if self._task is not None:
+            async with self._flush_lock:
+                self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def snapshot(self) -> dict[str, Any]:
+        return {"pending_keys": len(self._pending), **self.stats.as_dict()}
+
+
+_ROLLUPS: RollupAggregator | None = None
+
+
+def get_rollups() -> RollupAggregator | None:
+    """None, якщо агрегати вимкнено (PLANTIO_ROLLUPS_ENABLED=false)."""
+    global _ROLLUPS
+    from app.core.config import settings
+
+    if not settings.rollups_enabled:
+        return None
+    if _ROLLUPS is None:
+        from app.models.diagnosis_rollup import DiagnosisRollup
+        from app.services.write_behind import get_diagnosis_writer
+
+        _ROLLUPS = RollupAggregator(
+            DiagnosisRollup, flush_interval_s=settings.rollups_flush_ms / 1000
+        )
+        # з відкладеним записом рахуємо лише те, що справді дійшло до Mongo
+        writer = get_diagnosis_writer()
+        if writer is not None:
+            writer.on_written(_ROLLUPS.record)
+    return _ROLLUPS
+
+
+def rollup_stats() -> dict[str, Any]:
+    rollups = get_rollups()
+    if rollups is None:
+        return {"enabled": False}
+    return {"enabled": True, **rollups.snapshot()}
+
+
+def backfill_pipeline(
+    granularity: str, since: datetime | None, until: datetime
+) -> list[dict[str, Any]]:
+    """
+    Перерахунок лічильників однієї гранулярності з diagnoses у Mongo:
+    $dateTrunc + $group, у Python повертаються лише готові ключі.
+    """
+    created: dict[str, datetime] = {"$lt": until}
+    if since is not None:
+        created["$gte"] = since
+    decided = "$result.decidedDiseaseId"
+    return [
+        {"$match": {"created_at": created}},
+        {
+            "$group": {
+                "_id": {
+                    "bucket": {
+                        "$dateTrunc": {
+                            "date": "$created_at",
+                            "unit": granularity,
+                            "timezone": "UTC",
+                        }
+                    },
+                    "plantId": {"$ifNull": ["$result.plantId", None]},
+                    "diseaseId": {"$ifNull": [decided, None]},
+                    "outcome": {
+                        "$cond": [
+                            {"$eq": [{"$ifNull": [decided, None]}, None]},
+                            LOW_CONFIDENCE,
+                            DECIDED,
+                        ]
+                    },
+                },
+                "count": {"$sum": 1},
+            }
+        },
+    ]
@@ -1,20 +1,285 @@
+from __future__ import annotations
+
+import asyncio
 import hashlib
+import json
 import os
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any, Protocol
 
 from app.core.config import settings
+from app.services.metrics import record_stage
+from app.services.tracing import span
+from app.utils.time import utcnow_tz
+
+
+def _default_file_mode() -> int:
+    # umask можна лише прочитати, змінивши його; робимо це раз при імпорті,
+    # поки потоків ще немає
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+# mkstemp створює файли з 0600; збережені фото мають бути доступні так само,
+# як створені звичайним open() (nginx, бекапи, скрипти під іншим користувачем)
+FILE_MODE = _default_file_mode()
+
+
+class UploadTooLarge(ValueError):
+    def __init__(self, size: int, limit: int):
+        super().__init__(f"upload exceeds {limit} bytes (got at least {size})")
+        self.size = size
+        self.limit = limit
+
+
+class EmptyUpload(ValueError):
+    pass
+
+
+class UploadSource(Protocol):
+    filename: str | None
+    size: int | None
+
+    async def read(self, size: int = -1) -> bytes: ...
+
+
+@dataclass(frozen=True)
+class StoredUpload:
+    path: Path
+    sha256: str
+    size: int
+
+
+def _write_chunk(f: IO[bytes], digest, chunk: bytes) -> None:
+    # hashlib відпускає GIL на великих буферах — хешування і запис
+    # іде в потоці паралельно з event loop
+    digest.update(chunk)
+    f.write(chunk)
+
+
+def shard_path(base_dir: str, sha256: str) -> str:
+    """Дворівневе розкладання за хешем: ab/cd/abcd…, до 65536 каталогів."""
+    return os.path.join(base_dir, sha256[:2], sha256[2:4], sha256)
+
+
+def _extension(filename: str | None) -> str:
+    return os.path.splitext(filename or "")[1].lower() or ".jpg"
+
+
+def write_metadata(path: str, meta: dict[str, Any]) -> None:
+    """
+    Sidecar {sha256}.json поруч із вмістом, записаний атомарно. Наявний
+    sidecar лишається як є (метадані першого завантаження); паралельні
+    збереження того самого вмісту пишуть кожне свій тимчасовий файл.
+    """
+    final = f"{path}.json"
+    if os.path.exists(final):
+        return
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".meta-", suffix=".part")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.chmod(tmp, FILE_MODE)
+        os.replace(tmp, final)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class Storage:
+    """
+    Інтерфейс сховища фото. save_upload кладе файл у локальну робочу
+    копію (з неї читає декодер), persist робить його довговічним — для
+    локального диска це вже зроблено, для об'єктного сховища це
+    фонове завантаження, яке не тримає відповідь. release — запит
+    більше не читає локальну копію (після інференсу); до нього сховище
+    не має права її прибрати.
+    """
 
+    backend = "base"
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def save_upload(
+        self,
+        upload: UploadSource,
+        max_bytes: int | None = None,
+        chunk_size: int | None = None,
+    ) -> StoredUpload:
+        raise NotImplementedError
+
+    def persist(self, stored: StoredUpload) -> None:
+        pass
+
+    def release(self, stored: StoredUpload) -> None:
+        pass
+
+    def stats(self) -> dict[str, Any]:
+        return {"backend": self.backend}
+
+
+class LocalFileStorage(Storage):
+    """
+    Сховище фото за вмістом: файл {sha256} без розширення у
+    base_dir/ab/cd/, тож ті самі байти з іншим розширенням не дублюються.
+    Розширення, розмір та ім'я першого завантаження — у sidecar
+    {sha256}.json. Старий плаский каталог переносить
+    `python -m scripts.migrate_uploads`.
+    """
+
+    backend = "local"
 
-class LocalFileStorage:
     def __init__(self, base_dir: str | None = None):
         self.base_dir = base_dir or settings.upload_dir
-        os.makedirs(self.base_dir, exist_ok=True)
+        self.tmp_dir = os.path.join(self.base_dir, ".tmp")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def path_for(self, sha256: str) -> Path:
+        return Path(shard_path(self.base_dir, sha256))
+
+    def metadata(self, sha256: str) -> dict[str, Any] | None:
+        try:
+            with open(f"{shard_path(self.base_dir, sha256)}.json", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _commit(
+        self,
+        tmp_path: str,
+        sha256: str,
+        size: int,
+        filename: str | None,
+        on_commit: Callable[[str], None] | None = None,
+    ) -> str:
+        """
+        Атомарно переносить тимчасовий файл на адресу за вмістом. Sidecar
+        пишеться першим: файл без метаданих не з'являється ніколи.
+        on_commit(sha256) викликається до перевірки наявного файлу — так
+        кеш над сховищем (S3Storage) встигає закріпити копію, поки її
+        ще можна дописати заново.
+        """
+        if on_commit is not None:
+            on_commit(sha256)
+        final_path = shard_path(self.base_dir, sha256)
+        if os.path.exists(final_path):
+            os.unlink(tmp_path)
+            return final_path
+
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        write_metadata(
+            final_path,
+            {
+                "sha256": sha256,
+                "size": size,
+                "ext": _extension(filename),
+                "filename": filename,
+                "created_at": utcnow_tz().isoformat(),
+            },
+        )
+        # той самий вміст з іншого запиту міг з'явитись між перевіркою
+        # і rename — os.replace просто перезапише ідентичні байти
+        os.chmod(tmp_path, FILE_MODE)
+        os.replace(tmp_path, final_path)
+        return final_path
 
     def save(self, filename: str, content: bytes) -> tuple[str, str]:
         sha256 = hashlib.sha256(content).hexdigest()
-        ext = os.path.splitext(filename)[1].lower() or ".jpg"
-        stored = f"{sha256}{ext}"
-        path = os.path.join(self.base_dir, stored)
+        path = shard_path(self.base_dir, sha256)
         if not os.path.exists(path):
-            with open(path, "wb") as f:
+            fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir, suffix=".part")
+            with os.fdopen(fd, "wb") as f:
                 f.write(content)
+            self._commit(tmp_path, sha256, len(content), filename)
         return path, sha256
+
+    async def save_upload(
+        self,
+        upload: UploadSource,
+        max_bytes: int | None = None,
+        chunk_size: int | None = None,
+        on_commit: Callable[[str], None] | None = None,
+    ) -> StoredUpload:
+        """
+        Потокове збереження UploadFile: читає шматками по chunk_size,
+        рахує SHA-256 інкрементально і пише в тимчасовий файл у потоці,
+        не блокуючи event loop; перевищення max_bytes — UploadTooLarge
+        одразу, не дочитуючи решту. Готовий файл атомарно
+        перейменовується в ab/cd/{sha256}.
+
+        Час читання тіла (upload_read) і хешування+запису (upload_write)
+        іде в окремі стадії метрик.
+        """
+        max_bytes = settings.upload_max_bytes if max_bytes is None else max_bytes
+        chunk_size = chunk_size or settings.upload_chunk_bytes
+
+        if upload.size is not None and upload.size > max_bytes:
+            raise UploadTooLarge(upload.size, max_bytes)
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir, suffix=".part")
+        digest = hashlib.sha256()
+        size = 0
+        read_s = write_s = 0.0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                while True:
+                    t0 = time.perf_counter()
+                    chunk = await upload.read(chunk_size)
+                    t1 = time.perf_counter()
+                    read_s += t1 - t0
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise UploadTooLarge(size, max_bytes)
+                    await asyncio.to_thread(_write_chunk, f, digest, chunk)
+                    write_s += time.perf_counter() - t1
+            if size == 0:
+                raise EmptyUpload("empty_file")
+
+            sha256 = digest.hexdigest()
+            t0 = time.perf_counter()
+            with span("storage.commit", size=size):
+                final_path = await asyncio.to_thread(
+                    self._commit, tmp_path, sha256, size, upload.filename, on_commit
+                )
+            write_s += time.perf_counter() - t0
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        finally:
+            record_stage("upload_read", read_s)
+
+        record_stage("upload_write", write_s)
+        return StoredUpload(Path(final_path), sha256, size)
+
+
+_STORAGE: Storage | None = None
+
+
+def get_storage() -> Storage:
+    """Сховище за PLANTIO_STORAGE_BACKEND: local або s3."""
+    global _STORAGE
+    if _STORAGE is None:
+        if settings.storage_backend == "s3":
+            from app.services.storage_s3 import S3Storage
+
+            _STORAGE = S3Storage.from_settings(settings)
+        else:
+            _STORAGE = LocalFileStorage()
+    return _STORAGE
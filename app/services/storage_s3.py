@@ -0,0 +1,357 @@
+"""
+S3-сумісне сховище фото (AWS S3, MinIO, Ceph RGW…).
+
+Файл спершу потоково пишеться в локальну робочу копію (декодер читає
+її одразу), а в бакет іде у фоні: persist() лише ставить sha256 у
+обмежену чергу, воркери завантажують з ретраями, тож затримка
+об'єктного сховища ніколи не стоїть на шляху відповіді /diagnose.
+Локальний каталог — одноразовий кеш: репліки API можна піднімати без
+спільного диска. Копії, вже підтверджені в бакеті, витісняються з диска
+за LRU, щойно їхній сумарний розмір перевищить local_cache_bytes; файли,
+що ще чекають завантаження або які ще має прочитати запит (закріплені між
+save_upload і release), не витісняються ніколи.
+
+Потрібен aiobotocore (requirements-storage-s3.txt). Клієнт один на
+процес, з пулом HTTP-з'єднань; великі файли — multipart upload.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import mimetypes
+import os
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from loguru import logger
+
+from app.services.storage import (
+    LocalFileStorage,
+    Storage,
+    StoredUpload,
+    UploadSource,
+)
+
+
+@dataclass
+class S3UploadStats:
+    queued: int = 0
+    uploaded: int = 0
+    multipart: int = 0
+    already_present: int = 0
+    retries: int = 0
+    failed: int = 0
+    dropped: int = 0
+    evicted: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return dict(self.__dict__)
+
+
+class S3Storage(Storage):
+    backend = "s3"
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        local: LocalFileStorage | None = None,
+        client_kwargs: dict[str, Any] | None = None,
+        max_pool_connections: int = 16,
+        multipart_threshold: int = 8 * 1024 * 1024,
+        part_size: int = 8 * 1024 * 1024,
+        queue_size: int = 1000,
+        concurrency: int = 4,
+        max_retries: int = 5,
+        backoff_s: float = 0.5,
+        local_cache_bytes: int = 1024 * 1024 * 1024,
+        client: Any | None = None,
+    ):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.local = local or LocalFileStorage()
+        self.client_kwargs = client_kwargs or {}
+        self.max_pool_connections = max_pool_connections
+        self.multipart_threshold = multipart_threshold
+        # S3: кожна частина, крім останньої, — щонайменше 5 MiB
+        self.part_size = max(part_size, 5 * 1024 * 1024)
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max(0, max_retries)
+        self.backoff_s = backoff_s
+        self.local_cache_bytes = max(0, local_cache_bytes)
+        self.upload_stats = S3UploadStats()
+        self._client = client
+        self._exit_stack: contextlib.AsyncExitStack | None = None
+        self._queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+        self._queued: set[str] = set()
+        self._workers: list[asyncio.Task] = []
+        # sha256 → розмір локальних копій, які вже є в бакеті (LRU: старі першими)
+        self._cached: OrderedDict[str, int] = OrderedDict()
+        self._cached_bytes = 0
+        # sha256 → кількість запитів, що ще читатимуть локальну копію; замок
+        # робить «перевірити закріплення + видалити» атомарним відносно
+        # закріплення в потоці збереження
+        self._pins: Counter[str] = Counter()
+        self._pin_lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings) -> S3Storage:
+        if not settings.s3_bucket:
+            raise RuntimeError("PLANTIO_S3_BUCKET is required for the s3 backend")
+        client_kwargs = {
+            k: v
+            for k, v in {
+                "endpoint_url": settings.s3_endpoint_url,
+                "region_name": settings.s3_region,
+                "aws_access_key_id": settings.s3_access_key_id,
+                "aws_secret_access_key": settings.s3_secret_access_key,
+            }.items()
+            if v
+        }
+        return cls(
+            settings.s3_bucket,
+            prefix=settings.s3_prefix,
+            client_kwargs=client_kwargs,
+            max_pool_connections=settings.s3_max_pool_connections,
+            multipart_threshold=settings.s3_multipart_threshold_bytes,
+            part_size=settings.s3_part_bytes,
+            queue_size=settings.s3_upload_queue_size,
+            concurrency=settings.s3_upload_concurrency,
+            max_retries=settings.s3_upload_retries,
+            local_cache_bytes=settings.s3_local_cache_bytes,
+        )
+
+    def key_for(self, sha256: str) -> str:
+        return f"{self.prefix}{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+    # ---------- життєвий цикл ----------
+
+    async def start(self) -> None:
+        if self._client is None:
+            from aiobotocore.config import AioConfig
+            from aiobotocore.session import get_session
+
+            self._exit_stack = contextlib.AsyncExitStack()
+            self._client = await self._exit_stack.enter_async_context(
+                get_session().create_client(
+                    "s3",
+                    config=AioConfig(max_pool_connections=self.max_pool_connections),
+                    **self.client_kwargs,
+                )
+            )
+        if not self._workers:
+            self._workers = [
+                asyncio.create_task(self._worker(), name=f"s3-upload-{i}")
+                for i in range(self.concurrency)
+            ]
+
+    async def stop(self, timeout_s: float = 30.0) -> None:
+        """Дочікується черги (не довше timeout_s), потім закриває клієнт."""
+        if self._workers:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout_s)
+            except TimeoutError:
+                logger.warning(
+                    "S3 upload queue not drained in {}s: {} files stay local only",
+                    timeout_s,
+                    self._queue.qsize(),
+                )
+            for task in self._workers:
+                task.cancel()
+            await asyncio.gather(*self._workers, return_exceptions=True)
+            self._workers = []
+        if self._exit_stack is not None:
+            await self._exit_stack.aclose()
+            self._exit_stack = None
+            self._client = None
+
+    # ---------- Storage ----------
+
+    async def save_upload(
+        self,
+        upload: UploadSource,
+        max_bytes: int | None = None,
+        chunk_size: int | None = None,
+    ) -> StoredUpload:
+        stored = await self.local.save_upload(upload, max_bytes, chunk_size, on_commit=self._pin)
+        if stored.sha256 in self._cached:
+            # повторне завантаження — копія знову свіжа для LRU
+            self._cached.move_to_end(stored.sha256)
+        return stored
+
+    def persist(self, stored: StoredUpload) -> None:
+        """Fire-and-forget: повна черга — файл лишається лише локально."""
+        if stored.sha256 in self._queued:
+            return
+        try:
+            self._queue.put_nowait(stored.sha256)
+        except asyncio.QueueFull:
+            self.upload_stats.dropped += 1
+            logger.error(
+                "S3 upload queue full ({}), {} not uploaded",
+                self._queue.maxsize,
+                stored.sha256,
+            )
+            return
+        self._queued.add(stored.sha256)
+        self.upload_stats.queued += 1
+
+    def release(self, stored: StoredUpload) -> None:
+        with self._pin_lock:
+            self._pins[stored.sha256] -= 1
+            if self._pins[stored.sha256] <= 0:
+                del self._pins[stored.sha256]
+
+    def _pin(self, sha256: str) -> None:
+        with self._pin_lock:
+            self._pins[sha256] += 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "bucket": self.bucket,
+            "queue_depth": self._queue.qsize(),
+            "local_cache_bytes": self._cached_bytes,
+            "pinned": len(self._pins),
+            **self.upload_stats.as_dict(),
+        }
+
+    # ---------- завантаження ----------
+
+    async def _worker(self) -> None:
+        while True:
+            sha256 = await self._queue.get()
+            try:
+                await self._upload_with_retries(sha256)
+            finally:
+                self._queued.discard(sha256)
+                self._queue.task_done()
+
+    async def _upload_with_retries(self, sha256: str) -> None:
+        attempt = 0
+        while True:
+            try:
+                await self._upload(sha256)
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:  # noqa: BLE001
+                if attempt >= self.max_retries:
+                    self.upload_stats.failed += 1
+                    logger.error("S3 upload of {} failed: {}", sha256, e)
+                    return
+                attempt += 1
+                self.upload_stats.retries += 1
+                await asyncio.sleep(self.backoff_s * 2 ** (attempt - 1))
+
+    async def _exists(self, key: str) -> bool:
+        try:
+            await self._client.head_object(Bucket=self.bucket, Key=key)
+        except Exception as e:  # noqa: BLE001
+            code = getattr(e, "response", {}).get("Error", {}).get("Code")
+            if code in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    async def _upload(self, sha256: str) -> None:
+        key = self.key_for(sha256)
+        if await self._exists(key):
+            self.upload_stats.already_present += 1
+            self._mark_uploaded(sha256)
+            return
+
+        path = str(self.local.path_for(sha256))
+        meta = self.local.metadata(sha256) or {}
+        ext = meta.get("ext") or ".jpg"
+        extra = {
+            "ContentType": mimetypes.guess_type(f"x{ext}")[0] or "application/octet-stream",
+            "Metadata": {"ext": ext},
+        }
+
+        size = os.path.getsize(path)
+        if size > self.multipart_threshold:
+            await self._multipart(key, path, extra)
+            self.upload_stats.multipart += 1
+        else:
+            body = await asyncio.to_thread(_read_file, path)
+            await self._client.put_object(Bucket=self.bucket, Key=key, Body=body, **extra)
+        self.upload_stats.uploaded += 1
+        self._mark_uploaded(sha256, size)
+
+    # ---------- локальний кеш ----------
+
+    def _mark_uploaded(self, sha256: str, size: int | None = None) -> None:
+        """Копія є в бакеті — тепер її можна витіснити з диска."""
+        if size is None:
+            try:
+                size = os.path.getsize(self.local.path_for(sha256))
+            except FileNotFoundError:
+                return
+        if sha256 in self._cached:
+            self._cached.move_to_end(sha256)
+        else:
+            self._cached[sha256] = size
+            self._cached_bytes += size
+        self._evict()
+
+    def _evict(self) -> None:
+        """
+        Видаляє найстаріші підтверджені копії, доки кеш не вкладеться в
+        ліміт. Закріплені копії (їх ще прочитає декодер) пропускаються і
+        лишаються в LRU.
+        """
+        for sha256 in list(self._cached):
+            if self._cached_bytes <= self.local_cache_bytes:
+                break
+            with self._pin_lock:
+                if self._pins.get(sha256):
+                    continue
+                size = self._cached.pop(sha256)
+                self._cached_bytes -= size
+                if sha256 in self._queued:
+                    continue  # той самий вміст знову в черзі — копія ще потрібна
+                path = str(self.local.path_for(sha256))
+                # вміст першим: файл без sidecar не лишається ніколи
+                for victim in (path, f"{path}.json"):
+                    with contextlib.suppress(FileNotFoundError):
+                        os.unlink(victim)
+            self.upload_stats.evicted += 1
+
+    async def _multipart(self, key: str, path: str, extra: dict[str, Any]) -> None:
+        created = await self._client.create_multipart_upload(Bucket=self.bucket, Key=key, **extra)
+        upload_id = created["UploadId"]
+        parts = []
+        try:
+            with open(path, "rb") as f:
+                number = 1
+                while chunk := await asyncio.to_thread(f.read, self.part_size):
+                    res = await self._client.upload_part(
+                        Bucket=self.bucket,
+                        Key=key,
+                        UploadId=upload_id,
+                        PartNumber=number,
+                        Body=chunk,
+                    )
+                    parts.append({"PartNumber": number, "ETag": res["ETag"]})
+                    number += 1
+            await self._client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except BaseException:
+            with contextlib.suppress(Exception):
+                await self._client.abort_multipart_upload(
+                    Bucket=self.bucket, Key=key, UploadId=upload_id
+                )
+            raise
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
@@ -0,0 +1,432 @@
+"""
+Легке трасування запитів без OpenTelemetry SDK.
+
+Кожен HTTP-запит отримує trace id — з вхідного W3C `traceparent` або
+новий — і кореневий span; `span()` відкриває вкладені span'и (стадії
+/diagnose з metrics.stage() роблять це самі). Поточний trace живе в
+contextvar: його бачать loguru-записи (extra.trace_id/span_id) і
+Diagnosis, куди пишуться trace id і час стадій.
+
+Span'и збираються для кожного запиту — це кілька time_ns() і dict на
+стадію. Семплінг вирішує лише, чи trace піде в JSONL-експортер: вхідний
+`traceparent` з прапорцем sampled — завжди, інші — з імовірністю
+PLANTIO_TRACING_SAMPLE_RATE. Рядок файлу — ExportTraceServiceRequest в
+OTLP/JSON, тож файл читає otlpjsonfile receiver OpenTelemetry Collector.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from loguru import logger
+
+_TRACEPARENT = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_INVALID_TRACE_ID = "0" * 32
+_INVALID_SPAN_ID = "0" * 16
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_ERROR = 2
+
+
+def parse_traceparent(value: str | None) -> tuple[str, str, bool] | None:
+    """(trace_id, parent_span_id, sampled) або None для відсутнього/битого."""
+    if not value:
+        return None
+    m = _TRACEPARENT.match(value.strip().lower())
+    if m is None:
+        return None
+    version, trace_id, span_id, flags = m.groups()
+    if version == "ff" or trace_id == _INVALID_TRACE_ID or span_id == _INVALID_SPAN_ID:
+        return None
+    return trace_id, span_id, bool(int(flags, 16) & 0x01)
+
+
+def format_traceparent(trace_id: str, span_id: str, sampled: bool) -> str:
+    return f"00-{trace_id}-{span_id}-{'01' if sampled else '00'}"
+
+
+def new_trace_id() -> str:
+    return os.urandom(16).hex()
+
+
+def new_span_id() -> str:
+    return os.urandom(8).hex()
+
+
+@dataclass(slots=True)
+class Span:
+    name: str
+    span_id: str
+    parent_id: str | None
+    start_ns: int
+    end_ns: int = 0
+    kind: int = SPAN_KIND_INTERNAL
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+class Trace:
+    def __init__(self, trace_id: str, parent_span_id: str | None = None, sampled: bool = False):
+        self.trace_id = trace_id
+        self.parent_span_id = parent_span_id
+        self.sampled = sampled
+        self.start_ns = time.time_ns()
+        self.spans: list[Span] = []
+
+    def summary(self) -> list[dict[str, Any]]:
+        """
+        Завершені span'и для Diagnosis: зсув від початку запиту і
+        тривалість у мс. Span запису самого Diagnosis сюди не потрапляє.
+        """
+        out = []
+        for s in sorted(self.spans, key=lambda s: s.start_ns):
+            item: dict[str, Any] = {
+                "name": s.name,
+                "start_ms": round((s.start_ns - self.start_ns) / 1e6, 3),
+                "duration_ms": round(s.duration_ms, 3),
+            }
+            if s.error:
+                item["error"] = s.error
+            out.append(item)
+        return out
+
+
+_TRACE: ContextVar[Trace | None] = ContextVar("plantio_trace", default=None)
+_SPAN: ContextVar[Span | None] = ContextVar("plantio_span", default=None)
+
+
+def current_trace() -> Trace | None:
+    return _TRACE.get()
+
+
+def current_trace_id() -> str | None:
+    trace = _TRACE.get()
+    return trace.trace_id if trace is not None else None
+
+
+def trace_summary() -> list[dict[str, Any]] | None:
+    trace = _TRACE.get()
+    return trace.summary() if trace is not None else None
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span | None]:
+    """Вкладений span поточного trace; поза запитом — нічого не робить."""
+    trace = _TRACE.get()
+    if trace is None:
+        yield None
+        return
+    with _open_span(trace, name, attributes) as s:
+        yield s
+
+
+@contextmanager
+def _open_span(trace: Trace, name: str, attributes: dict[str, Any]) -> Iterator[Span]:
+    """Span у заданому trace — як дочірній поточного span, якщо він є."""
+    parent = _SPAN.get()
+    s = Span(
+        name,
+        new_span_id(),
+        parent.span_id if parent is not None else trace.parent_span_id,
+        time.time_ns(),
+        attributes=attributes,
+    )
+    token = _SPAN.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.error = type(e).__name__
+        raise
+    finally:
+        s.end_ns = time.time_ns()
+        _SPAN.reset(token)
+        trace.spans.append(s)
+
+
+def should_sample(parent_sampled: bool | None, rate: float) -> bool:
+    """Рішення батьківського сервісу має пріоритет, інакше — rate."""
+    if parent_sampled is not None:
+        return parent_sampled
+    return rate > 0 and random.random() < rate
+
+
+# ---------- OTLP/JSON ----------
+
+
+def _any_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _attributes(attrs: dict[str, Any]) -> list[dict[str, Any]]:
+    return [{"key": k, "value": _any_value(v)} for k, v in attrs.items() if v is not None]
+
+
+def to_otlp(traces: list[Trace], service_name: str) -> dict[str, Any]:
+    """Пачка trace'ів як один ExportTraceServiceRequest (OTLP/JSON)."""
+    spans = []
+    for trace in traces:
+        for s in trace.spans:
+            item: dict[str, Any] = {
+                "traceId": trace.trace_id,
+                "spanId": s.span_id,
+                "name": s.name,
+                "kind": s.kind,
+                "startTimeUnixNano": str(s.start_ns),
+                "endTimeUnixNano": str(s.end_ns),
+                "attributes": _attributes(s.attributes),
+                "status": ({"code": STATUS_ERROR, "message": s.error} if s.error else {}),
+            }
+            if s.parent_id:
+                item["parentSpanId"] = s.parent_id
+            spans.append(item)
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": _attributes(
+                        {"service.name": service_name, "process.pid": os.getpid()}
+                    )
+                },
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+            }
+        ]
+    }
+
+
+@dataclass
+class ExporterStats:
+    exported: int = 0
+    dropped: int = 0
+    writes: int = 0
+    rotations: int = 0
+    last_error: str | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return dict(self.__dict__)
+
+
+class JsonlTraceExporter:
+    """
+    Семпловані trace'и накопичуються в пам'яті й раз на flush_interval_s
+    дописуються у файл одним рядком OTLP/JSON (запис — у потоці). Файл,
+    більший за max_bytes, перейменовується в *.1 (одна попередня копія).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        service_name: str,
+        flush_interval_s: float = 1.0,
+        max_pending: int = 10_000,
+        max_bytes: int = 64 * 1024 * 1024,
+    ):
+        self.path = path
+        self.service_name = service_name
+        self.flush_interval_s = float(flush_interval_s)
+        self.max_pending = max(1, int(max_pending))
+        self.max_bytes = int(max_bytes)
+        self.stats = ExporterStats()
+        self._pending: deque[Trace] = deque()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    def export(self, trace: Trace) -> None:
+        if len(self._pending) >= self.max_pending:
+            self.stats.dropped += 1
+            return
+        self._pending.append(trace)
+
+    def _write(self, line: str) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        try:
+            if os.path.getsize(self.path) > self.max_bytes:
+                os.replace(self.path, f"{self.path}.1")
+                self.stats.rotations += 1
+        except FileNotFoundError:
+            pass
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch = list(self._pending)
+            self._pending.clear()
+            line = json.dumps(
+                to_otlp(batch, self.service_name),
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+            try:
+                await asyncio.to_thread(self._write, line)
+            except OSError as e:
+                self.stats.dropped += len(batch)
+                self.stats.last_error = repr(e)
+                logger.warning("Trace export of {} traces failed: {}", len(batch), e)
+                return
+            self.stats.exported += len(batch)
+            self.stats.writes += 1
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval_s)
+            try:
+                await self.flush()
+            except Exception:  # noqa: BLE001
+                logger.exception("Trace export failed")
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="trace-exporter")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            async with self._flush_lock:
+                self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def snapshot(self) -> dict[str, Any]:
+        return {"pending": len(self._pending), **self.stats.as_dict()}
+
+
+_EXPORTER: JsonlTraceExporter | None = None
+
+
+def get_trace_exporter() -> JsonlTraceExporter | None:
+    """None, якщо трасування чи експорт вимкнено (порожній export_path)."""
+    global _EXPORTER
+    from app.core.config import settings
+
+    if not settings.tracing_enabled or not settings.tracing_export_path:
+        return None
+    if _EXPORTER is None:
+        _EXPORTER = JsonlTraceExporter(
+            settings.tracing_export_path,
+            service_name=settings.tracing_service_name,
+            flush_interval_s=settings.tracing_flush_ms / 1000,
+            max_bytes=settings.tracing_export_max_mb * 1024 * 1024,
+        )
+    return _EXPORTER
+
+
+def tracing_stats() -> dict[str, Any]:
+    from app.core.config import settings
+
+    exporter = get_trace_exporter()
+    return {
+        "enabled": settings.tracing_enabled,
+        "sample_rate": settings.tracing_sample_rate,
+        "exporter": exporter.snapshot() if exporter is not None else None,
+    }
+
+
+# ---------- loguru і ASGI ----------
+
+
+def _patch_record(record) -> None:
+    trace = _TRACE.get()
+    if trace is not None:
+        record["extra"]["trace_id"] = trace.trace_id
+        s = _SPAN.get()
+        if s is not None:
+            record["extra"]["span_id"] = s.span_id
+
+
+def install_log_context() -> None:
+    """Додає trace_id/span_id поточного запиту в extra кожного loguru-запису."""
+    logger.configure(patcher=_patch_record)
+
+
+class TracingMiddleware:
+    """
+    Відкриває trace і кореневий SERVER span на кожен HTTP-запит, віддає
+    його в заголовку `traceresponse` (W3C) і передає семплований trace
+    експортеру після відповіді.
+    """
+
+    def __init__(self, app, sample_rate: float = 0.0):
+        self.app = app
+        self.sample_rate = float(sample_rate)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        parent = None
+        for k, v in scope["headers"]:
+            if k == b"traceparent":
+                parent = parse_traceparent(v.decode("latin-1"))
+                break
+        if parent is not None:
+            trace = Trace(parent[0], parent[1], should_sample(parent[2], 0.0))
+        else:
+            trace = Trace(new_trace_id(), None, should_sample(None, self.sample_rate))
+
+        token = _TRACE.set(trace)
+        status = 500
+        try:
+            with _open_span(
+                trace, scope["method"], {"http.request.method": scope["method"]}
+            ) as root:
+                root.kind = SPAN_KIND_SERVER
+                header = format_traceparent(trace.trace_id, root.span_id, trace.sampled).encode()
+
+                async def send_wrapper(message):
+                    nonlocal status
+                    if message["type"] == "http.response.start":
+                        status = message["status"]
+                        message = {
+                            **message,
+                            "headers": [
+                                *message.get("headers", []),
+                                (b"traceresponse", header),
+                            ],
+                        }
+                    await send(message)
+
+                try:
+                    await self.app(scope, receive, send_wrapper)
+                finally:
+                    from app.services.metrics import route_label
+
+                    route = route_label(scope)
+                    root.name = f"{scope['method']} {route}"
+                    root.attributes["http.route"] = route
+                    root.attributes["http.response.status_code"] = status
+                    if status >= 500:
+                        root.error = root.error or f"HTTP {status}"
+        finally:
+            _TRACE.reset(token)
+            if trace.sampled:
+                exporter = get_trace_exporter()
+                if exporter is not None:
+                    exporter.export(trace)
@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from beanie import Document, PydanticObjectId
+from loguru import logger
+from pymongo.errors import BulkWriteError, ConnectionFailure, PyMongoError
+
+DUPLICATE_KEY = 11000
+
+
+class WriteBufferFull(RuntimeError):
+    """Буфер заповнений, а Mongo не встигає (або недоступна)."""
+
+
+def _is_transient(e: Exception) -> bool:
+    if isinstance(e, ConnectionFailure):
+        return True
+    return isinstance(e, PyMongoError) and e.has_error_label("RetryableWriteError")
+
+
+@dataclass
+class WriteBehindStats:
+    enqueued: int = 0
+    written: int = 0
+    dropped: int = 0
+    batches: int = 0
+    retries: int = 0
+    max_depth: int = 0
+    write_ms_total: float = 0.0
+    write_ms_max: float = 0.0
+    delay_ms_max: float = 0.0
+    last_error: str | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "retries": self.retries,
+            "max_depth": self.max_depth,
+            "avg_batch_size": (round(self.written / self.batches, 2) if self.batches else 0.0),
+            "avg_write_ms": (round(self.write_ms_total / self.batches, 3) if self.batches else 0.0),
+            "max_write_ms": round(self.write_ms_max, 3),
+            # від submit до підтвердженого запису, найгірший документ
+            "max_delay_ms": round(self.delay_ms_max, 3),
+            "last_error": self.last_error,
+        }
+
+
+class WriteBehindBuffer:
+    """
+    Відкладений запис документів: submit() лише кладе документ у чергу
+    (id призначається одразу, тож його можна віддати клієнту), а фонова
+    задача пише накопичене одним insert_many — коли набралось batch_size
+    документів або минуло flush_interval_s. Тимчасові помилки Mongo
+    повторюються з експоненційною затримкою; документи, які так і не
+    вдалося записати, рахуються як dropped і логуються.
+    """
+
+    def __init__(
+        self,
+        model: type[Document],
+        batch_size: int,
+        flush_interval_s: float,
+        max_pending: int,
+        max_retries: int = 5,
+        backoff_s: float = 0.1,
+    ):
+        self.model = model
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval_s = float(flush_interval_s)
+        self.max_pending = max(self.batch_size, int(max_pending))
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_s = float(backoff_s)
+        self.stats = WriteBehindStats()
+        self._pending: deque[tuple[Document, float]] = deque()
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._listeners: list[Callable[[list[Document]], Any]] = []
+
+    def on_written(self, callback: Callable[[list[Document]], Any]) -> None:
+        """callback(docs) — після кожної пачки, з документами, що записані."""
+        self._listeners.append(callback)
+
+    def depth(self) -> int:
+        return len(self._pending)
+
+    async def submit(self, docs: Sequence[Document]) -> None:
+        """Ставить документи в чергу; id тих, у кого його ще немає, — новий."""
+        if len(self._pending) + len(docs) > self.max_pending:
+            # власна черга переповнена — пишемо синхронно, поки є місце
+            await self.flush()
+            if len(self._pending) + len(docs) > self.max_pending:
+                raise WriteBufferFull(
+                    f"{len(self._pending)} documents pending, max {self.max_pending}"
+                )
+
+        now = time.perf_counter()
+        for doc in docs:
+            if doc.id is None:
+                doc.id = PydanticObjectId()
+            self._pending.append((doc, now))
+        self.stats.enqueued += len(docs)
+        self.stats.max_depth = max(self.stats.max_depth, len(self._pending))
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self) -> None:
+        """Записує все, що в черзі на момент виклику."""
+        async with self._flush_lock:
+            while self._pending:
+                n = min(self.batch_size, len(self._pending))
+                batch = [self._pending.popleft() for _ in range(n)]
+                await self._write(batch)
+
+    async def _write(self, batch: list[tuple[Document, float]]) -> None:
+        attempt = 0
+        while True:
+            t0 = time.perf_counter()
+            try:
+                await self.model.insert_many([doc for doc, _ in batch], ordered=False)
+                failed: list[tuple[Document, float]] = []
+            except BulkWriteError as e:
+                # ordered=False: решта пачки записана; повтор після таймауту
+                # дає duplicate key для вже записаних — це теж успіх
+                errors = e.details.get("writeErrors", [])
+                bad = {err["index"] for err in errors if err.get("code") != DUPLICATE_KEY}
+                failed = [item for i, item in enumerate(batch) if i in bad]
+                if failed:
+                    self._drop(failed, errors[0].get("errmsg", repr(e)))
+            except Exception as e:  # noqa: BLE001
+                if _is_transient(e) and attempt < self.max_retries:
+                    attempt += 1
+                    self.stats.retries += 1
+                    self.stats.last_error = repr(e)
+                    delay = self.backoff_s * 2 ** (attempt - 1)
+                    logger.warning(
+                        "Write-behind insert of {} {} failed ({}), retry {} in {:.2f}s",
+                        len(batch),
+                        self.model.__name__,
+                        e,
+                        attempt,
+                        delay,
+                    )
+                    await asyncio.sleep(delay)
+                    continue
+                self._drop(batch, repr(e))
+                return
+
+            done = time.perf_counter()
+            write_ms = (done - t0) * 1000
+            written = len(batch) - len(failed)
+            self.stats.batches += 1
+            self.stats.written += written
+            self.stats.write_ms_total += write_ms
+            self.stats.write_ms_max = max(self.stats.write_ms_max, write_ms)
+            oldest = min(enqueued_at for _, enqueued_at in batch)
+            self.stats.delay_ms_max = max(self.stats.delay_ms_max, (done - oldest) * 1000)
+            self._notify([doc for doc, _ in batch], failed)
+            return
+
+    def _notify(self, docs: list[Document], failed: list[tuple[Document, float]]) -> None:
+        if not self._listeners:
+            return
+        if failed:
+            failed_ids = {id(doc) for doc, _ in failed}
+            docs = [doc for doc in docs if id(doc) not in failed_ids]
+        for callback in self._listeners:
+            try:
+                callback(docs)
+            except Exception:  # noqa: BLE001
+                logger.exception("Write-behind listener failed")
+
+    def _drop(self, items: list[tuple[Document, float]], reason: str) -> None:
+        self.stats.dropped += len(items)
+        self.stats.last_error = reason
+        logger.error(
+            "Write-behind dropped {} {} documents ({}): {}",
+            len(items),
+            self.model.__name__,
+            reason,
+            [str(doc.id) for doc, _ in items],
+        )
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval_s)
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:  # noqa: BLE001
+                logger.exception("Write-behind flush failed")
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(
+                self._run(), name=f"write-behind-{self.model.__name__}"
+            )
+
+    async def stop(self) -> None:
+        """Зупиняє фонову задачу і дописує все, що лишилось у черзі."""
+        if self._task is not None:
+            # під замком фонова задача не посеред запису: вийняті з черги,
+            # але не записані документи не загубляться при cancel
+            async with self._flush_lock:
+                self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        pending = len(self._pending)
+        await self.flush()
+        if pending:
+            logger.info("Write-behind drained {} {} documents", pending, self.model.__name__)
+
+    def snapshot(self) -> dict[str, Any]:
+        oldest = self._pending[0][1] if self._pending else None
+        return {
+            "depth": len(self._pending),
+            "oldest_pending_ms": (
+                round((time.perf_counter() - oldest) * 1000, 3) if oldest else 0.0
+            ),
+            **self.stats.as_dict(),
+        }
+
+
+_DIAGNOSIS_WRITER: WriteBehindBuffer | None = None
+
+
+def get_diagnosis_writer() -> WriteBehindBuffer | None:
+    """None, якщо відкладений запис вимкнено (PLANTIO_DIAGNOSIS_WRITE_BEHIND)."""
+    global _DIAGNOSIS_WRITER
+    from app.core.config import settings
+
+    if not settings.diagnosis_write_behind:
+        return None
+    if _DIAGNOSIS_WRITER is None:
+        from app.models.diagnosis import Diagnosis
+
+        _DIAGNOSIS_WRITER = WriteBehindBuffer(
+            Diagnosis,
+            batch_size=settings.diagnosis_write_batch_size,
+            flush_interval_s=settings.diagnosis_write_flush_ms / 1000,
+            max_pending=settings.diagnosis_write_max_pending,
+            max_retries=settings.diagnosis_write_retries,
+        )
+    return _DIAGNOSIS_WRITER
+
+
+def write_behind_stats() -> dict[str, Any]:
+    writer = get_diagnosis_writer()
+    if writer is None:
+        return {"enabled": False}
+    return {"enabled": True, **writer.snapshot()}
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+_FIELDS = {
+    "Rss": "rss_mb",
+    "Pss": "pss_mb",
+    "Shared_Clean": "shared_mb",
+    "Shared_Dirty": "shared_mb",
+    "Private_Clean": "private_mb",
+    "Private_Dirty": "private_mb",
+}
+
+
+def process_memory(pid: int | str = "self") -> dict[str, float] | None:
+    """
+    Пам'ять процесу в МБ з /proc/<pid>/smaps_rollup (Linux).
+
+    RSS рахує спільні сторінки (ваги моделі після fork) у кожному процесі
+    повністю, PSS — ділить їх між процесами, тож сума PSS воркерів і є
+    реальним споживанням. None, якщо /proc недоступний.
+    """
+    try:
+        text = Path(f"/proc/{pid}/smaps_rollup").read_text()
+    except OSError:
+        return None
+
+    out = {"rss_mb": 0.0, "pss_mb": 0.0, "shared_mb": 0.0, "private_mb": 0.0}
+    for line in text.splitlines():
+        name, _, rest = line.partition(":")
+        key = _FIELDS.get(name)
+        if key is not None:
+            out[key] += int(rest.split()[0]) / 1024  # kB → MB
+    return {k: round(v, 1) for k, v in out.items()}
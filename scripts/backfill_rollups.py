@@ -0,0 +1,142 @@
+"""
+Перераховує diagnosis_rollups з історії diagnoses.
+
+Агрегація ($dateTrunc + $group) виконується в Mongo; лічильники
+діапазону перезаписуються upsert'ами з $set, а ключі, яких в історії
+більше немає, видаляються вже після запису — дашборди не бачать
+порожнього вікна. Поточна (незакрита) година/доба не чіпається: її
+веде інкрементальний лічильник застосунку.
+
+    python -m scripts.backfill_rollups
+    python -m scripts.backfill_rollups --since 2026-01-01 --granularity day
+    python -m scripts.backfill_rollups --dry-run
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import inspect
+import sys
+import time
+from collections import Counter
+from datetime import UTC, datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from pymongo import UpdateOne  # noqa: E402
+
+from app.services.rollups import (  # noqa: E402
+    GRANULARITIES,
+    backfill_pipeline,
+    bucket_start,
+    key_filter,
+)
+
+WRITE_CHUNK = 1000
+
+
+async def backfill(
+    diagnoses,
+    rollups,
+    since: datetime | None,
+    until: datetime,
+    granularities: tuple[str, ...] = GRANULARITIES,
+    dry_run: bool = False,
+) -> Counter:
+    counts: Counter = Counter()
+    started = datetime.now(UTC)
+
+    for g in granularities:
+        g_until = bucket_start(until, g)
+        g_since = bucket_start(since, g) if since is not None else None
+
+        cursor = diagnoses.aggregate(backfill_pipeline(g, g_since, g_until), allowDiskUse=True)
+        if inspect.isawaitable(cursor):
+            cursor = await cursor
+
+        ops: list[UpdateOne] = []
+        async for row in cursor:
+            key = row["_id"]
+            bucket = key["bucket"]
+            bucket = bucket.replace(tzinfo=UTC) if bucket.tzinfo is None else bucket
+            flt = key_filter((g, bucket, key["plantId"], key["diseaseId"], key["outcome"]))
+            ops.append(
+                UpdateOne(
+                    flt,
+                    {"$set": {"total": int(row["count"]), "updated_at": started}},
+                    upsert=True,
+                )
+            )
+            counts[f"{g}_keys"] += 1
+            counts[f"{g}_diagnoses"] += int(row["count"])
+            if len(ops) >= WRITE_CHUNK and not dry_run:
+                await rollups.bulk_write(ops, ordered=False)
+                ops = []
+        if ops and not dry_run:
+            await rollups.bulk_write(ops, ordered=False)
+
+        if dry_run:
+            continue
+        bucket_range: dict[str, datetime] = {"$lt": g_until}
+        if g_since is not None:
+            bucket_range["$gte"] = g_since
+        stale = await rollups.delete_many(
+            {"granularity": g, "bucket": bucket_range, "updated_at": {"$lt": started}}
+        )
+        counts[f"{g}_stale_removed"] += stale.deleted_count
+
+    return counts
+
+
+def _parse_dt(value: str) -> datetime:
+    dt = datetime.fromisoformat(value)
+    return dt.replace(tzinfo=UTC) if dt.tzinfo is None else dt
+
+
+async def _main(args: argparse.Namespace) -> None:
+    from app.db import init_db as db
+    from app.models.diagnosis import Diagnosis
+    from app.models.diagnosis_rollup import DiagnosisRollup
+
+    await db.init_db()
+    granularities = GRANULARITIES if args.granularity == "all" else (args.granularity,)
+
+    t0 = time.perf_counter()
+    try:
+        counts = await backfill(
+            Diagnosis.get_pymongo_collection(),
+            DiagnosisRollup.get_pymongo_collection(),
+            args.since,
+            args.until or datetime.now(UTC),
+            granularities,
+            args.dry_run,
+        )
+    finally:
+        db._client.close()
+    prefix = "[dry-run] " if args.dry_run else ""
+    for g in granularities:
+        print(
+            f"{prefix}{g}: {counts[f'{g}_diagnoses']} diagnoses → "
+            f"{counts[f'{g}_keys']} counters, "
+            f"{counts[f'{g}_stale_removed']} stale removed"
+        )
+    print(f"{prefix}done in {time.perf_counter() - t0:.1f}s")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Rebuild diagnosis rollups")
+    parser.add_argument("--since", type=_parse_dt, help="ISO 8601; без — вся історія")
+    parser.add_argument(
+        "--until", type=_parse_dt, help="ISO 8601; без — початок поточної години/доби"
+    )
+    parser.add_argument("--granularity", choices=(*GRANULARITIES, "all"), default="all")
+    parser.add_argument("--dry-run", action="store_true")
+    asyncio.run(_main(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
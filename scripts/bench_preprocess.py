@@ -0,0 +1,180 @@
+"""
+Мікробенчмарк декодування + препроцесингу зображення для моделі.
+
+Порівнює старий шлях (`transforms.Compose` на кожен виклик, повне
+декодування JPEG, Resize → ToTensor) з `ImagePreprocessor`
+(JPEG draft / DCT scaling, один прохід uint8 → float32 у буфер).
+
+Кожен варіант запускається в окремому процесі, щоб peak RSS не змішувався.
+
+    python -m scripts.bench_preprocess
+    python -m scripts.bench_preprocess storage/samples/grape_black_rot_1.jpg \
+        --upscale 4032x3024 --repeat 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import multiprocessing
+import resource
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from PIL import Image
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+DEFAULT_SAMPLE = ROOT / "storage" / "samples" / "grape_black_rot_1.jpg"
+
+
+def _legacy_preprocess(image_bytes: bytes):
+    import torchvision.transforms as transforms
+
+    img = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+    transform = transforms.Compose(
+        [
+            transforms.Resize((224, 224)),
+            transforms.ToTensor(),
+        ]
+    )
+    return transform(img).unsqueeze(0)
+
+
+def _fast_preprocess_factory():
+    import torch
+
+    from app.services.preprocess import ImagePreprocessor
+
+    pre = ImagePreprocessor()
+
+    def run(image_bytes: bytes):
+        buf = pre.batch_buffer(1)
+        pre.to_array(image_bytes, out=buf[0])
+        return torch.from_numpy(buf)
+
+    return run
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss: КБ на Linux, байти на macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _worker(variant: str, images: list[bytes], repeat: int, queue) -> None:
+    import torch  # noqa: F401  — щоб імпорт torch не потрапив у заміри
+
+    fn = _legacy_preprocess if variant == "legacy" else _fast_preprocess_factory()
+    fn(images[0])  # прогрів
+
+    rss_before = _peak_rss_mb()
+    timings: list[float] = []
+    for _ in range(repeat):
+        for image_bytes in images:
+            t0 = time.perf_counter()
+            fn(image_bytes)
+            timings.append((time.perf_counter() - t0) * 1000)
+
+    timings.sort()
+    queue.put(
+        {
+            "variant": variant,
+            "n": len(timings),
+            "mean_ms": round(statistics.fmean(timings), 3),
+            "p50_ms": round(timings[len(timings) // 2], 3),
+            "p99_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.99))], 3),
+            "peak_rss_mb": round(_peak_rss_mb(), 1),
+            "peak_rss_growth_mb": round(_peak_rss_mb() - rss_before, 1),
+        }
+    )
+
+
+def _run_isolated(variant: str, images: list[bytes], repeat: int) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_worker, args=(variant, images, repeat, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def _load_images(paths: list[Path], upscale: tuple[int, int] | None) -> list[bytes]:
+    out: list[bytes] = []
+    for p in paths:
+        data = p.read_bytes()
+        if upscale:
+            # імітуємо фото з телефона: той самий кадр у високій роздільності
+            img = Image.open(io.BytesIO(data)).convert("RGB").resize(upscale)
+            buf = io.BytesIO()
+            img.save(buf, format="JPEG", quality=92)
+            data = buf.getvalue()
+        out.append(data)
+    return out
+
+
+def _parity(images: list[bytes]) -> dict:
+    fast = _fast_preprocess_factory()
+    max_abs = 0.0
+    mean_abs = 0.0
+    for image_bytes in images:
+        diff = (_legacy_preprocess(image_bytes) - fast(image_bytes)).abs()
+        max_abs = max(max_abs, float(diff.max()))
+        mean_abs += float(diff.mean()) / len(images)
+    return {"max_abs_diff": round(max_abs, 5), "mean_abs_diff": round(mean_abs, 6)}
+
+
+def _parse_size(value: str) -> tuple[int, int]:
+    w, h = value.lower().split("x", 1)
+    return int(w), int(h)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("images", nargs="*", type=Path, default=[DEFAULT_SAMPLE])
+    parser.add_argument(
+        "--upscale",
+        type=_parse_size,
+        default=(4032, 3024),
+        help="перекодувати зразки в WxH JPEG (типовий 12 MP кадр); 0x0 — як є",
+    )
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--json", action="store_true", help="вивести сирий JSON")
+    args = parser.parse_args()
+
+    upscale = args.upscale if all(args.upscale) else None
+    images = _load_images(args.images, upscale)
+    sizes = {Image.open(io.BytesIO(b)).size for b in images}
+
+    results = [_run_isolated(v, images, args.repeat) for v in ("legacy", "fast")]
+    report = {
+        "images": [str(p) for p in args.images],
+        "decoded_sizes": sorted(sizes),
+        "results": results,
+        "parity": _parity(images),
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"images: {len(images)} x {args.repeat}, source sizes: {sorted(sizes)}")
+    print(f"{'variant':<8} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9} {'peak RSS MB':>12}")
+    for r in results:
+        print(
+            f"{r['variant']:<8} {r['mean_ms']:>9} {r['p50_ms']:>9} "
+            f"{r['p99_ms']:>9} {r['peak_rss_mb']:>12}"
+        )
+    legacy, fast = results
+    print(f"speedup: x{legacy['mean_ms'] / fast['mean_ms']:.2f}")
+    print(f"parity vs legacy: {report['parity']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Мікробенчмарк серіалізації відповідей API.
+
+Для типових тіл /diagnose, /diagnose/batch, /plants і /diseases порівнює
+старий шлях (jsonable_encoder → json.dumps, як JSONResponse без
+response_model) з типізованим (валідація моделі відповіді + dump_json
+ядром pydantic — те, що FastAPI робить для ендпоінтів з response_model),
+а також orjson, якщо він встановлений. Окремо — розмір і час gzip/br.
+
+    python -m scripts.bench_serialization
+    python -m scripts.bench_serialization --items 100 --repeat 500 --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from app.api.v1.schemas import (  # noqa: E402
+    BatchDiagnoseResponse,
+    DiagnoseResponse,
+    DiseaseItem,
+    DiseasesPage,
+    PlantsPage,
+)
+from app.core.compression import available_encodings, compress  # noqa: E402
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - залежить від оточення
+    orjson = None
+
+SENTENCE = (
+    "Листя вкривається бурими плямами з жовтою облямівкою, що поступово "
+    "зливаються; уражені тканини засихають і обсипаються"
+)
+
+
+def _candidate(i: int) -> dict[str, Any]:
+    return {
+        "plant_id": f"65f0c0ffee{i:014d}",
+        "plant_name": "Виноград",
+        "disease_id": f"Grape___Black_rot_{i}",
+        "disease_name": "Чорна гниль",
+        "confidence": 0.9 / (i + 1),
+    }
+
+
+def _disease(i: int) -> dict[str, Any]:
+    return {
+        "plantId": f"65f0c0ffee{i:014d}",
+        "plantName": f"Рослина {i}",
+        "diseaseName": f"Хвороба {i}",
+        "description": SENTENCE * 3,
+        "symptoms": [SENTENCE] * 8,
+        "prevention": [SENTENCE] * 6,
+        "treatment": [SENTENCE] * 6,
+        "riskLevel": "high",
+        "images": [f"https://cdn.example.com/diseases/{i}/{k}.jpg" for k in range(4)],
+    }
+
+
+def payloads(items: int) -> dict[str, tuple[Any, Any, bool]]:
+    """Ендпоінт → (тіло, модель відповіді, response_model_exclude_unset)."""
+    batch_items = [
+        {
+            "index": i,
+            "filename": f"leaf_{i}.jpg",
+            "status": "ok",
+            "diagnosisId": f"66aa{i:020d}",
+            "decidedDiseaseId": "Grape___Black_rot",
+            "candidates": [_candidate(k) for k in range(3)],
+        }
+        for i in range(min(items, 32))
+    ]
+    return {
+        "diagnose": (
+            {
+                "diagnosisId": "66aa00000000000000000000",
+                "decidedDiseaseId": "Grape___Black_rot",
+                "candidates": [_candidate(k) for k in range(3)],
+                "inferenceMs": 42,
+            },
+            DiagnoseResponse,
+            False,
+        ),
+        "diagnose_batch": (
+            {"items": batch_items, "count": len(batch_items), "inferenceMs": 120},
+            BatchDiagnoseResponse,
+            True,
+        ),
+        "plants": (
+            {
+                "items": [
+                    {
+                        "id": f"65f0c0ffee{i:014d}",
+                        "plantName": f"Рослина {i}",
+                        "scientificName": f"Planta {i}",
+                        "description": SENTENCE * 2,
+                        "imageUrl": f"https://cdn.example.com/plants/{i}.jpg",
+                    }
+                    for i in range(items)
+                ],
+                "page": 0,
+                "size": items,
+                "count": 10 * items,
+                "next_cursor": "WyLQoNC-0YHQu9C40L3QsCIsIjY1ZjAiXQ",
+            },
+            PlantsPage,
+            False,
+        ),
+        "diseases": (
+            {
+                "items": [_disease(i) for i in range(items)],
+                "page": 0,
+                "size": items,
+                "count": 10 * items,
+            },
+            DiseasesPage,
+            False,
+        ),
+        "disease": (_disease(0), DiseaseItem, False),
+    }
+
+
+def _legacy(payload: Any) -> bytes:
+    # те саме, що JSONResponse.render після serialize_response без моделі
+    return json.dumps(
+        jsonable_encoder(payload),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def _typed_factory(model, exclude_unset: bool) -> Callable[[Any], bytes]:
+    adapter = TypeAdapter(model)
+
+    def run(payload: Any) -> bytes:
+        return adapter.dump_json(adapter.validate_python(payload), exclude_unset=exclude_unset)
+
+    return run
+
+
+def _time(fn: Callable[[Any], bytes], payload: Any, repeat: int) -> dict[str, Any]:
+    fn(payload)  # прогрів
+    timings: list[float] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(payload)
+        timings.append((time.perf_counter() - t0) * 1000)
+    timings.sort()
+    return {
+        "mean_ms": round(statistics.fmean(timings), 4),
+        "p50_ms": round(timings[len(timings) // 2], 4),
+        "p99_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.99))], 4),
+    }
+
+
+def _compression(body: bytes, repeat: int) -> dict[str, Any]:
+    out: dict[str, Any] = {}
+    for encoding in available_encodings():
+        stats = _time(lambda b, e=encoding: compress(b, e), body, max(1, repeat // 10))
+        out[encoding] = {
+            "bytes": len(compress(body, encoding)),
+            "mean_ms": stats["mean_ms"],
+        }
+    return out
+
+
+def run(items: int, repeat: int) -> list[dict[str, Any]]:
+    report = []
+    for name, (payload, model, exclude_unset) in payloads(items).items():
+        variants: dict[str, Callable[[Any], bytes]] = {
+            "legacy": _legacy,
+            "typed": _typed_factory(model, exclude_unset),
+        }
+        if orjson is not None:
+            variants["orjson"] = orjson.dumps
+
+        legacy_body = _legacy(payload)
+        typed_body = variants["typed"](payload)
+        if json.loads(legacy_body) != json.loads(typed_body):
+            raise AssertionError(f"{name}: typed body differs from legacy")
+
+        report.append(
+            {
+                "endpoint": name,
+                "bytes": len(typed_body),
+                "results": {v: _time(fn, payload, repeat) for v, fn in variants.items()},
+                "compression": _compression(typed_body, repeat),
+            }
+        )
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--items", type=int, default=100, help="елементів на сторінці")
+    parser.add_argument("--repeat", type=int, default=300)
+    parser.add_argument("--json", action="store_true", help="вивести сирий JSON")
+    args = parser.parse_args()
+
+    report = run(args.items, args.repeat)
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return
+
+    print(f"items per page: {args.items}, repeat: {args.repeat}")
+    print(
+        f"{'endpoint':<15} {'bytes':>8} {'variant':<8} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9}"
+    )
+    for r in report:
+        for variant, t in r["results"].items():
+            print(
+                f"{r['endpoint']:<15} {r['bytes']:>8} {variant:<8} "
+                f"{t['mean_ms']:>9} {t['p50_ms']:>9} {t['p99_ms']:>9}"
+            )
+        legacy, typed = r["results"]["legacy"], r["results"]["typed"]
+        compressed = ", ".join(
+            f"{enc} {c['bytes']} B / {c['mean_ms']} ms" for enc, c in r["compression"].items()
+        )
+        print(f"{'':<15} speedup typed: x{legacy['mean_ms'] / typed['mean_ms']:.2f}; {compressed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Видаляє індекси, які застосунок більше не оголошує.
+
+Beanie лише створює індекси з моделей і не прибирає старі, тож після
+оновлення в наявних базах лишаються індекси-попередники: вони займають
+пам'ять і сповільнюють кожен insert, хоча запити вже йдуть по нових
+складених індексах. Скрипт ідемпотентний: відсутній індекс пропускається.
+
+    python -m scripts.drop_legacy_indexes --dry-run
+    python -m scripts.drop_legacy_indexes
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# колекція → імена індексів, замінених складеними
+LEGACY_INDEXES: dict[str, tuple[str, ...]] = {
+    # "status" і "-created_at" — префікси status_created_at_id / created_at_id
+    "diagnoses": ("status_1", "created_at_-1"),
+    # /diseases фільтрує і сортує після $unwind — ці індекси не використовувались
+    "plants": ("diseases.diseaseName_1", "diseases.riskLevel_1"),
+    # TTL тепер по expires_at (термін у документі), а не в опціях індексу
+    "prediction_cache": ("created_at_1",),
+}
+
+
+async def drop_legacy_indexes(
+    db, legacy: dict[str, tuple[str, ...]] = LEGACY_INDEXES, dry_run: bool = False
+) -> list[tuple[str, str]]:
+    """(колекція, індекс) кожного видаленого — з dry_run лише знайденого."""
+    dropped: list[tuple[str, str]] = []
+    for collection_name, names in legacy.items():
+        collection = db[collection_name]
+        existing = await collection.index_information()
+        for name in names:
+            if name not in existing:
+                continue
+            if not dry_run:
+                await collection.drop_index(name)
+            dropped.append((collection_name, name))
+    return dropped
+
+
+async def _main(args: argparse.Namespace) -> None:
+    from app.core.config import settings
+    from app.db import init_db as db
+
+    # init_db спершу створює нові індекси — старі зникають лише після них
+    await db.init_db()
+    try:
+        database = db._client.get_database(settings.database_name)
+        dropped = await drop_legacy_indexes(database, dry_run=args.dry_run)
+    finally:
+        db._client.close()
+    prefix = "[dry-run] " if args.dry_run else ""
+    for collection_name, name in dropped:
+        print(f"{prefix}{collection_name}: dropped {name}")
+    print(f"{prefix}{len(dropped)} legacy indexes")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Drop superseded Mongo indexes")
+    parser.add_argument("--dry-run", action="store_true")
+    asyncio.run(_main(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
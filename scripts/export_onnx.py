@@ -0,0 +1,129 @@
+"""
+Експорт поточної моделі (TorchScript / pickled nn.Module) в ONNX
+з динамічною віссю батча і перевіркою числового паритету з PyTorch.
+
+Потрібні torch + onnx + onnxscript + onnxruntime (лише для експорту;
+для сервінгу достатньо requirements-inference-onnx.txt).
+
+    python -m scripts.export_onnx
+    python -m scripts.export_onnx --model app/models/plantio/model.pth \
+        --out app/models/plantio/model.onnx --atol 1e-4
+
+Після експорту: PLANTIO_MODEL_PATH=./app/models/plantio/model.onnx
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+SAMPLES_DIR = ROOT / "storage" / "samples"
+
+
+def _export(model, out_path: Path, opset: int) -> None:
+    import torch
+
+    dummy = torch.zeros(1, 3, 224, 224)
+    kwargs = {
+        "input_names": ["input"],
+        "output_names": ["logits"],
+        "dynamic_axes": {"input": {0: "batch"}, "logits": {0: "batch"}},
+        "opset_version": opset,
+    }
+    if isinstance(model, torch.jit.ScriptModule):
+        # TorchScript-модулі вміє лише класичний (не dynamo) експортер
+        kwargs["dynamo"] = False
+    else:
+        # один файл: ваги всередині .onnx, а не в сусідньому .onnx.data
+        kwargs["external_data"] = False
+    torch.onnx.export(model, (dummy,), str(out_path), **kwargs)
+
+
+def _parity_inputs(batch: int) -> np.ndarray:
+    from app.services.preprocess import ImagePreprocessor
+
+    pre = ImagePreprocessor()
+    samples = sorted(SAMPLES_DIR.glob("*.jpg"))
+    buf = pre.batch_buffer(batch)
+    rng = np.random.default_rng(0)
+    for i in range(batch):
+        if i < len(samples):
+            pre.to_array(samples[i].read_bytes(), out=buf[i])
+        else:
+            buf[i] = rng.random((3, 224, 224), dtype=np.float32)
+    return buf
+
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    e = np.exp(x - x.max(axis=1, keepdims=True))
+    return e / e.sum(axis=1, keepdims=True)
+
+
+def _check_parity(model, onnx_path: Path, batch: int) -> dict:
+    import onnxruntime as ort
+    import torch
+
+    x = _parity_inputs(batch)
+    with torch.inference_mode():
+        ref = model(torch.from_numpy(x))
+        if isinstance(ref, tuple | list):
+            ref = ref[0]
+        ref = ref.numpy()
+
+    session = ort.InferenceSession(str(onnx_path), providers=["CPUExecutionProvider"])
+    got = session.run(None, {session.get_inputs()[0].name: x})[0]
+
+    p_ref, p_got = _softmax(ref), _softmax(got)
+    return {
+        "batch": batch,
+        "max_abs_logit_diff": float(np.abs(ref - got).max()),
+        "max_abs_prob_diff": float(np.abs(p_ref - p_got).max()),
+        "top1_agreement": float((ref.argmax(1) == got.argmax(1)).mean()),
+    }
+
+
+def main() -> None:
+    from app.core.config import settings
+    from app.services.inference import _load_model_flexible
+
+    parser = argparse.ArgumentParser(description="Export model.pth to ONNX")
+    parser.add_argument("--model", type=Path, default=Path(settings.model_path))
+    parser.add_argument("--out", type=Path, default=None)
+    parser.add_argument("--opset", type=int, default=18)
+    parser.add_argument("--atol", type=float, default=1e-4, help="допуск по ймовірностях")
+    args = parser.parse_args()
+
+    out_path = args.out or args.model.with_suffix(".onnx")
+    if args.model.suffix.lower() == ".onnx":
+        sys.exit("Source model is already ONNX")
+
+    model, backend = _load_model_flexible(args.model)
+    print(f"Loaded {args.model} ({backend})")
+
+    _export(model, out_path, args.opset)
+    print(f"Wrote {out_path} ({out_path.stat().st_size / 1e6:.1f} MB)")
+
+    failed = False
+    for batch in (1, 4):
+        report = _check_parity(model, out_path, batch)
+        print(
+            "parity batch={batch}: max|Δlogit|={max_abs_logit_diff:.2e} "
+            "max|Δprob|={max_abs_prob_diff:.2e} top1={top1_agreement:.3f}".format(**report)
+        )
+        if report["max_abs_prob_diff"] > args.atol or report["top1_agreement"] < 1.0:
+            failed = True
+
+    if failed:
+        sys.exit(f"Parity check failed (atol={args.atol})")
+    print("Parity OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Переносить плаский каталог завантажень ({sha256}{ext}) у розкладку
+ab/cd/{sha256} зі sidecar {sha256}.json — на місці, без копіювання
+(rename у межах тієї ж файлової системи).
+
+Кожен файл переноситься атомарно, а sidecar пишеться до rename, тож
+перерваний запуск можна просто повторити: він продовжить з тих файлів,
+що ще лежать у корені. Ті самі байти під різними розширеннями
+зберігаються один раз — дублікати видаляються.
+
+    python -m scripts.migrate_uploads
+    python -m scripts.migrate_uploads --dir /data/plantio/uploads --verify
+    python -m scripts.migrate_uploads --dry-run
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+import time
+from collections import Counter
+from datetime import UTC, datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.services.storage import shard_path, write_metadata  # noqa: E402
+
+FLAT_NAME = re.compile(r"^([0-9a-f]{64})(\.[A-Za-z0-9]+)?$")
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _metadata(sha256: str, ext: str | None, st: os.stat_result) -> dict:
+    return {
+        "sha256": sha256,
+        "size": st.st_size,
+        "ext": (ext or ".jpg").lower(),
+        "filename": None,
+        "created_at": datetime.fromtimestamp(st.st_mtime, UTC).isoformat(),
+    }
+
+
+def migrate(
+    base_dir: str,
+    verify: bool = False,
+    dry_run: bool = False,
+    progress_every: int = 1000,
+) -> Counter:
+    counts: Counter = Counter()
+    started = time.perf_counter()
+
+    with os.scandir(base_dir) as entries:
+        for entry in entries:
+            m = FLAT_NAME.match(entry.name)
+            if not m or not entry.is_file(follow_symlinks=False):
+                continue
+            sha256, ext = m.group(1), m.group(2)
+            counts["seen"] += 1
+
+            if verify and _file_sha256(entry.path) != sha256:
+                print(f"skip {entry.name}: content does not match its hash")
+                counts["mismatch"] += 1
+                continue
+
+            target = shard_path(base_dir, sha256)
+            if dry_run:
+                counts["duplicate" if os.path.exists(target) else "moved"] += 1
+            elif os.path.exists(target):
+                if not os.path.exists(f"{target}.json"):
+                    write_metadata(target, _metadata(sha256, ext, entry.stat()))
+                os.unlink(entry.path)
+                counts["duplicate"] += 1
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                write_metadata(target, _metadata(sha256, ext, entry.stat()))
+                os.rename(entry.path, target)
+                counts["moved"] += 1
+
+            if progress_every and counts["seen"] % progress_every == 0:
+                elapsed = time.perf_counter() - started
+                print(
+                    f"{counts['seen']} files ({counts['seen'] / elapsed:.0f}/s): "
+                    f"{counts['moved']} moved, {counts['duplicate']} duplicates, "
+                    f"{counts['mismatch']} skipped"
+                )
+
+    return counts
+
+
+def main(argv: list[str] | None = None) -> None:
+    from app.core.config import settings
+
+    parser = argparse.ArgumentParser(description="Re-shard a flat upload directory")
+    parser.add_argument("--dir", default=settings.upload_dir)
+    parser.add_argument(
+        "--verify", action="store_true", help="перераховувати SHA-256 кожного файлу"
+    )
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--progress-every", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.dir):
+        sys.exit(f"No such directory: {args.dir}")
+
+    t0 = time.perf_counter()
+    counts = migrate(args.dir, args.verify, args.dry_run, args.progress_every)
+    prefix = "[dry-run] " if args.dry_run else ""
+    print(
+        f"{prefix}done in {time.perf_counter() - t0:.1f}s: {counts['seen']} files, "
+        f"{counts['moved']} moved, {counts['duplicate']} duplicates removed, "
+        f"{counts['mismatch']} skipped"
+    )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
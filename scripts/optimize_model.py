@@ -0,0 +1,274 @@
+"""
+Оптимізовані CPU-варіанти моделі зі звітом про паритет і швидкість.
+
+Варіанти (кожен — frozen TorchScript, який приймає звичайний float32 NCHW,
+тож сервер завантажує його як будь-яку іншу модель):
+
+    frozen          torch.jit.trace + freeze (+ optimize_for_inference
+                    при завантаженні, якщо PLANTIO_INFERENCE_JIT_OPTIMIZE=true)
+    channels_last   ваги й вхід у NHWC-розкладці пам'яті
+    dynamic_int8    динамічна INT8-квантизація Linear-шарів
+    static_int8     статична INT8-квантизація (FX) з калібруванням
+    bf16            bfloat16-ваги (лише якщо CPU підтримує bf16)
+
+Калібрувальні та оцінювальні зображення — storage/samples (+ --calib-dir)
+з випадковими кропами/відбиттями; для кожного варіанту рахуються top-1
+agreement і top-k overlap з базовою моделлю, p50/p99 латентність і розмір.
+
+    python -m scripts.optimize_model
+    python -m scripts.optimize_model --variants frozen,static_int8 \
+        --calib-dir /data/plantio/val --calib-images 256
+
+Вибір варіанту для сервера: PLANTIO_MODEL_VARIANT=static_int8
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageOps
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+SAMPLES_DIR = ROOT / "storage" / "samples"
+DATASET_CLASSES = ROOT / "dataset-classes"
+ALL_VARIANTS = ("frozen", "channels_last", "dynamic_int8", "static_int8", "bf16")
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png"}
+
+
+# ---------- дані ----------
+def _collect_images(extra_dir: Path | None) -> list[Path]:
+    paths = [p for p in SAMPLES_DIR.glob("*") if p.suffix.lower() in IMAGE_SUFFIXES]
+    if extra_dir is not None:
+        paths += [p for p in extra_dir.rglob("*") if p.suffix.lower() in IMAGE_SUFFIXES]
+    if not paths:
+        sys.exit("No calibration images found")
+    return sorted(paths)
+
+
+def _augmented_batch(paths: list[Path], n: int, seed: int) -> np.ndarray:
+    """n випадкових кропів/відбиттів із наявних фото, вже у форматі входу моделі."""
+    from app.services.preprocess import ImagePreprocessor
+
+    pre = ImagePreprocessor()
+    rng = random.Random(seed)
+    buf = pre.batch_buffer(n)
+    for i in range(n):
+        img = Image.open(paths[i % len(paths)]).convert("RGB")
+        w, h = img.size
+        scale = rng.uniform(0.6, 1.0)
+        cw, ch = int(w * scale), int(h * scale)
+        x0, y0 = rng.randint(0, w - cw), rng.randint(0, h - ch)
+        img = img.crop((x0, y0, x0 + cw, y0 + ch))
+        if rng.random() < 0.5:
+            img = ImageOps.mirror(img)
+        pre.from_image(img.resize(pre.size, Image.Resampling.BILINEAR), out=buf[i])
+    return buf
+
+
+# ---------- варіанти ----------
+def _freeze(torch, module, example):
+    traced = torch.jit.trace(module.eval(), example, check_trace=False)
+    return torch.jit.freeze(traced.eval())
+
+
+def _build_variant(torch, name: str, base, calib: np.ndarray):
+    example = torch.from_numpy(calib[:1].copy())
+
+    if name == "frozen":
+        return _freeze(torch, copy.deepcopy(base), example)
+
+    if name == "channels_last":
+
+        class ChannelsLast(torch.nn.Module):
+            def __init__(self, m):
+                super().__init__()
+                self.m = m
+
+            def forward(self, x):
+                return self.m(x.contiguous(memory_format=torch.channels_last))
+
+        m = copy.deepcopy(base).to(memory_format=torch.channels_last)
+        return _freeze(torch, ChannelsLast(m), example)
+
+    if name == "dynamic_int8":
+        from torch.ao.quantization import quantize_dynamic
+
+        m = quantize_dynamic(copy.deepcopy(base), {torch.nn.Linear}, dtype=torch.qint8)
+        return _freeze(torch, m, example)
+
+    if name == "static_int8":
+        from torch.ao.quantization import get_default_qconfig_mapping
+        from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+        engine = torch.backends.quantized.engine
+        prepared = prepare_fx(copy.deepcopy(base), get_default_qconfig_mapping(engine), (example,))
+        with torch.inference_mode():
+            for chunk in np.array_split(calib, max(1, len(calib) // 8)):
+                prepared(torch.from_numpy(chunk))
+        return _freeze(torch, convert_fx(prepared), example)
+
+    if name == "bf16":
+
+        class BFloat16(torch.nn.Module):
+            def __init__(self, m):
+                super().__init__()
+                self.m = m
+
+            def forward(self, x):
+                return self.m(x.to(torch.bfloat16)).float()
+
+        m = copy.deepcopy(base).to(torch.bfloat16)
+        return _freeze(torch, BFloat16(m), example)
+
+    raise ValueError(f"Unknown variant: {name}")
+
+
+def _bf16_supported(torch) -> bool:
+    check = getattr(torch.cpu, "_is_avx512_bf16_supported", None)
+    return bool(check and check())
+
+
+# ---------- оцінка ----------
+def _logits(torch, model, x: np.ndarray) -> np.ndarray:
+    with torch.inference_mode():
+        out = model(torch.from_numpy(x))
+        if isinstance(out, tuple | list):
+            out = out[0]
+        return out.float().numpy()
+
+
+def _agreement(ref: np.ndarray, got: np.ndarray, k: int) -> dict:
+    top_ref = np.argsort(-ref, axis=1)[:, :k]
+    top_got = np.argsort(-got, axis=1)[:, :k]
+    overlap = [len(set(a) & set(b)) / k for a, b in zip(top_ref, top_got, strict=True)]
+    return {
+        "top1_agreement": round(float((top_ref[:, 0] == top_got[:, 0]).mean()), 4),
+        f"top{k}_overlap": round(float(np.mean(overlap)), 4),
+    }
+
+
+def _latency(torch, model, x: np.ndarray, iters: int) -> dict:
+    t = torch.from_numpy(x)
+    timings: list[float] = []
+    with torch.inference_mode():
+        for _ in range(3):
+            model(t)
+        for _ in range(iters):
+            t0 = time.perf_counter()
+            model(t)
+            timings.append((time.perf_counter() - t0) * 1000)
+    timings.sort()
+    return {
+        "p50_ms": round(timings[len(timings) // 2], 2),
+        "p99_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.99))], 2),
+    }
+
+
+def _check_num_classes(logits: np.ndarray) -> None:
+    if not DATASET_CLASSES.exists():
+        return
+    expected = sum(1 for line in DATASET_CLASSES.read_text("utf-8").splitlines() if line)
+    if logits.shape[1] != expected:
+        print(f"WARNING: model has {logits.shape[1]} outputs, dataset-classes lists {expected}")
+
+
+def main() -> None:
+    import torch
+
+    from app.core.config import settings
+    from app.services.inference import _load_model_flexible
+
+    parser = argparse.ArgumentParser(description="Build optimized model variants")
+    parser.add_argument("--model", type=Path, default=Path(settings.model_path))
+    parser.add_argument("--out-dir", type=Path, default=None)
+    parser.add_argument("--variants", default=",".join(ALL_VARIANTS))
+    parser.add_argument("--calib-dir", type=Path, default=None)
+    parser.add_argument("--calib-images", type=int, default=64)
+    parser.add_argument("--eval-images", type=int, default=64)
+    parser.add_argument("--topk", type=int, default=3)
+    parser.add_argument("--iters", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=1, help="батч для заміру латентності")
+    args = parser.parse_args()
+
+    out_dir = args.out_dir or args.model.parent / "variants"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    variants = [v.strip() for v in args.variants.split(",") if v.strip()]
+    unknown = set(variants) - set(ALL_VARIANTS)
+    if unknown:
+        sys.exit(f"Unknown variants: {sorted(unknown)}")
+
+    base, backend = _load_model_flexible(args.model)
+    if not isinstance(base, torch.nn.Module) or isinstance(base, torch.jit.ScriptModule):
+        sys.exit(f"Need an eager nn.Module to optimize, got {backend}")
+    base.eval()
+
+    images = _collect_images(args.calib_dir)
+    calib = _augmented_batch(images, args.calib_images, seed=0)
+    evals = _augmented_batch(images, args.eval_images, seed=1)
+    bench_x = evals[: args.batch].copy()
+
+    ref = _logits(torch, base, evals)
+    _check_num_classes(ref)
+
+    report: list[dict] = [
+        {
+            "variant": "baseline",
+            "path": str(args.model),
+            "size_mb": round(args.model.stat().st_size / 1e6, 2),
+            **_agreement(ref, ref, args.topk),
+            **_latency(torch, base, bench_x, args.iters),
+        }
+    ]
+
+    for name in variants:
+        if name == "bf16" and not _bf16_supported(torch):
+            print("skip bf16: CPU has no native bf16 support")
+            continue
+        t0 = time.perf_counter()
+        try:
+            module = _build_variant(torch, name, base, calib)
+        except Exception as e:  # noqa: BLE001
+            print(f"skip {name}: {e}")
+            continue
+        path = out_dir / f"{name}.pt"
+        torch.jit.save(module, str(path))
+
+        # міряємо рівно те, що завантажить сервер
+        served, _ = _load_model_flexible(path)
+        report.append(
+            {
+                "variant": name,
+                "path": str(path),
+                "size_mb": round(path.stat().st_size / 1e6, 2),
+                "build_s": round(time.perf_counter() - t0, 1),
+                **_agreement(ref, _logits(torch, served, evals), args.topk),
+                **_latency(torch, served, bench_x, args.iters),
+            }
+        )
+
+    (out_dir / "report.json").write_text(
+        json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8"
+    )
+
+    k = args.topk
+    print(f"{'variant':<14} {'size MB':>8} {'top1':>6} {f'top{k}':>6} {'p50 ms':>8} {'p99 ms':>8}")
+    for r in report:
+        print(
+            f"{r['variant']:<14} {r['size_mb']:>8} {r['top1_agreement']:>6} "
+            f"{r[f'top{k}_overlap']:>6} {r['p50_ms']:>8} {r['p99_ms']:>8}"
+        )
+    print(f"Report: {out_dir / 'report.json'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,9 +4,7 @@ import torchvision.transforms as transforms
 import torchvision.transforms.functional as F
 from PIL import Image
 
-CLASSIFY_TRANSFORM = transforms.Compose(
-    [transforms.ToTensor(), transforms.Resize((224, 224))]
-)
+CLASSIFY_TRANSFORM = transforms.Compose([transforms.ToTensor(), transforms.Resize((224, 224))])
 
 
 def classify_image(img_path, m, class_names, d):
@@ -100,9 +98,7 @@ if __name__ == "__main__":
         idx, name = line.split(" - ", 1)
         class_dict[int(idx)] = name
 
-    model = torch.load(
-        "app/models/plantio/model.pth", map_location=device, weights_only=False
-    )
+    model = torch.load("app/models/plantio/model.pth", map_location=device, weights_only=False)
     print(model)
     model.eval()
 
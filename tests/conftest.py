@@ -1,7 +1,6 @@
 import io
 import os
 import sys
-import types
 from pathlib import Path
 
 import pytest
@@ -14,6 +13,10 @@ if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 os.environ.setdefault("PLANTIO_MIN_CONFIDENCE", "0.1")
+# моки інференсу в тестах мають спрацьовувати на кожен запит
+os.environ.setdefault("PLANTIO_PREDICTION_CACHE_ENABLED", "false")
+# семпловані trace'и не пишуться у storage/ робочої копії
+os.environ.setdefault("PLANTIO_TRACING_EXPORT_PATH", "")
 
 from app.main import app  # noqa: E402
 
@@ -50,28 +53,31 @@ def sample_jpeg_bytes():
 @pytest.fixture
 def mock_storage_save(monkeypatch, tmp_path):
     from app.api.v1.endpoints import diagnose
+    from app.services.storage import LocalFileStorage
 
-    def fake_save(filename: str, content: bytes):
-        return str(tmp_path / filename), "deadbeef"
-
-    monkeypatch.setattr(diagnose, "_storage", types.SimpleNamespace(save=fake_save))
-    return True
+    storage = LocalFileStorage(str(tmp_path))
+    monkeypatch.setattr(diagnose, "_storage", storage)
+    return storage
 
 
 @pytest.fixture
-def mock_plant_find_one(monkeypatch):
-    from app.models import plant as plant_mod
-
-    class DummyPlant:
-        id = "507f1f77bcf86cd799439011"
-        plantName = "Виноград"
-        diseases = [{"diseaseName": "Grape Esca (Black Measles)"}]
+def mock_catalog(monkeypatch):
+    from app.services.catalog import CatalogSnapshot, get_catalog
 
-    async def fake_find_one(*args, **kwargs):
-        return DummyPlant()
-
-    monkeypatch.setattr(plant_mod.Plant, "find_one", staticmethod(fake_find_one))
-    return True
+    snapshot = CatalogSnapshot.build(
+        [
+            {
+                "_id": "507f1f77bcf86cd799439011",
+                "plantName": "Виноград",
+                "diseases": [
+                    {"diseaseName": "Grape Esca (Black Measles)"},
+                    {"diseaseName": "Чорна гниль винограду"},
+                ],
+            }
+        ]
+    )
+    monkeypatch.setattr(get_catalog(), "_snapshot", snapshot)
+    return snapshot
 
 
 @pytest.fixture
@@ -99,7 +105,11 @@ def mock_inference_success(monkeypatch):
             {"plant_name": "Соняшник", "disease_name": None, "confidence": 0.12},
         ]
 
+    async def fake_predict_topk_async(image_bytes: bytes, topk: int = 3):
+        return fake_predict_topk(image_bytes, topk)
+
     monkeypatch.setattr(inf_mod, "predict_topk", fake_predict_topk)
+    monkeypatch.setattr(inf_mod, "predict_topk_async", fake_predict_topk_async)
     return True
 
 
@@ -117,5 +127,49 @@ def mock_inference_low(monkeypatch):
             {"plant_name": "Соняшник", "disease_name": None, "confidence": 0.10},
         ]
 
+    async def fake_predict_topk_async(image_bytes: bytes, topk: int = 3):
+        return fake_predict_topk(image_bytes, topk)
+
     monkeypatch.setattr(inf_mod, "predict_topk", fake_predict_topk)
+    monkeypatch.setattr(inf_mod, "predict_topk_async", fake_predict_topk_async)
+    return True
+
+
+@pytest.fixture
+def mock_diagnosis_insert_many(monkeypatch):
+    from app.models import diagnosis as diag_mod
+
+    inserted = []
+
+    async def fake_insert_many(docs, *args, **kwargs):
+        inserted.extend(docs)
+
+    monkeypatch.setattr(diag_mod.Diagnosis, "insert_many", staticmethod(fake_insert_many))
+    return inserted
+
+
+@pytest.fixture
+def mock_inference_batch(monkeypatch):
+    from app.services import inference as inf_mod
+
+    async def fake_predict_batch_async(images: list[bytes], topk: int = 3):
+        out = []
+        for path in images:
+            image_bytes = Path(path).read_bytes()
+            if image_bytes == b"not-an-image":
+                out.append(ValueError("cannot identify image file"))
+                continue
+            conf = 0.9 if image_bytes.startswith(b"\xff\xd8") else 0.1
+            out.append(
+                [
+                    {
+                        "plant_label": "grape",
+                        "disease_label": "black_rot",
+                        "confidence": conf,
+                    }
+                ]
+            )
+        return out
+
+    monkeypatch.setattr(inf_mod, "predict_batch_async", fake_predict_batch_async)
     return True
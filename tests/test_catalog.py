@@ -0,0 +1,141 @@
+import asyncio
+
+import pytest
+
+from app.models.plant import Plant
+from app.services.catalog import CatalogService, CatalogSnapshot
+
+PLANTS = [
+    {
+        "_id": "p2",
+        "plantName": "Томат",
+        "diseases": [{"diseaseName": "Фітофтороз томата", "riskLevel": "high"}],
+    },
+    {
+        "_id": "p1",
+        "plantName": "Виноград",
+        "diseases": [
+            {"diseaseName": "Чорна гниль винограду"},
+            {"diseaseName": "Гниль"},
+        ],
+    },
+]
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self._docs = docs
+
+    async def to_list(self, length=None):
+        return list(self._docs)
+
+
+class _Collection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.finds = 0
+
+    def find(self, *args, **kwargs):
+        self.finds += 1
+        return _Cursor(self.docs)
+
+    def watch(self, *args, **kwargs):
+        raise NotImplementedError("change streams need a replica set")
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    coll = _Collection([dict(d) for d in PLANTS])
+    monkeypatch.setattr(
+        Plant,
+        "get_pymongo_collection",
+        classmethod(lambda cls: coll),
+        raising=False,
+    )
+    return coll
+
+
+def test_snapshot_indexes():
+    snap = CatalogSnapshot.build(PLANTS)
+
+    assert [p["plantName"] for p in snap.plants] == ["Томат", "Виноград"]
+    assert snap.plant_by_name("Томат")["_id"] == "p2"
+    assert snap.plant_by_id("p1")["plantName"] == "Виноград"
+    assert snap.diseases["Фітофтороз томата"][0]["plantId"] == "p2"
+    assert snap.diseases["Фітофтороз томата"][0]["riskLevel"] == "high"
+    assert snap.plant_by_name(None) is None
+
+
+def test_match_disease_exact_then_substring():
+    snap = CatalogSnapshot.build(PLANTS)
+
+    assert snap.match_disease("Виноград", "Гниль") == "Гниль"
+    assert snap.match_disease("Виноград", "Чорна гниль") == "Чорна гниль винограду"
+    assert snap.match_disease("Виноград", "Фітофтороз") is None
+    assert snap.match_disease("Невідома", "Гниль") is None
+
+
+def test_duplicate_plant_names_follow_natural_order():
+    # як Plant.find_one: перша в природному порядку, навіть з більшим _id
+    docs = [
+        {"_id": "b", "plantName": "Томат", "diseases": [{"diseaseName": "Гниль Б"}]},
+        {"_id": "a", "plantName": "Томат", "diseases": [{"diseaseName": "Гниль А"}]},
+    ]
+    snap = CatalogSnapshot.build(docs)
+
+    assert snap.plant_by_name("Томат")["_id"] == "b"
+    assert snap.match_disease("Томат", "Гниль") == "Гниль Б"
+    assert snap.match_disease("Томат", "Гниль А") is None
+    assert snap.plant_by_id("a")["diseases"][0]["diseaseName"] == "Гниль А"
+
+
+def test_version_depends_on_content_only():
+    a = CatalogSnapshot.build(PLANTS, generation=1)
+    b = CatalogSnapshot.build(list(reversed(PLANTS)), generation=7)
+    changed = CatalogSnapshot.build(PLANTS[:1])
+
+    assert a.version == b.version
+    assert a.version != changed.version
+
+
+@pytest.mark.asyncio
+async def test_refresh_swaps_snapshot_only_on_change(collection):
+    service = CatalogService(refresh_s=60)
+
+    assert await service.refresh() is True
+    first = service.snapshot
+    assert await service.refresh() is False
+    assert service.snapshot is first
+
+    collection.docs.append({"_id": "p3", "plantName": "Соняшник", "diseases": []})
+    assert await service.refresh() is True
+    assert service.snapshot.generation == first.generation + 1
+    assert service.snapshot.plant_by_name("Соняшник") is not None
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_polling_without_change_streams(collection):
+    service = CatalogService(refresh_s=0.01)
+    await service.start()
+    try:
+        await asyncio.sleep(0.1)
+        assert service.mode == "polling"
+        assert collection.finds > 2
+    finally:
+        await service.stop()
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_keeps_previous_snapshot(collection, monkeypatch):
+    service = CatalogService(refresh_s=60, watch=False)
+    await service.refresh()
+    before = service.snapshot
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("mongo down")
+
+    monkeypatch.setattr(collection, "find", broken)
+    await service._safe_refresh()
+
+    assert service.snapshot is before
+    assert "mongo down" in service.status()["last_error"]
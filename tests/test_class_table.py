@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from app.services import inference
+from app.services.class_table import HEALTHY_NAME, ClassTable
+
+CLASS_MAP = {
+    0: {"plant_label": "apple", "disease_label": "black_rot", "disease_name": "Гниль"},
+    1: {"plant_label": "apple", "plant_name": "Яблуня", "disease_label": "healthy"},
+    2: {"plant_label": "grape", "disease_label": "esca"},
+}
+
+
+def test_rows_compiled_once_with_final_names():
+    table = ClassTable.compile(CLASS_MAP)
+
+    assert len(table) == 3
+    rows = table.first(3)
+    assert rows[0]["plant_name"] == "Яблуня"  # з PLANT_NAME_MAP
+    assert rows[1]["disease_name"] == HEALTHY_NAME
+    assert rows[2]["disease_name"] == "Еска винограду"
+
+
+def test_candidates_gather_batch():
+    table = ClassTable.compile(CLASS_MAP)
+    vals = np.array([[0.7, 0.2], [0.9, 0.05]], dtype=np.float32)
+    idxs = np.array([[2, 0], [1, 2]])
+
+    out = table.candidates(vals, idxs)
+
+    assert [[c["class_index"] for c in row] for row in out] == [[2, 0], [1, 2]]
+    assert out[0][0]["confidence"] == pytest.approx(0.7)
+    assert out[1][0]["disease_label"] == "healthy"
+    # рядки таблиці не змінюються між запитами
+    out[0][0]["plant_name"] = "змінено"
+    assert table.first(3)[2]["plant_name"] == "Виноград"
+
+
+def test_validate_against_model_outputs():
+    table = ClassTable.compile(CLASS_MAP)
+    table.validate(3)
+    with pytest.raises(ValueError, match="3 classes, model outputs 5"):
+        table.validate(5)
+
+
+def test_mismatched_class_map_falls_back_to_dummy(monkeypatch, tmp_path):
+    torch = pytest.importorskip("torch")
+
+    path = tmp_path / "model.pth"
+    torch.save(torch.nn.Sequential(torch.nn.Flatten(), torch.nn.Linear(12, 5)), path)
+    monkeypatch.setattr(inference, "resolve_model_path", lambda: path)
+    monkeypatch.setattr(inference, "_load_class_map", lambda _p: ClassTable.compile(CLASS_MAP))
+
+    assert inference._build_classifier().backend == "dummy"
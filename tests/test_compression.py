@@ -0,0 +1,72 @@
+import gzip
+import json
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.core.compression import CompressionMiddleware, choose_encoding
+
+
+def _app(body: bytes, headers: list[tuple[bytes, bytes]], more_body: bool = False):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        if more_body:
+            half = len(body) // 2
+            await send({"type": "http.response.body", "body": body[:half], "more_body": True})
+            await send({"type": "http.response.body", "body": body[half:]})
+        else:
+            await send({"type": "http.response.body", "body": body})
+
+    return app
+
+
+def _client(app) -> AsyncClient:
+    mw = CompressionMiddleware(app, minimum_size=1024)
+    return AsyncClient(transport=ASGITransport(app=mw), base_url="http://test")
+
+
+BIG = json.dumps({"items": ["Чорна гниль"] * 500}, ensure_ascii=False).encode()
+JSON = [(b"content-type", b"application/json")]
+
+
+def test_choose_encoding_respects_q0():
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0, identity") is None
+    assert choose_encoding("") is None
+
+
+async def test_large_json_is_gzipped():
+    async with _client(_app(BIG, JSON)) as client:
+        r = await client.get("/x", headers={"Accept-Encoding": "gzip"})
+
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.headers["vary"] == "Accept-Encoding"
+    assert int(r.headers["content-length"]) < len(BIG)
+    assert r.content == BIG  # httpx розпаковує сам
+
+
+@pytest.mark.parametrize(
+    "body, headers, more_body, accept",
+    [
+        (b'{"ok":true}', JSON, False, "gzip"),  # мале тіло
+        (BIG, JSON, False, "identity"),  # клієнт не вміє gzip
+        (BIG, [(b"content-type", b"image/jpeg")], False, "gzip"),
+        (BIG, JSON, True, "gzip"),  # потокова відповідь
+    ],
+)
+async def test_passthrough(body, headers, more_body, accept):
+    async with _client(_app(body, headers, more_body)) as client:
+        r = await client.get("/x", headers={"Accept-Encoding": accept})
+
+    assert "content-encoding" not in r.headers
+    assert r.content == body
+
+
+async def test_already_encoded_body_is_not_recompressed():
+    encoded = gzip.compress(BIG)
+    headers = JSON + [(b"content-encoding", b"gzip"), (b"vary", b"Accept-Encoding")]
+    async with _client(_app(encoded, headers)) as client:
+        r = await client.get("/x", headers={"Accept-Encoding": "gzip"})
+
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.content == BIG
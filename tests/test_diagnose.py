@@ -6,7 +6,7 @@ async def test_diagnose_success(
     client,
     sample_jpeg_bytes,
     mock_storage_save,
-    mock_plant_find_one,
+    mock_catalog,
     mock_diagnosis_insert,
     mock_inference_success,
 ):
@@ -27,7 +27,7 @@ async def test_diagnose_low_confidence(
     client,
     sample_jpeg_bytes,
     mock_storage_save,
-    mock_plant_find_one,
+    mock_catalog,
     mock_diagnosis_insert,
     mock_inference_low,
 ):
@@ -39,3 +39,18 @@ async def test_diagnose_low_confidence(
     js = r.json()
     assert js["detail"]["message"] == "low_confidence"
     assert isinstance(js["detail"]["candidates"], list)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("topk", ["0", "-1", "21"])
+async def test_diagnose_rejects_invalid_topk(client, sample_jpeg_bytes, mock_storage_save, topk):
+    files = {"image": ("test.jpg", sample_jpeg_bytes, "image/jpeg")}
+
+    r = await client.post("/api/v1/diagnose", files=files, data={"topK": topk})
+    assert r.status_code == 400
+    assert r.json()["detail"].startswith("invalid_topk")
+
+    files = [("images", ("a.jpg", sample_jpeg_bytes, "image/jpeg"))]
+    r = await client.post("/api/v1/diagnose/batch", files=files, data={"topK": topk})
+    assert r.status_code == 400
+    assert r.json()["detail"].startswith("invalid_topk")
@@ -0,0 +1,54 @@
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_diagnose_batch_per_image_status(
+    client,
+    sample_jpeg_bytes,
+    mock_storage_save,
+    mock_catalog,
+    mock_diagnosis_insert_many,
+    mock_inference_batch,
+):
+    files = [
+        ("images", ("a.jpg", sample_jpeg_bytes, "image/jpeg")),
+        ("images", ("b.jpg", b"not-an-image", "image/jpeg")),
+        ("images", ("c.jpg", b"", "image/jpeg")),
+    ]
+    data = {"topK": "3", "threshold": "0.5"}
+
+    r = await client.post("/api/v1/diagnose/batch", files=files, data=data)
+    assert r.status_code == 200, r.text
+    js = r.json()
+    assert js["count"] == 3
+
+    ok, bad, empty = js["items"]
+    assert ok["status"] == "ok"
+    assert ok["decidedDiseaseId"] == "black_rot"
+    assert ok["candidates"][0]["disease_name"] == "Чорна гниль винограду"
+    assert ok["candidates"][0]["plant_id"] == "507f1f77bcf86cd799439011"
+    assert bad["status"] == "error" and bad["error"].startswith("invalid_image")
+    assert empty["status"] == "error" and empty["error"] == "empty_file"
+    # модель відповіді не додає null-полів, яких елемент не має
+    assert "error" not in ok
+    assert set(empty) == {"index", "filename", "status", "error"}
+
+    assert [str(d.id) for d in mock_diagnosis_insert_many] == [ok["diagnosisId"]]
+
+
+@pytest.mark.asyncio
+async def test_diagnose_batch_low_confidence_is_not_422(
+    client,
+    mock_storage_save,
+    mock_catalog,
+    mock_diagnosis_insert_many,
+    mock_inference_batch,
+):
+    files = [("images", ("a.jpg", b"low-confidence-bytes", "image/jpeg"))]
+
+    r = await client.post("/api/v1/diagnose/batch", files=files, data={"threshold": "0.5"})
+    assert r.status_code == 200, r.text
+    item = r.json()["items"][0]
+    assert item["status"] == "low_confidence"
+    assert item["decidedDiseaseId"] is None
+    assert len(mock_diagnosis_insert_many) == 1
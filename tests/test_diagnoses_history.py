@@ -0,0 +1,161 @@
+from collections import defaultdict
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app.api.v1.endpoints import diagnoses
+from app.models.diagnosis import Diagnosis
+
+
+class _Find:
+    def __init__(self, docs, projection):
+        # проєкція лише по полях верхнього рівня — тестам цього досить
+        keep = {"_id"} | {p.split(".", 1)[0] for p in projection or {}}
+        self.docs = [{k: v for k, v in d.items() if k in keep} for d in docs]
+        self.calls = []
+
+    def sort(self, spec):
+        self.calls.append(("sort", spec))
+        return self
+
+    def limit(self, n):
+        self.calls.append(("limit", n))
+        return self
+
+    async def to_list(self, length=None):
+        return self.docs[:length]
+
+
+class _Collection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.finds = []
+
+    def find(self, filter_spec, projection=None):
+        self.finds.append((filter_spec, projection, _Find(self.docs, projection)))
+        return self.finds[-1][2]
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    t0 = datetime(2026, 5, 1, 12, 0, 0)
+    docs = [
+        {
+            "_id": ObjectId(),
+            # Motor віддає naive UTC з точністю до мс
+            "created_at": t0 - timedelta(minutes=i),
+            "status": "DONE",
+            "result": {"decidedDiseaseId": "black_rot"},
+        }
+        for i in range(3)
+    ]
+    coll = _Collection(docs)
+    monkeypatch.setattr(
+        Diagnosis,
+        "get_pymongo_collection",
+        classmethod(lambda cls: coll),
+        raising=False,
+    )
+    return coll
+
+
+def test_cursor_roundtrip():
+    oid = ObjectId()
+    created = datetime(2026, 5, 1, 12, 0, 0, 123000)
+    assert diagnoses.decode_cursor(diagnoses.encode_cursor(created, oid)) == (
+        created.replace(tzinfo=UTC),
+        oid,
+    )
+
+    with pytest.raises(HTTPException) as e:
+        diagnoses.decode_cursor("bm9wZQ")
+    assert e.value.status_code == 400
+
+
+def test_parse_fields():
+    assert diagnoses.parse_fields(None) == diagnoses.DEFAULT_FIELDS
+    assert "result.candidates" not in diagnoses.DEFAULT_FIELDS
+    assert diagnoses.parse_fields("result, result.plantId,status") == (
+        "result",
+        "status",
+    )
+    with pytest.raises(HTTPException) as e:
+        diagnoses.parse_fields("status,password")
+    assert e.value.detail == "invalid_fields: password"
+
+
+def test_filter_with_cursor_desc():
+    oid = ObjectId()
+    at = datetime(2026, 5, 1, tzinfo=UTC)
+    spec = diagnoses.build_filter(
+        "DONE", None, False, datetime(2026, 4, 1), None, (at, oid), "desc"
+    )
+    assert spec == {
+        "$and": [
+            {"status": "DONE"},
+            {"result.decidedDiseaseId": None},
+            {"created_at": {"$gte": datetime(2026, 4, 1, tzinfo=UTC)}},
+            {
+                "$or": [
+                    {"created_at": {"$lt": at}},
+                    {"created_at": at, "_id": {"$lt": oid}},
+                ]
+            },
+        ]
+    }
+    assert diagnoses.build_filter(None, None, None, None, None, None, "asc") == {}
+
+
+async def test_list_diagnoses_keyset_page(client, collection):
+    r = await client.get("/api/v1/diagnoses", params={"size": 2, "fields": "status"})
+    assert r.status_code == 200, r.text
+    js = r.json()
+
+    assert [i["id"] for i in js["items"]] == [str(d["_id"]) for d in collection.docs[:2]]
+    assert set(js["items"][0]) == {"id", "created_at", "status"}
+    assert js["items"][0]["created_at"].startswith("2026-05-01T12:00:00")
+
+    filter_spec, projection, find = collection.finds[-1]
+    assert filter_spec == {}
+    assert projection == {"created_at": 1, "status": 1}
+    assert find.calls == [("sort", [("created_at", -1), ("_id", -1)]), ("limit", 3)]
+
+    created_at, oid = diagnoses.decode_cursor(js["next_cursor"])
+    assert oid == collection.docs[1]["_id"]
+    assert created_at == collection.docs[1]["created_at"].replace(tzinfo=UTC)
+
+
+async def test_last_page_has_no_cursor(client, collection):
+    r = await client.get("/api/v1/diagnoses", params={"size": 3})
+    assert r.status_code == 200, r.text
+    assert r.json()["next_cursor"] is None
+
+
+class _IndexedCollection:
+    def __init__(self, names):
+        self.indexes = {name: {} for name in names}
+
+    async def index_information(self):
+        return dict(self.indexes)
+
+    async def drop_index(self, name):
+        del self.indexes[name]
+
+
+async def test_legacy_diagnosis_indexes_are_dropped():
+    from scripts.drop_legacy_indexes import drop_legacy_indexes
+
+    coll = _IndexedCollection(["_id_", "status_1", "created_at_-1", "created_at_id"])
+    db = defaultdict(lambda: _IndexedCollection(["_id_"]), diagnoses=coll)
+
+    assert await drop_legacy_indexes(db, dry_run=True) == [
+        ("diagnoses", "status_1"),
+        ("diagnoses", "created_at_-1"),
+    ]
+    assert len(coll.indexes) == 4
+
+    await drop_legacy_indexes(db)
+    assert set(coll.indexes) == {"_id_", "created_at_id"}
+    assert await drop_legacy_indexes(db) == []  # повторний запуск — нічого
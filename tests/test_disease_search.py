@@ -0,0 +1,177 @@
+import pytest
+
+from app.api.v1.endpoints.diseases import _search_page
+from app.models.plant import Plant
+from app.services import disease_search
+from app.services.catalog import CatalogService, CatalogSnapshot
+from app.services.disease_search import (
+    DiseaseLookup,
+    DiseaseSearchIndex,
+    stem,
+    tokenize,
+)
+
+PLANTS = [
+    {
+        "_id": "p1",
+        "plantName": "Виноград",
+        "diseases": [
+            {
+                "diseaseName": "Чорна гниль винограду",
+                "symptoms": ["Бурі плями на листі"],
+                "riskLevel": "high",
+            },
+            {
+                "diseaseName": "Мілдью",
+                "description": "Грибкова хвороба",
+                "treatment": ["Обробка проти гнилі"],
+                "riskLevel": "low",
+            },
+        ],
+    },
+    {
+        "_id": "p2",
+        "plantName": "Томат",
+        "diseases": [
+            {
+                "diseaseName": "Фітофтороз томата",
+                "symptoms": ["Темні плями на плодах"],
+                "riskLevel": "medium",
+            },
+        ],
+    },
+]
+
+
+def _names(hits):
+    return [h.entry["diseaseName"] for h in hits]
+
+
+@pytest.fixture
+def index():
+    idx = DiseaseSearchIndex()
+    idx.sync(CatalogSnapshot.build(PLANTS))
+    return idx
+
+
+def test_stem_and_tokenize():
+    assert stem("плями") == stem("плям") == "плям"
+    assert stem("гнилі") == stem("гниль") == "гнил"
+    assert stem("esca") == "esca"
+    assert tokenize("В’янення ЛИСТЯ") == ["вяненн", "лист"]
+
+
+def test_search_matches_word_forms(index):
+    assert set(_names(index.search("плямами"))) == {
+        "Чорна гниль винограду",
+        "Фітофтороз томата",
+    }
+
+
+def test_name_match_ranks_above_treatment_match(index):
+    assert _names(index.search("гниль")) == ["Чорна гниль винограду", "Мілдью"]
+
+
+def test_all_words_must_match(index):
+    assert _names(index.search("плями плодах")) == ["Фітофтороз томата"]
+    assert index.search("плями мілдью") == []
+
+
+def test_last_word_matches_as_prefix(index):
+    assert _names(index.search("фітоф")) == ["Фітофтороз томата"]
+    assert _names(index.search("темні пл")) == ["Фітофтороз томата"]
+
+
+def test_incremental_sync(index):
+    changed = [
+        PLANTS[0],
+        {
+            "_id": "p2",
+            "plantName": "Томат",
+            "diseases": [{"diseaseName": "Альтернаріоз томата"}],
+        },
+    ]
+    stats = index.sync(CatalogSnapshot.build(changed))
+
+    assert stats == {"added": 1, "removed": 1, "docs": 3}
+    assert index.search("фітофтороз") == []
+    assert _names(index.search("альтернаріоз")) == ["Альтернаріоз томата"]
+
+    stats = index.sync(CatalogSnapshot.build(changed[:1]))
+    assert stats == {"added": 0, "removed": 1, "docs": 2}
+    assert index.search("томата") == []
+    assert index.stats()["terms"] == len(index._postings)
+
+
+def test_search_page_filters_sorts_and_pages(monkeypatch, index):
+    monkeypatch.setattr(disease_search, "_INDEX", index)
+
+    page = _search_page("плями", None, "relevance", 0, 1)
+    assert page["count"] == 2
+    # коротший документ з тим самим tf — вище (нормалізація довжини BM25)
+    assert _names_items(page) == ["Фітофтороз томата"]
+
+    page = _search_page("плями", None, "riskLevel", 0, 10)
+    assert _names_items(page) == ["Фітофтороз томата", "Чорна гниль винограду"]
+
+    page = _search_page("плями", "p2", "-diseaseName", 0, 10)
+    assert _names_items(page) == ["Фітофтороз томата"]
+
+
+def _names_items(page):
+    return [i["diseaseName"] for i in page["items"]]
+
+
+async def test_index_follows_catalog_refresh(monkeypatch):
+    docs = [dict(p) for p in PLANTS]
+
+    class _Cursor:
+        async def to_list(self, length=None):
+            return list(docs)
+
+    class _Collection:
+        def find(self, *args, **kwargs):
+            return _Cursor()
+
+    monkeypatch.setattr(
+        Plant,
+        "get_pymongo_collection",
+        classmethod(lambda cls: _Collection()),
+        raising=False,
+    )
+    service = CatalogService(refresh_s=0, watch=False)
+    idx = DiseaseSearchIndex()
+    service.on_change(idx.sync)
+
+    await service.refresh()
+    assert idx.version == service.snapshot.version
+    assert len(idx) == 3
+
+    docs.pop()
+    await service.refresh()
+    assert idx.version == service.snapshot.version
+    assert len(idx) == 2
+
+
+def test_disease_lookup_exact_and_substring():
+    lookup = DiseaseLookup()
+    lookup.sync(CatalogSnapshot.build(PLANTS))
+
+    assert lookup.get("Мілдью")["plantId"] == "p1"
+    assert lookup.get("гниль")["diseaseName"] == "Чорна гниль винограду"
+    assert lookup.get("ТОМАТ")["diseaseName"] == "Фітофтороз томата"
+    assert lookup.get("ль")["diseaseName"] == "Чорна гниль винограду"
+    assert lookup.get("гниль томата") is None
+    assert lookup.get("xyz") is None
+
+
+def test_disease_lookup_matches_linear_scan():
+    lookup = DiseaseLookup()
+    snap = CatalogSnapshot.build(PLANTS)
+    lookup.sync(snap)
+    names = [d["diseaseName"] for p in snap.plants for d in p["diseases"] if d["diseaseName"]]
+
+    for needle in ["ит", "ор", "ото", "ьду", "на г", "винограду", "а"]:
+        expected = next((n for n in names if needle.lower() in n.lower()), None)
+        got = lookup.get(needle)
+        assert (got and got["diseaseName"]) == expected, needle
@@ -0,0 +1,68 @@
+from bson import ObjectId
+
+from app.api.v1.endpoints.diseases import _build_diseases_pipeline, _flat_item
+
+
+def _stage(pipeline, name):
+    return [s[name] for s in pipeline if name in s]
+
+
+def test_page_and_total_in_one_facet():
+    pipeline = _build_diseases_pipeline(None, None, "-diseaseName", skip=40, limit=20)
+
+    assert pipeline[0] == {"$match": {"diseases.0": {"$exists": True}}}
+    assert _stage(pipeline, "$sort") == [{"diseases.diseaseName": -1, "_id": 1, "_pos": 1}]
+    facet = pipeline[-1]["$facet"]
+    assert facet["items"] == [{"$skip": 40}, {"$limit": 20}]
+    assert facet["total"] == [{"$count": "n"}]
+
+
+def test_risk_level_sorted_by_rank_not_alphabet():
+    pipeline = _build_diseases_pipeline(None, None, "-riskLevel", skip=0, limit=20)
+
+    (add_fields,) = _stage(pipeline, "$addFields")
+    branches = add_fields["_risk"]["$switch"]["branches"]
+    assert [(b["case"]["$eq"][1], b["then"]) for b in branches] == [
+        ("high", 3),
+        ("medium", 2),
+        ("low", 1),
+    ]
+    assert _stage(pipeline, "$sort") == [{"_risk": -1, "_id": 1, "_pos": 1}]
+
+
+def test_query_is_escaped_and_plant_id_filters_before_unwind():
+    plant_id = str(ObjectId())
+    pipeline = _build_diseases_pipeline("гниль (чорна", plant_id, None, 0, 20)
+
+    assert pipeline[0]["$match"]["_id"] == {"$in": [ObjectId(plant_id), plant_id]}
+    disease_match = _stage(pipeline, "$match")[1]
+    assert disease_match["$or"][0] == {
+        "diseases.diseaseName": {"$regex": r"гниль\ \(чорна", "$options": "i"}
+    }
+    # той самий фільтр ще до $unwind: рослини без збігів не розгортаються
+    assert pipeline[0]["$match"]["$or"] == disease_match["$or"]
+    assert "$unwind" in pipeline[2]
+    assert _stage(pipeline, "$sort") == [{"_id": 1, "_pos": 1}]
+
+
+def test_flat_item_keeps_response_shape():
+    item = _flat_item(
+        {
+            "_id": ObjectId("507f1f77bcf86cd799439011"),
+            "plantName": "Виноград",
+            "diseases": {"diseaseName": "Еска", "riskLevel": "high"},
+        }
+    )
+    assert list(item) == [
+        "plantId",
+        "plantName",
+        "diseaseName",
+        "description",
+        "symptoms",
+        "prevention",
+        "treatment",
+        "riskLevel",
+        "images",
+    ]
+    assert item["plantId"] == "507f1f77bcf86cd799439011"
+    assert item["symptoms"] == []
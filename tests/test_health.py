@@ -21,3 +21,19 @@ async def test_health_app(client):
     assert r.status_code == 200
     js = r.json()
     assert "app" in js and "version" in js and "env" in js
+
+
+@pytest.mark.asyncio
+async def test_health_live(client):
+    r = await client.get("/api/v1/health/live")
+    assert r.status_code == 200
+    assert r.json() == {"status": "alive"}
+
+
+@pytest.mark.asyncio
+async def test_health_ready(client):
+    r = await client.get("/api/v1/health/ready")
+    assert r.status_code in (200, 503)
+    js = r.json()
+    assert js["state"] in ("loading", "warming", "ready", "failed")
+    assert (r.status_code == 200) == (js["state"] == "ready")
@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+from loguru import logger
+
+from app.services import inference, tracing
+
+
+@pytest.fixture
+def fake_batch_predict(monkeypatch):
+    calls: list[int] = []
+
+    def fake_predict_batch(images: list[bytes], topk: int):
+        calls.append(len(images))
+        out = []
+        for image_bytes in images:
+            if image_bytes == b"broken":
+                out.append(ValueError("cannot identify image file"))
+                continue
+            out.append(
+                [
+                    {"class_index": i, "confidence": 1.0 / (i + 1), "tag": image_bytes}
+                    for i in range(topk)
+                ]
+            )
+        return out
+
+    monkeypatch.setattr(inference, "_predict_batch", fake_predict_batch)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_batch(fake_batch_predict):
+    batcher = inference._MicroBatcher(max_batch_size=16, max_wait_ms=50)
+    try:
+        results = await asyncio.gather(
+            *(batcher.submit(f"img-{i}".encode(), topk=3) for i in range(8))
+        )
+    finally:
+        await batcher.close()
+
+    assert fake_batch_predict == [8]
+    for i, res in enumerate(results):
+        assert len(res) == 3
+        assert res[0]["tag"] == f"img-{i}".encode()
+
+    stats = batcher.stats.as_dict()
+    assert stats["batches"] == 1
+    assert stats["items"] == 8
+    assert stats["max_batch_size"] == 8
+
+
+@pytest.mark.asyncio
+async def test_batch_respects_max_size_and_per_request_topk(fake_batch_predict):
+    batcher = inference._MicroBatcher(max_batch_size=4, max_wait_ms=50)
+    try:
+        results = await asyncio.gather(*(batcher.submit(b"img", topk=1 + i % 3) for i in range(10)))
+    finally:
+        await batcher.close()
+
+    assert max(fake_batch_predict) <= 4
+    assert sum(fake_batch_predict) == 10
+    assert [len(r) for r in results] == [1 + i % 3 for i in range(10)]
+
+
+@pytest.mark.asyncio
+async def test_broken_image_fails_only_its_own_request(fake_batch_predict):
+    batcher = inference._MicroBatcher(max_batch_size=16, max_wait_ms=50)
+    try:
+        ok, bad = await asyncio.gather(
+            batcher.submit(b"good", topk=2),
+            batcher.submit(b"broken", topk=2),
+            return_exceptions=True,
+        )
+    finally:
+        await batcher.close()
+
+    assert isinstance(bad, ValueError)
+    assert len(ok) == 2
+
+
+@pytest.mark.asyncio
+async def test_predict_batch_async_keeps_positions(fake_batch_predict, monkeypatch):
+    batcher = inference._MicroBatcher(max_batch_size=16, max_wait_ms=50)
+    monkeypatch.setattr(inference, "_BATCHER", batcher)
+    try:
+        res = await inference.predict_batch_async([b"a", b"broken", b"c"], topk=2)
+    finally:
+        await batcher.close()
+
+    assert fake_batch_predict == [3]
+    assert res[0][0]["tag"] == b"a"
+    assert isinstance(res[1], ValueError)
+    assert res[2][0]["tag"] == b"c"
+
+
+@pytest.mark.asyncio
+async def test_worker_does_not_inherit_first_request_trace(fake_batch_predict):
+    batcher = inference._MicroBatcher(max_batch_size=16, max_wait_ms=50)
+    records = []
+    tracing.install_log_context()
+    sink = logger.add(records.append, level="DEBUG", format="{message}")
+
+    async def request(trace_id: str):
+        tracing._TRACE.set(tracing.Trace(trace_id))
+        return await batcher.submit(trace_id.encode(), topk=1)
+
+    try:
+        await asyncio.gather(request("a" * 32), request("b" * 32))
+    finally:
+        logger.remove(sink)
+        await batcher.close()
+
+    by_message: dict[str, list] = {}
+    for r in records:
+        by_message.setdefault(r.record["message"].split(":")[0], []).append(
+            r.record["extra"].get("trace_id")
+        )
+    assert by_message["Inference batch"] == [None]
+    assert sorted(by_message["Inference batch item"]) == ["a" * 32, "b" * 32]
@@ -0,0 +1,72 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from app.core.config import settings
+from app.services import executor
+from app.services.metrics import MODEL_FALLBACKS, STAGE_SECONDS
+
+
+@pytest.mark.parametrize(
+    ("cores", "workers", "expected"),
+    [(8, 1, 8), (8, 2, 4), (8, 3, 2), (2, 4, 1)],
+)
+def test_torch_threads_do_not_oversubscribe(monkeypatch, cores, workers, expected):
+    monkeypatch.setattr(executor, "_cpu_count", lambda: cores)
+    monkeypatch.setattr(settings, "inference_workers", workers)
+    monkeypatch.setattr(settings, "inference_torch_threads", 0)
+
+    assert executor.torch_threads_per_worker() == expected
+
+
+def test_explicit_torch_threads_win(monkeypatch):
+    monkeypatch.setattr(settings, "inference_workers", 4)
+    monkeypatch.setattr(settings, "inference_torch_threads", 3)
+
+    assert executor.torch_threads_per_worker() == 3
+
+
+def test_server_processes_share_cores(monkeypatch):
+    monkeypatch.setattr(executor, "_cpu_count", lambda: 16)
+    monkeypatch.setattr(settings, "serve_workers", 4)
+    monkeypatch.setattr(settings, "inference_workers", 2)
+    monkeypatch.setattr(settings, "inference_torch_threads", 0)
+
+    assert executor.torch_threads_per_worker() == 2
+
+
+def _observe_stages() -> str:
+    STAGE_SECONDS.observe(0.004, "decode")
+    STAGE_SECONDS.observe(0.02, "forward")
+    return "done"
+
+
+def _fail_after_decode() -> None:
+    STAGE_SECONDS.observe(0.004, "decode")
+    raise ValueError("cannot identify image file")
+
+
+async def test_process_pool_metrics_reach_parent(monkeypatch, tmp_path):
+    # дочірній процес читає налаштування з env: моделі немає — фолбек у ньому
+    monkeypatch.setenv("PLANTIO_MODEL_PATH", str(tmp_path / "missing.pth"))
+    monkeypatch.setattr(settings, "inference_mode", "process")
+    pool = ProcessPoolExecutor(
+        max_workers=1,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=executor._init_process_worker,
+        initargs=(1,),
+    )
+    monkeypatch.setattr(executor, "_EXECUTOR", pool)
+    fallbacks = MODEL_FALLBACKS.value("model_missing")
+    decode, forward = STAGE_SECONDS.count("decode"), STAGE_SECONDS.count("forward")
+    try:
+        assert await executor.run_in_pool(_observe_stages) == "done"
+        with pytest.raises(ValueError, match="cannot identify"):
+            await executor.run_in_pool(_fail_after_decode)
+    finally:
+        pool.shutdown()
+
+    assert MODEL_FALLBACKS.value("model_missing") == fallbacks + 1
+    assert STAGE_SECONDS.count("decode") == decode + 2
+    assert STAGE_SECONDS.count("forward") == forward + 1
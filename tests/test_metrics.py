@@ -0,0 +1,124 @@
+import numpy as np
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from PIL import Image
+
+from app.services import inference
+from app.services.metrics import (
+    DIAGNOSE_RESULTS,
+    MODEL_FALLBACKS,
+    RESPONSE_CACHE_SCOPE_KEY,
+    STAGE_SECONDS,
+    Counter,
+    Histogram,
+    MetricsMiddleware,
+    render_metrics,
+    route_label,
+    stage,
+)
+
+
+def test_histogram_and_counter_render():
+    h = Histogram("t_seconds", "test", ("stage",), buckets=(0.01, 0.1))
+    h.observe(0.005, "decode")
+    h.observe(0.05, "decode")
+    h.observe(3.0, "decode")
+    text = h.render()
+
+    assert "# TYPE t_seconds histogram" in text
+    assert 't_seconds_bucket{stage="decode",le="0.01"} 1' in text
+    assert 't_seconds_bucket{stage="decode",le="0.1"} 2' in text
+    assert 't_seconds_bucket{stage="decode",le="+Inf"} 3' in text
+    assert 't_seconds_count{stage="decode"} 3' in text
+
+    c = Counter("t_total", "test", ("route",))
+    c.inc('/a"b')
+    c.inc('/a"b', amount=2)
+    assert 't_total{route="/a\\"b"} 3' in c.render()
+
+
+async def test_metrics_endpoint_after_diagnose(
+    client,
+    sample_jpeg_bytes,
+    mock_storage_save,
+    mock_catalog,
+    mock_diagnosis_insert,
+    mock_inference_success,
+):
+    decided = DIAGNOSE_RESULTS.value("decided")
+    uploads = STAGE_SECONDS.count("upload_write")
+
+    files = {"image": ("test.jpg", sample_jpeg_bytes, "image/jpeg")}
+    r = await client.post("/api/v1/diagnose", files=files, data={"threshold": "0.2"})
+    assert r.status_code == 200, r.text
+
+    assert DIAGNOSE_RESULTS.value("decided") == decided + 1
+    assert STAGE_SECONDS.count("upload_write") == uploads + 1
+
+    r = await client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = r.text
+    for name in ("upload_read", "upload_write", "inference", "enrich", "db_insert"):
+        assert f'plantio_diagnose_stage_seconds_count{{stage="{name}"}}' in text
+    assert (
+        'plantio_http_requests_total{method="POST",route="/api/v1/diagnose",status="200"}' in text
+    )
+    assert "plantio_inference_queue_depth " in text
+    assert "plantio_model_info{" in text
+
+
+async def test_server_timing_and_route_template():
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: str):
+        with stage("lookup"):
+            pass
+        return {"id": item_id}
+
+    wrapped = MetricsMiddleware(app, server_timing=True)
+    async with AsyncClient(transport=ASGITransport(app=wrapped), base_url="http://test") as ac:
+        r = await ac.get("/items/42")
+        r404 = await ac.get("/nope/1")
+
+    assert r.status_code == 200
+    timing = r.headers["server-timing"]
+    assert timing.startswith("lookup;dur=")
+    assert "total;dur=" in timing
+    assert r404.status_code == 404
+
+    metrics = render_metrics()
+    assert 'route="/items/{item_id}",status="200"' in metrics
+    assert 'route="unmatched",status="404"' in metrics
+    assert route_label({RESPONSE_CACHE_SCOPE_KEY: True}) == "response_cache"
+
+
+def test_array_classifier_records_decode_preprocess_forward(tmp_path):
+    class _Fixed(inference._ArrayClassifier):
+        def __init__(self):
+            self.classes = inference.ClassTable.compile(
+                {0: {"plant_label": "grape", "disease_label": "esca"}}
+            )
+            self.preprocessor = inference.ImagePreprocessor()
+
+        def _forward_topk(self, x, topk):
+            return np.ones((len(x), 1), np.float32), np.zeros((len(x), 1), np.int64)
+
+    path = tmp_path / "leaf.png"
+    Image.new("RGB", (32, 32)).save(path)
+    before = {s: STAGE_SECONDS.count(s) for s in ("decode", "preprocess", "forward")}
+
+    _Fixed().predict_batch([path, path], topk=1)
+
+    assert STAGE_SECONDS.count("decode") == before["decode"] + 2
+    assert STAGE_SECONDS.count("preprocess") == before["preprocess"] + 2
+    assert STAGE_SECONDS.count("forward") == before["forward"] + 1
+
+
+def test_missing_model_counts_fallback(monkeypatch, tmp_path):
+    monkeypatch.setattr(inference, "resolve_model_path", lambda: tmp_path / "missing.onnx")
+    before = MODEL_FALLBACKS.value("model_missing")
+
+    assert isinstance(inference._build_classifier(), inference._DummyClassifier)
+    assert MODEL_FALLBACKS.value("model_missing") == before + 1
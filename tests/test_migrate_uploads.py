@@ -0,0 +1,48 @@
+import hashlib
+import os
+
+from app.services.storage import LocalFileStorage
+from scripts.migrate_uploads import migrate
+
+
+def _flat(tmp_path, content: bytes, ext: str = ".jpg"):
+    sha = hashlib.sha256(content).hexdigest()
+    (tmp_path / f"{sha}{ext}").write_bytes(content)
+    return sha
+
+
+def test_migrate_reshards_and_dedupes(tmp_path):
+    a = _flat(tmp_path, b"leaf-a")
+    _flat(tmp_path, b"leaf-a", ".png")
+    b = _flat(tmp_path, b"leaf-b", ".jpeg")
+    (tmp_path / "notes.txt").write_text("keep me")
+
+    counts = migrate(str(tmp_path), progress_every=0)
+
+    assert counts["moved"] == 2 and counts["duplicate"] == 1
+    storage = LocalFileStorage(str(tmp_path))
+    assert storage.path_for(a).read_bytes() == b"leaf-a"
+    assert storage.metadata(b)["ext"] == ".jpeg"
+    assert sorted(os.listdir(tmp_path)) == sorted({".tmp", "notes.txt", a[:2], b[:2]})
+
+
+def test_migrate_is_resumable_and_verifies(tmp_path):
+    a = _flat(tmp_path, b"leaf-a")
+    storage = LocalFileStorage(str(tmp_path))
+    # перерваний запуск: файл уже на новому місці, sidecar не записаний,
+    # а в корені лишилась копія
+    target = storage.path_for(a)
+    target.parent.mkdir(parents=True)
+    target.write_bytes(b"leaf-a")
+    bad = "0" * 64
+    (tmp_path / f"{bad}.jpg").write_bytes(b"not matching")
+
+    counts = migrate(str(tmp_path), verify=True, progress_every=0)
+
+    assert counts["duplicate"] == 1 and counts["mismatch"] == 1
+    assert storage.metadata(a)["size"] == 6
+    assert (tmp_path / f"{bad}.jpg").exists()
+
+    # повторний запуск бачить лише те, що лишилось у корені
+    again = migrate(str(tmp_path), verify=True, progress_every=0)
+    assert again["seen"] == 1 and again["mismatch"] == 1
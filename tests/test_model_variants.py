@@ -0,0 +1,26 @@
+from pathlib import Path
+
+from app.core.config import settings
+from app.services import inference
+
+
+def test_variant_resolves_next_to_base_model(monkeypatch):
+    monkeypatch.setattr(settings, "model_path", "./app/models/plantio/model.pth")
+    monkeypatch.setattr(settings, "model_variant", "static_int8")
+
+    assert inference.resolve_model_path() == Path("./app/models/plantio/variants/static_int8.pt")
+
+
+def test_no_variant_uses_model_path(monkeypatch):
+    monkeypatch.setattr(settings, "model_path", "./app/models/plantio/model.pth")
+    monkeypatch.setattr(settings, "model_variant", None)
+
+    assert inference.resolve_model_path() == Path("./app/models/plantio/model.pth")
+
+
+def test_class_map_stays_with_base_model(monkeypatch):
+    monkeypatch.setattr(settings, "model_path", "./app/models/plantio/model.pth")
+    monkeypatch.setattr(settings, "model_variant", "frozen")
+    monkeypatch.setattr(settings, "class_map_path", None)
+
+    assert inference._class_map_path() == Path("./app/models/plantio/class_map.json")
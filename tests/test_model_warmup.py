@@ -0,0 +1,100 @@
+from concurrent.futures import Executor, Future
+
+import pytest
+
+from app.core.config import settings
+from app.services import executor, inference
+
+CLASS_MAP = {0: {"plant_label": "grape", "disease_label": "black_rot"}}
+
+
+@pytest.fixture
+def fresh_model_state(monkeypatch):
+    monkeypatch.setattr(inference, "_CLASSIFIER", None)
+    monkeypatch.setattr(inference, "_MODEL_VERSION", None)
+    monkeypatch.setattr(inference, "_LOAD_STATE", inference.LoadState())
+    monkeypatch.setattr(
+        inference, "_build_classifier", lambda: inference._DummyClassifier(CLASS_MAP)
+    )
+
+
+def test_import_does_not_load_model(fresh_model_state):
+    assert inference.model_backend() == "loading"
+    assert inference.model_version() == "unknown"
+    assert not inference.is_ready()
+
+
+@pytest.mark.asyncio
+async def test_load_and_warmup_reaches_ready(fresh_model_state, monkeypatch):
+    calls = []
+    real_warmup = inference.warmup
+
+    def spy_warmup(batch_sizes, iters):
+        calls.append((tuple(batch_sizes), iters))
+        real_warmup(batch_sizes, iters)
+
+    monkeypatch.setattr(inference, "warmup", spy_warmup)
+    monkeypatch.setattr(settings, "inference_warmup_iters", 1)
+    monkeypatch.setattr(settings, "inference_warmup_batch_sizes", [4, 1, 4])
+
+    await inference.load_and_warmup()
+
+    state = inference.load_state()
+    assert state["state"] == "ready"
+    assert state["ready_s"] >= state["load_s"]
+    assert calls == [((1, 4), 1)]
+    assert inference.model_backend() == "dummy"
+
+
+@pytest.mark.asyncio
+async def test_load_failure_is_reported(fresh_model_state, monkeypatch):
+    def broken():
+        raise RuntimeError("corrupted checkpoint")
+
+    monkeypatch.setattr(inference, "_build_classifier", broken)
+
+    await inference.load_and_warmup()
+
+    state = inference.load_state()
+    assert state["state"] == "failed"
+    assert "corrupted checkpoint" in state["error"]
+    assert not inference.is_ready()
+
+
+class _FakeProcessPool(Executor):
+    """Пул, що «виконує» задачі в іншому процесі: батько моделі не бачить."""
+
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, fn, *args):
+        assert fn is executor._pool_call
+        fn, *args = args
+        self.calls.append(fn.__name__)
+        future = Future()
+        if fn is inference.loaded_model_info:
+            future.set_result((("onnx", "onnx-0123456789abcdef"), None, []))
+        else:
+            future.set_result((None, None, []))
+        return future
+
+
+@pytest.mark.asyncio
+async def test_process_mode_does_not_load_model_in_parent(fresh_model_state, monkeypatch):
+    def parent_load():
+        raise AssertionError("model loaded in the parent process")
+
+    pool = _FakeProcessPool()
+    monkeypatch.setattr(inference, "_build_classifier", parent_load)
+    monkeypatch.setattr(inference, "_POOL_BACKEND", None)
+    monkeypatch.setattr(executor, "get_executor", lambda: pool)
+    monkeypatch.setattr(inference, "worker_count", lambda: 2)
+    monkeypatch.setattr(settings, "inference_mode", "process")
+    monkeypatch.setattr(settings, "inference_warmup_iters", 1)
+
+    await inference.load_and_warmup()
+
+    assert inference.is_ready()
+    assert pool.calls == ["loaded_model_info"] * 2 + ["warmup"] * 2
+    assert inference.model_backend() == "onnx"
+    assert inference.model_version() == "onnx-0123456789abcdef"
@@ -0,0 +1,83 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+onnx = pytest.importorskip("onnx")
+ort = pytest.importorskip("onnxruntime")
+
+from onnx import TensorProto, helper  # noqa: E402
+
+from app.services import inference  # noqa: E402
+
+NUM_CLASSES = 5
+
+
+def _tiny_onnx_model(path):
+    """GlobalAveragePool → Flatten → MatMul: логіти залежать лише від середніх RGB."""
+    weights = np.arange(3 * NUM_CLASSES, dtype=np.float32).reshape(3, NUM_CLASSES)
+    graph = helper.make_graph(
+        [
+            helper.make_node("GlobalAveragePool", ["input"], ["pooled"]),
+            helper.make_node("Flatten", ["pooled"], ["flat"]),
+            helper.make_node("MatMul", ["flat", "w"], ["logits"]),
+        ],
+        "tiny",
+        [helper.make_tensor_value_info("input", TensorProto.FLOAT, ["batch", 3, 224, 224])],
+        [helper.make_tensor_value_info("logits", TensorProto.FLOAT, ["batch", NUM_CLASSES])],
+        [helper.make_tensor("w", TensorProto.FLOAT, weights.shape, weights.flatten())],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+    model.ir_version = 8
+    onnx.save(model, str(path))
+
+
+def _jpeg(color) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (320, 240), color).save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+@pytest.fixture
+def onnx_classifier(tmp_path, monkeypatch):
+    from app.core.config import settings
+
+    path = tmp_path / "model.onnx"
+    _tiny_onnx_model(path)
+    monkeypatch.setattr(settings, "inference_backend", "auto")
+
+    session, backend = inference._load_model_flexible(path)
+    class_map = {i: {"plant_label": "grape", "disease_label": f"d{i}"} for i in range(5)}
+    return backend, inference._OnnxClassifier(session, class_map)
+
+
+def test_onnx_selected_by_extension(onnx_classifier):
+    backend, clf = onnx_classifier
+    assert backend == "onnxruntime"
+    assert clf.backend == "onnxruntime"
+
+
+def test_onnx_topk_sorted_and_normalized(onnx_classifier):
+    _, clf = onnx_classifier
+    res = clf.predict_topk(_jpeg((200, 120, 30)), topk=3)
+
+    confs = [c["confidence"] for c in res]
+    assert [c["class_index"] for c in res] == [4, 3, 2]
+    assert confs == sorted(confs, reverse=True)
+    assert 0.0 < sum(confs) <= 1.0
+
+
+def test_onnx_batch_matches_single(onnx_classifier):
+    _, clf = onnx_classifier
+    images = [_jpeg((200, 120, 30)), b"not an image", _jpeg((10, 250, 90))]
+
+    res = clf.predict_batch(images, topk=2)
+
+    assert isinstance(res[1], Exception)
+    for image_bytes, row in zip((images[0], images[2]), (res[0], res[2]), strict=True):
+        single = clf.predict_topk(image_bytes, topk=2)
+        assert [c["class_index"] for c in row] == [c["class_index"] for c in single]
+        np.testing.assert_allclose(
+            [c["confidence"] for c in row], [c["confidence"] for c in single], rtol=1e-5
+        )
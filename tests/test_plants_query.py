@@ -0,0 +1,149 @@
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app.api.v1.endpoints import plants
+from app.models.plant import PLANT_NAME_COLLATION, Plant
+
+
+class _Find:
+    def __init__(self, docs):
+        self.docs = docs
+        self.calls = []
+
+    def sort(self, spec):
+        self.calls.append(("sort", spec))
+        return self
+
+    def skip(self, n):
+        self.calls.append(("skip", n))
+        return self
+
+    def limit(self, n):
+        self.calls.append(("limit", n))
+        return self
+
+    async def to_list(self, length=None):
+        return self.docs[:length]
+
+
+class _Collection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.finds = []
+        self.counts = []
+        self.estimates = 0
+
+    def find(self, filter_spec, collation=None):
+        self.finds.append((filter_spec, collation, _Find(self.docs)))
+        return self.finds[-1][2]
+
+    async def count_documents(self, filter_spec, **kwargs):
+        self.counts.append((filter_spec, kwargs))
+        return 42
+
+    async def estimated_document_count(self):
+        self.estimates += 1
+        return 100
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    docs = [
+        {"_id": ObjectId(), "plantName": "Томат"},
+        {"_id": ObjectId(), "plantName": "Томат черрі"},
+    ]
+    coll = _Collection(docs)
+    monkeypatch.setattr(
+        Plant,
+        "get_pymongo_collection",
+        classmethod(lambda cls: coll),
+        raising=False,
+    )
+    return coll
+
+
+def test_cursor_roundtrip():
+    oid = ObjectId()
+    assert plants.decode_cursor(plants.encode_cursor("Томат", oid)) == ("Томат", oid)
+    assert plants.decode_cursor(plants.encode_cursor(None, "p1")) == (None, "p1")
+
+    with pytest.raises(HTTPException) as e:
+        plants.decode_cursor("not-a-cursor")
+    assert e.value.status_code == 400
+
+
+def test_search_filters():
+    assert plants._search_filter("  ", "prefix") == {}
+    regex = {"$regex": r"том\.", "$options": "i"}
+    assert plants._search_filter("том.", "substring") == {
+        "$or": [
+            {"plantName": regex},
+            {"scientificName": regex},
+            {"description": regex},
+        ]
+    }
+    assert plants._search_filter("том", "text") == {"$text": {"$search": "том"}}
+    bounds = {"$gte": "том", "$lt": "том\uffff"}
+    assert plants._search_filter("том", "prefix") == {
+        "$or": [{"plantName": bounds}, {"scientificName": bounds}]
+    }
+
+
+async def test_prefix_page_counts_concurrently(collection):
+    res = await plants.list_plants(
+        q="том", mode="prefix", cursor=None, with_total=True, page=0, size=2
+    )
+
+    filter_spec, collation, find = collection.finds[0]
+    assert collation == PLANT_NAME_COLLATION
+    assert find.calls == [
+        ("sort", [("plantName", 1), ("_id", 1)]),
+        ("skip", 0),
+        ("limit", 2),
+    ]
+    assert collection.counts == [(filter_spec, {"collation": PLANT_NAME_COLLATION})]
+    assert res["count"] == 42
+    assert [i["plantName"] for i in res["items"]] == ["Томат", "Томат черрі"]
+
+    last = collection.docs[-1]
+    assert plants.decode_cursor(res["next_cursor"]) == ("Томат черрі", last["_id"])
+
+
+async def test_cursor_page_uses_keyset_not_skip(collection):
+    oid = ObjectId()
+    cursor = plants.encode_cursor("Томат", oid)
+
+    res = await plants.list_plants(
+        q="том", mode="text", cursor=cursor, with_total=False, page=5, size=10
+    )
+
+    filter_spec, collation, find = collection.finds[0]
+    assert collation is None
+    assert filter_spec["$and"][0] == {"$text": {"$search": "том"}}
+    assert filter_spec["$and"][1]["$or"][1] == {
+        "plantName": "Томат",
+        "_id": {"$gt": oid},
+    }
+    assert ("skip", 0) in find.calls
+    assert collection.counts == [] and collection.estimates == 0
+    assert res["count"] is None
+    assert res["next_cursor"] is None
+
+
+async def test_default_mode_is_substring_without_collation(client, collection):
+    r = await client.get("/api/v1/plants", params={"q": "мат"})
+    assert r.status_code == 200, r.text
+
+    filter_spec, collation, _ = collection.finds[0]
+    assert collation is None
+    assert filter_spec == plants._search_filter("мат", "substring")
+    assert collection.counts == [(filter_spec, {})]
+
+
+async def test_unfiltered_total_is_estimated(collection):
+    res = await plants.list_plants(
+        q=None, mode="prefix", cursor=None, with_total=True, page=0, size=20
+    )
+    assert collection.estimates == 1
+    assert res["count"] == 100
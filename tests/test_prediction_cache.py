@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from app.services import inference
+from app.services.prediction_cache import PredictionCache, _LRUCache
+
+CANDIDATES = [{"class_index": 16, "confidence": 0.9, "disease_label": "black_rot"}]
+
+
+@pytest.fixture
+def memory_cache(monkeypatch):
+    monkeypatch.setattr(inference, "model_version", lambda: "v1")
+    return PredictionCache(maxsize=2, ttl_s=60, persistent=False)
+
+
+@pytest.mark.asyncio
+async def test_hit_after_put_and_rates(memory_cache):
+    assert await memory_cache.get("abc", 3) is None
+    memory_cache.put("abc", 3, CANDIDATES)
+
+    assert await memory_cache.get("abc", 3) == CANDIDATES
+    assert await memory_cache.get("abc", 5) is None
+
+    stats = memory_cache.snapshot()
+    assert stats["memory_hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["hit_rate"] == pytest.approx(1 / 3, abs=1e-3)
+
+
+@pytest.mark.asyncio
+async def test_cached_value_is_isolated_from_callers(memory_cache):
+    memory_cache.put("abc", 3, CANDIDATES)
+    got = await memory_cache.get("abc", 3)
+    got[0]["confidence"] = 0.0
+
+    assert (await memory_cache.get("abc", 3))[0]["confidence"] == 0.9
+
+
+@pytest.mark.asyncio
+async def test_model_version_change_invalidates(memory_cache, monkeypatch):
+    memory_cache.put("abc", 3, CANDIDATES)
+    monkeypatch.setattr(inference, "model_version", lambda: "v2")
+
+    assert await memory_cache.get("abc", 3) is None
+    assert memory_cache.snapshot()["memory_entries"] == 0
+
+
+def test_lru_evicts_oldest_and_expires(monkeypatch):
+    lru = _LRUCache(maxsize=2, ttl_s=10)
+    lru.put(("a", "v", 3), [])
+    lru.put(("b", "v", 3), [])
+    lru.get(("a", "v", 3))
+    assert lru.put(("c", "v", 3), []) == 1
+    assert lru.get(("b", "v", 3)) is None
+    assert lru.get(("a", "v", 3)) == []
+
+    import app.services.prediction_cache as pc
+
+    now = pc.time.monotonic()
+    monkeypatch.setattr(pc.time, "monotonic", lambda: now + 11)
+    assert lru.get(("a", "v", 3)) is None
+
+
+@pytest.mark.asyncio
+async def test_bypassed_until_model_loaded(monkeypatch):
+    monkeypatch.setattr(inference, "model_version", lambda: "unknown")
+    cache = PredictionCache(maxsize=2, ttl_s=60, persistent=False)
+
+    cache.put("abc", 3, CANDIDATES)
+    assert await cache.get("abc", 3) is None
+    assert cache.snapshot()["memory_entries"] == 0
+
+
+class _SlowCollection:
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.updates = []
+        self.finds = []
+
+    async def update_one(self, filter_spec, update, upsert=False):
+        await self.release.wait()
+        self.updates.append((filter_spec, update))
+
+    async def find_one(self, filter_spec, projection=None):
+        self.finds.append(filter_spec)
+        return None
+
+
+@pytest.mark.asyncio
+async def test_persistent_write_does_not_block_put(monkeypatch):
+    from app.models.prediction import CachedPrediction
+
+    coll = _SlowCollection()
+    monkeypatch.setattr(inference, "model_version", lambda: "v1")
+    monkeypatch.setattr(
+        CachedPrediction,
+        "get_pymongo_collection",
+        classmethod(lambda cls: coll),
+        raising=False,
+    )
+    cache = PredictionCache(maxsize=2, ttl_s=60, persistent_ttl_s=600)
+
+    cache.put("abc", 3, CANDIDATES)  # Mongo ще не відповіла — put уже повернувся
+    assert await cache.get("abc", 3) == CANDIDATES
+    assert coll.updates == [] and cache.snapshot()["pending_writes"] == 1
+
+    coll.release.set()
+    await cache.flush()
+    ((_, update),) = coll.updates
+    fields = update["$set"]
+    assert (fields["expires_at"] - fields["created_at"]).total_seconds() == 600
+
+    await cache.get("xyz", 3)
+    assert "$gt" in coll.finds[0]["expires_at"]
@@ -0,0 +1,47 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+from app.services.preprocess import ImagePreprocessor
+
+
+def _jpeg(size: tuple[int, int]) -> bytes:
+    img = Image.new("RGB", size, (120, 180, 30))
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+def test_matches_resize_to_tensor_without_draft():
+    import torchvision.transforms as transforms
+
+    image_bytes = _jpeg((640, 480))
+    legacy = transforms.Compose([transforms.Resize((224, 224)), transforms.ToTensor()])(
+        Image.open(io.BytesIO(image_bytes)).convert("RGB")
+    )
+
+    arr = ImagePreprocessor(jpeg_draft=False).to_array(image_bytes)
+
+    assert arr.dtype == np.float32
+    np.testing.assert_array_equal(arr, legacy.numpy())
+
+
+def test_large_jpeg_is_decoded_near_target_size():
+    pre = ImagePreprocessor()
+    img = Image.open(io.BytesIO(_jpeg((4032, 3024))))
+    img.draft("RGB", pre.size)
+
+    assert img.size[0] < 4032 and min(img.size) >= 224
+    assert pre.decode(_jpeg((4032, 3024))).size == (224, 224)
+
+
+def test_writes_into_preallocated_batch_buffer():
+    pre = ImagePreprocessor()
+    buf = pre.batch_buffer(2)
+
+    row = pre.to_array(_jpeg((300, 200)), out=buf[1])
+
+    assert row.base is buf
+    assert buf.shape == (2, 3, 224, 224)
+    assert 0.0 <= float(buf[1].min()) and float(buf[1].max()) <= 1.0
@@ -0,0 +1,146 @@
+import gzip
+import json
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.services import response_cache
+from app.services.catalog import CatalogSnapshot, get_catalog
+from app.services.response_cache import (
+    ResponseCache,
+    ResponseCacheMiddleware,
+    normalize_query,
+)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    c = ResponseCache(maxsize=10, max_bytes=1 << 20)
+    monkeypatch.setattr(response_cache, "_CACHE", c)
+    monkeypatch.setattr(get_catalog(), "_snapshot", CatalogSnapshot.build([{"plantName": "Томат"}]))
+    return c
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def client(calls):
+    async def app(scope, receive, send):
+        calls.append(scope["query_string"])
+        if scope["path"].endswith("/missing"):
+            status, body = 404, b'{"detail":"not_found"}'
+        else:
+            status, body = 200, json.dumps({"items": ["Томат"] * 200}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(b"content-type", b"application/json")],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    mw = ResponseCacheMiddleware(app, prefixes=("/api/v1/plants",), max_age_s=60)
+    return AsyncClient(transport=ASGITransport(app=mw), base_url="http://test")
+
+
+def test_normalize_query():
+    assert normalize_query("size=20&q=&page=0") == normalize_query("page=0&q=&size=20")
+    assert normalize_query("sort=") != normalize_query("")
+
+
+async def test_blank_param_is_not_the_default_request(cache, calls, client):
+    default = await client.get("/api/v1/plants")
+    blank = await client.get("/api/v1/plants?sort=")
+
+    assert default.headers["etag"] != blank.headers["etag"]
+    assert calls == [b"", b"sort="]
+
+
+async def test_second_request_is_served_from_cache(cache, calls, client):
+    r1 = await client.get("/api/v1/plants?page=0&size=20")
+    r2 = await client.get("/api/v1/plants?size=20&page=0")
+
+    assert r1.status_code == r2.status_code == 200
+    assert r1.json() == r2.json()
+    assert len(calls) == 1
+    assert r1.headers["etag"] == r2.headers["etag"]
+    assert r1.headers["cache-control"] == "public, max-age=60, must-revalidate"
+    assert cache.snapshot()["hits"] == 1
+
+
+async def test_precompressed_body_is_negotiated(cache, client):
+    r = await client.get("/api/v1/plants", headers={"Accept-Encoding": "gzip;q=1, br;q=0"})
+
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.headers["vary"] == "Accept-Encoding"
+    assert r.headers["etag"].endswith('-gzip"')
+    assert r.json()["items"][0] == "Томат"  # httpx розпаковує gzip сам
+    entry = next(iter(cache._data.values()))
+    assert gzip.decompress(entry.encoded["gzip"]) == entry.identity
+
+
+async def test_if_none_match_returns_304_without_calling_endpoint(cache, calls, client):
+    etag = (await client.get("/api/v1/plants")).headers["etag"]
+
+    r = await client.get("/api/v1/plants", headers={"If-None-Match": etag})
+
+    assert r.status_code == 304 and r.content == b""
+    assert r.headers["etag"] == etag
+    assert len(calls) == 1
+
+
+async def test_each_encoding_has_its_own_etag(cache, calls, client):
+    plain = await client.get("/api/v1/plants", headers={"Accept-Encoding": "identity"})
+    gzipped = await client.get("/api/v1/plants", headers={"Accept-Encoding": "gzip"})
+    etag = gzipped.headers["etag"]
+
+    assert "content-encoding" not in plain.headers
+    assert etag == plain.headers["etag"][:-1] + '-gzip"'
+
+    r = await client.get(
+        "/api/v1/plants", headers={"If-None-Match": etag, "Accept-Encoding": "gzip"}
+    )
+    assert r.status_code == 304 and r.headers["etag"] == etag
+
+    # ETag стиснутого тіла, але клієнт більше не приймає gzip
+    r = await client.get(
+        "/api/v1/plants",
+        headers={"If-None-Match": etag, "Accept-Encoding": "identity"},
+    )
+    assert r.status_code == 304 and r.headers["etag"] == plain.headers["etag"]
+    assert len(calls) == 1
+
+
+def test_etag_depends_on_build(monkeypatch):
+    key = ("/api/v1/plants", "", "v1")
+    monkeypatch.setattr(response_cache, "build_id", lambda: "build-a")
+    before = response_cache.make_etag(key)
+    monkeypatch.setattr(response_cache, "build_id", lambda: "build-b")
+
+    assert response_cache.make_etag(key) != before
+    assert before.startswith('"v1-')
+
+
+async def test_catalog_change_changes_etag_and_invalidates(monkeypatch, cache, calls, client):
+    etag = (await client.get("/api/v1/plants")).headers["etag"]
+    snapshot = CatalogSnapshot.build([{"plantName": "Огірок"}])
+    monkeypatch.setattr(get_catalog(), "_snapshot", snapshot)
+    cache.clear(snapshot)
+
+    r = await client.get("/api/v1/plants", headers={"If-None-Match": etag})
+
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+    assert len(calls) == 2
+
+
+async def test_errors_are_not_cached(cache, calls, client):
+    for _ in range(2):
+        r = await client.get("/api/v1/plants/missing")
+        assert r.status_code == 404
+        assert "etag" not in r.headers
+    assert len(calls) == 2 and len(cache) == 0
@@ -0,0 +1,199 @@
+from datetime import UTC, datetime
+from types import SimpleNamespace
+
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from app.models.diagnosis_rollup import DiagnosisRollup
+from app.services.rollups import RollupAggregator, bucket_start, rollup_keys
+from app.services.write_behind import WriteBehindBuffer
+from scripts.backfill_rollups import backfill
+
+T = datetime(2026, 5, 4, 13, 45, 12, tzinfo=UTC)
+
+
+def _diag(disease_id=None, plant_id="p1", created_at=T):
+    return SimpleNamespace(
+        id=None,
+        created_at=created_at,
+        result={"plantId": plant_id, "decidedDiseaseId": disease_id},
+    )
+
+
+class _Collection:
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.bulks = []
+        self.deleted = []
+
+    async def bulk_write(self, ops, ordered=True):
+        assert ordered is False
+        if self.failures:
+            raise self.failures.pop(0)
+        self.bulks.append(ops)
+
+    async def delete_many(self, flt):
+        self.deleted.append(flt)
+        return SimpleNamespace(deleted_count=2)
+
+
+def _aggregator(coll):
+    model = SimpleNamespace(get_pymongo_collection=lambda: coll)
+    return RollupAggregator(model, flush_interval_s=60.0)
+
+
+def _incs(ops):
+    keys = ("granularity", "diseaseId", "outcome")
+    return {tuple(o._filter[k] for k in keys): o._doc["$inc"]["total"] for o in ops}
+
+
+def test_bucket_start_and_keys():
+    assert bucket_start(T, "hour") == datetime(2026, 5, 4, 13, tzinfo=UTC)
+    assert bucket_start(T.replace(tzinfo=None), "day") == datetime(2026, 5, 4, tzinfo=UTC)
+    keys = rollup_keys(_diag())
+    assert [k[0] for k in keys] == ["hour", "day"]
+    assert all(k[3] is None and k[4] == "low_confidence" for k in keys)
+
+
+async def test_flush_batches_one_inc_per_key():
+    coll = _Collection()
+    agg = _aggregator(coll)
+    agg.record([_diag("black_rot"), _diag("black_rot"), _diag()])
+
+    await agg.flush()
+
+    (ops,) = coll.bulks
+    assert _incs(ops) == {
+        ("hour", "black_rot", "decided"): 2,
+        ("day", "black_rot", "decided"): 2,
+        ("hour", None, "low_confidence"): 1,
+        ("day", None, "low_confidence"): 1,
+    }
+    assert all(o._upsert for o in ops)
+    assert agg.snapshot()["pending_keys"] == 0
+
+
+async def test_failed_keys_are_requeued():
+    ops_error = BulkWriteError({"writeErrors": [{"index": 0, "code": 11000, "errmsg": "dup"}]})
+    coll = _Collection(failures=[AutoReconnect("down"), ops_error])
+    agg = _aggregator(coll)
+    agg.record([_diag("black_rot")])
+
+    await agg.flush()  # мережа: усі ключі назад у чергу
+    assert agg.snapshot()["pending_keys"] == 2
+
+    await agg.flush()  # bulk: лише ключ з помилкою
+    assert agg.snapshot()["pending_keys"] == 1
+
+    agg.record([_diag("black_rot")])
+    await agg.flush()
+    assert _incs(coll.bulks[-1]) == {
+        ("hour", "black_rot", "decided"): 2,
+        ("day", "black_rot", "decided"): 1,
+    }
+
+
+async def test_write_behind_notifies_written_docs_only():
+    class _Model:
+        __name__ = "Fake"
+
+        async def insert_many(self, docs, ordered=True):
+            raise BulkWriteError({"writeErrors": [{"index": 1, "code": 121, "errmsg": "invalid"}]})
+
+    seen = []
+    buf = WriteBehindBuffer(_Model(), batch_size=10, flush_interval_s=60, max_pending=10)
+    buf.on_written(seen.extend)
+    docs = [_diag("a"), _diag("b")]
+    await buf.submit(docs)
+    await buf.flush()
+
+    assert seen == [docs[0]]
+
+
+class _AggCursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def to_list(self, length=None):
+        return self.rows
+
+    def __aiter__(self):
+        async def gen():
+            for row in self.rows:
+                yield row
+
+        return gen()
+
+
+async def test_stats_reads_rollups(client, monkeypatch, mock_catalog):
+    calls = []
+    facet = {
+        "plants": [
+            {
+                "_id": "507f1f77bcf86cd799439011",
+                "total": 5,
+                "diseases": [
+                    {"diseaseId": "black_rot", "outcome": "decided", "count": 4},
+                    {"diseaseId": None, "outcome": "low_confidence", "count": 1},
+                ],
+            }
+        ],
+        "series": [
+            {"_id": {"bucket": datetime(2026, 5, 4), "outcome": "decided"}, "count": 4},
+            {
+                "_id": {"bucket": datetime(2026, 5, 4), "outcome": "low_confidence"},
+                "count": 1,
+            },
+        ],
+    }
+    coll = SimpleNamespace(aggregate=lambda p: calls.append(p) or _AggCursor([facet]))
+    monkeypatch.setattr(
+        DiagnosisRollup,
+        "get_pymongo_collection",
+        classmethod(lambda cls: coll),
+        raising=False,
+    )
+
+    r = await client.get(
+        "/api/v1/stats",
+        params={"since": "2026-05-01T10:30:00", "until": "2026-05-08T00:00:00Z"},
+    )
+    assert r.status_code == 200, r.text
+    js = r.json()
+
+    assert js["totals"] == {"decided": 4, "low_confidence": 1}
+    assert js["plants"][0]["plantName"] == "Виноград"
+    assert js["plants"][0]["diseases"][0]["diseaseId"] == "black_rot"
+    assert js["series"] == [{"bucket": "2026-05-04T00:00:00Z", "decided": 4, "low_confidence": 1}]
+    match = calls[0][0]["$match"]
+    assert match["granularity"] == "day"
+    assert match["bucket"]["$gte"] == datetime(2026, 5, 1, tzinfo=UTC)
+
+    r = await client.get("/api/v1/stats", params={"since": "2026-05-08", "until": "2026-05-01"})
+    assert r.status_code == 400
+
+
+async def test_backfill_sets_counts_and_removes_stale():
+    rows = [
+        {
+            "_id": {
+                "bucket": datetime(2026, 5, 4),
+                "plantId": "p1",
+                "diseaseId": "black_rot",
+                "outcome": "decided",
+            },
+            "count": 7,
+        }
+    ]
+    pipelines = []
+    diagnoses = SimpleNamespace(aggregate=lambda p, **kw: pipelines.append(p) or _AggCursor(rows))
+    rollups = _Collection()
+
+    counts = await backfill(diagnoses, rollups, None, T, ("day",))
+
+    # поточна доба не чіпається
+    assert pipelines[0][0]["$match"]["created_at"] == {"$lt": datetime(2026, 5, 4, tzinfo=UTC)}
+    (ops,) = rollups.bulks
+    assert ops[0]._doc["$set"]["total"] == 7
+    assert ops[0]._filter["bucket"] == datetime(2026, 5, 4, tzinfo=UTC)
+    assert rollups.deleted[0]["bucket"] == {"$lt": datetime(2026, 5, 4, tzinfo=UTC)}
+    assert counts["day_keys"] == 1 and counts["day_stale_removed"] == 2
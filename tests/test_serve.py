@@ -0,0 +1,18 @@
+import sys
+
+import pytest
+
+from app.utils.memory import process_memory
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="needs /proc")
+def test_process_memory_reports_shared_and_private():
+    mem = process_memory()
+    assert mem is not None
+    assert mem["rss_mb"] > 0
+    assert mem["pss_mb"] <= mem["rss_mb"]
+    assert mem["shared_mb"] + mem["private_mb"] == pytest.approx(mem["rss_mb"], abs=1)
+
+
+def test_process_memory_missing_pid():
+    assert process_memory(2**31 - 1) is None
@@ -0,0 +1,174 @@
+import hashlib
+import os
+
+import pytest
+
+from app.services.storage import LocalFileStorage, StoredUpload
+from app.services.storage_s3 import S3Storage
+
+
+class _NotFound(Exception):
+    response = {"Error": {"Code": "404"}}
+
+
+class _FakeS3:
+    """In-memory стенд замість MinIO/moto: лише виклики, які робить бекенд."""
+
+    def __init__(self, failures=0):
+        self.objects = {}
+        self.failures = failures
+        self.multipart = {}
+        self.aborted = []
+
+    async def head_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise _NotFound()
+        return {}
+
+    async def put_object(self, Bucket, Key, Body, **extra):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("s3 unavailable")
+        self.objects[(Bucket, Key)] = (bytes(Body), extra)
+
+    async def create_multipart_upload(self, Bucket, Key, **extra):
+        self.multipart["u1"] = (Key, extra, {})
+        return {"UploadId": "u1"}
+
+    async def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.multipart[UploadId][2][PartNumber] = bytes(Body)
+        return {"ETag": f"etag-{PartNumber}"}
+
+    async def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        key, extra, parts = self.multipart.pop(UploadId)
+        numbers = [p["PartNumber"] for p in MultipartUpload["Parts"]]
+        body = b"".join(parts[n] for n in numbers)
+        self.objects[(Bucket, key)] = (body, extra)
+
+    async def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.aborted.append(UploadId)
+
+
+def _store(local: LocalFileStorage, content: bytes, filename="leaf.png"):
+    path, sha = local.save(filename, content)
+    return StoredUpload(local.path_for(sha), sha, len(content))
+
+
+@pytest.fixture
+def local(tmp_path):
+    return LocalFileStorage(str(tmp_path))
+
+
+def _s3(local, client, **kwargs):
+    return S3Storage(
+        "plantio",
+        prefix="uploads/",
+        local=local,
+        client=client,
+        backoff_s=0.0,
+        **kwargs,
+    )
+
+
+async def test_persist_uploads_in_background(local):
+    client = _FakeS3()
+    s3 = _s3(local, client)
+    await s3.start()
+    stored = _store(local, b"leaf")
+
+    s3.persist(stored)
+    s3.persist(stored)  # той самий sha ще в черзі — вдруге не ставиться
+    await s3.stop()
+
+    sha = hashlib.sha256(b"leaf").hexdigest()
+    body, extra = client.objects[("plantio", f"uploads/{sha[:2]}/{sha[2:4]}/{sha}")]
+    assert body == b"leaf"
+    assert extra["ContentType"] == "image/png"
+    assert s3.stats()["queued"] == 1 and s3.stats()["uploaded"] == 1
+
+
+async def test_existing_object_is_not_uploaded_again(local):
+    client = _FakeS3()
+    s3 = _s3(local, client)
+    stored = _store(local, b"leaf")
+    client.objects[("plantio", s3.key_for(stored.sha256))] = (b"leaf", {})
+
+    await s3._upload_with_retries(stored.sha256)
+
+    assert s3.stats()["already_present"] == 1 and s3.stats()["uploaded"] == 0
+
+
+async def test_large_files_use_multipart(local):
+    client = _FakeS3()
+    s3 = _s3(local, client, multipart_threshold=1024)
+    content = bytes(range(256)) * 50_000  # > 5 MiB мінімальної частини
+    stored = _store(local, content)
+
+    await s3._upload_with_retries(stored.sha256)
+
+    body, _ = client.objects[("plantio", s3.key_for(stored.sha256))]
+    assert body == content
+    assert s3.stats()["multipart"] == 1
+
+
+async def test_transient_failures_are_retried_then_given_up(local):
+    s3 = _s3(local, _FakeS3(failures=2), max_retries=3)
+    await s3._upload_with_retries(_store(local, b"a").sha256)
+    assert s3.stats()["retries"] == 2 and s3.stats()["uploaded"] == 1
+
+    s3 = _s3(local, _FakeS3(failures=10), max_retries=1)
+    await s3._upload_with_retries(_store(local, b"b").sha256)
+    assert s3.stats()["failed"] == 1
+
+
+async def test_full_queue_drops_without_blocking(local):
+    s3 = _s3(local, _FakeS3(), queue_size=1)  # воркери не запущені
+
+    s3.persist(_store(local, b"a"))
+    s3.persist(_store(local, b"b"))
+
+    assert s3.stats()["queue_depth"] == 1
+    assert s3.stats()["dropped"] == 1
+
+
+async def test_uploaded_copies_are_evicted_lru(local):
+    s3 = _s3(local, _FakeS3(), local_cache_bytes=10)
+    a, b, c = (_store(local, bytes([n]) * 6) for n in range(3))
+
+    await s3._upload_with_retries(a.sha256)
+    await s3._upload_with_retries(b.sha256)  # 12 > 10 байт — a витісняється
+    assert not a.path.exists() and not os.path.exists(f"{a.path}.json")
+    assert b.path.exists()
+
+    pending = _store(local, b"pending")  # ще не в бакеті — не чіпається
+    await s3._upload_with_retries(c.sha256)
+    assert not b.path.exists() and c.path.exists() and pending.path.exists()
+    assert s3.stats()["evicted"] == 2
+    assert s3.stats()["local_cache_bytes"] == 6
+
+
+class _Upload:
+    def __init__(self, content: bytes, filename="leaf.png"):
+        self.filename = filename
+        self.size = len(content)
+        self._content = content
+
+    async def read(self, size: int = -1) -> bytes:
+        chunk, self._content = self._content[:size], self._content[size:]
+        return chunk
+
+
+async def test_pinned_copies_survive_eviction_until_released(local):
+    s3 = _s3(local, _FakeS3(), local_cache_bytes=10)
+    waiting = await s3.save_upload(_Upload(b"a" * 6))  # чекає в мікробатчері
+    other = _store(local, b"b" * 6)
+
+    await s3._upload_with_retries(waiting.sha256)
+    await s3._upload_with_retries(other.sha256)  # 12 > 10, але a закріплений
+    assert waiting.path.exists() and not other.path.exists()
+    assert s3.stats()["pinned"] == 1
+
+    s3.release(waiting)
+    await s3._upload_with_retries(_store(local, b"c" * 6).sha256)
+    assert not waiting.path.exists()
+    assert s3.stats()["pinned"] == 0
@@ -0,0 +1,148 @@
+import asyncio
+import hashlib
+import json
+import os
+
+import pytest
+
+from app.core.body_limit import BodySizeLimitMiddleware
+from app.services.preprocess import ImagePreprocessor
+from app.services.storage import (
+    EmptyUpload,
+    LocalFileStorage,
+    StoredUpload,
+    UploadTooLarge,
+    write_metadata,
+)
+
+
+class _Upload:
+    def __init__(self, content: bytes, filename="leaf.JPG", size=None):
+        self.content = content
+        self.filename = filename
+        self.size = size
+        self.reads = 0
+        self._pos = 0
+
+    async def read(self, size=-1):
+        self.reads += 1
+        end = len(self.content) if size < 0 else self._pos + size
+        chunk = self.content[self._pos : end]
+        self._pos += len(chunk)
+        return chunk
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalFileStorage(str(tmp_path))
+
+
+async def test_streams_in_chunks_and_hashes_incrementally(storage, tmp_path):
+    content = os.urandom(10_000)
+    upload = _Upload(content)
+
+    stored = await storage.save_upload(upload, max_bytes=20_000, chunk_size=1024)
+
+    sha = hashlib.sha256(content).hexdigest()
+    path = tmp_path / sha[:2] / sha[2:4] / sha
+    assert stored == StoredUpload(path, sha, len(content))
+    assert stored.path.read_bytes() == content
+    meta = storage.metadata(sha)
+    assert (meta["size"], meta["ext"], meta["filename"]) == (10_000, ".jpg", "leaf.JPG")
+    assert upload.reads == 11  # 10 повних шматків + кінцевий порожній
+    assert os.listdir(storage.tmp_dir) == []
+
+
+async def test_stored_file_has_default_permissions(storage):
+    umask = os.umask(0)
+    os.umask(umask)
+
+    stored = await storage.save_upload(_Upload(b"abc"), max_bytes=10)
+
+    assert stored.path.stat().st_mode & 0o777 == 0o666 & ~umask
+
+
+async def test_same_content_is_stored_once(storage):
+    first = await storage.save_upload(_Upload(b"abc", "a.jpg"), max_bytes=10)
+    second = await storage.save_upload(_Upload(b"abc", "a.png"), max_bytes=10)
+
+    assert first.path == second.path
+    assert storage.metadata(first.sha256)["ext"] == ".jpg"
+    assert os.listdir(storage.tmp_dir) == []
+
+
+async def test_concurrent_saves_of_same_content(storage):
+    content = os.urandom(4096)
+    results = await asyncio.gather(
+        *(storage.save_upload(_Upload(content), max_bytes=10_000, chunk_size=512) for _ in range(8))
+    )
+
+    assert len({r.path for r in results}) == 1
+    shard = results[0].path.parent
+    assert sorted(os.listdir(shard)) == [results[0].sha256, f"{results[0].sha256}.json"]
+
+
+def test_existing_sidecar_is_kept(tmp_path):
+    target = str(tmp_path / "abc")
+    write_metadata(target, {"filename": "first.jpg"})
+    write_metadata(target, {"filename": "second.jpg"})
+
+    assert json.loads((tmp_path / "abc.json").read_text())["filename"] == "first.jpg"
+    assert os.listdir(tmp_path) == ["abc.json"]
+
+
+async def test_declared_size_over_limit_is_rejected_before_reading(storage):
+    upload = _Upload(b"x" * 100, size=100)
+
+    with pytest.raises(UploadTooLarge):
+        await storage.save_upload(upload, max_bytes=50)
+    assert upload.reads == 0
+
+
+async def test_streamed_size_over_limit_stops_reading(storage):
+    upload = _Upload(b"x" * 10_000)
+
+    with pytest.raises(UploadTooLarge) as e:
+        await storage.save_upload(upload, max_bytes=2048, chunk_size=1024)
+    assert e.value.limit == 2048
+    assert upload.reads == 3
+    assert os.listdir(storage.tmp_dir) == []
+
+
+async def test_empty_upload(storage):
+    with pytest.raises(EmptyUpload):
+        await storage.save_upload(_Upload(b""), max_bytes=10)
+    assert os.listdir(storage.tmp_dir) == []
+
+
+def test_decoder_reads_stored_file(tmp_path, sample_jpeg_bytes):
+    path = tmp_path / "leaf.jpg"
+    path.write_bytes(sample_jpeg_bytes)
+    pre = ImagePreprocessor()
+
+    from_path = pre.to_array(path)
+    from_bytes = pre.to_array(sample_jpeg_bytes)
+    assert (from_path == from_bytes).all()
+
+
+async def test_content_length_over_limit_is_413_before_body():
+    calls = []
+
+    async def app(scope, receive, send):
+        calls.append(scope["path"])
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    mw = BodySizeLimitMiddleware(app, limits=lambda path: 100 if path == "/upload" else None)
+    headers = [(b"content-length", b"101")]
+
+    await mw({"type": "http", "path": "/upload", "headers": headers}, None, send)
+    assert sent[0]["status"] == 413 and calls == []
+
+    await mw({"type": "http", "path": "/other", "headers": headers}, None, send)
+    small = [(b"content-length", b"100")]
+    await mw({"type": "http", "path": "/upload", "headers": small}, None, send)
+    assert calls == ["/other", "/upload"]
@@ -0,0 +1,113 @@
+import json
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from loguru import logger
+
+from app.services import tracing
+from app.services.tracing import (
+    JsonlTraceExporter,
+    TracingMiddleware,
+    format_traceparent,
+    install_log_context,
+    parse_traceparent,
+    span,
+)
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT = "00f067aa0ba902b7"
+
+
+def test_traceparent_roundtrip():
+    header = format_traceparent(TRACE_ID, PARENT, True)
+    assert header == f"00-{TRACE_ID}-{PARENT}-01"
+    assert parse_traceparent(header) == (TRACE_ID, PARENT, True)
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT}-00")[2] is False
+
+    for bad in (
+        None,
+        "",
+        "garbage",
+        f"00-{'0' * 32}-{PARENT}-01",
+        f"ff-{TRACE_ID}-{PARENT}-01",
+    ):
+        assert parse_traceparent(bad) is None
+
+
+def _app():
+    app = FastAPI()
+
+    @app.get("/work/{item_id}")
+    async def work(item_id: str):
+        with span("outer", item=item_id):
+            with span("inner"):
+                logger.info("inside")
+        return {"trace": tracing.trace_summary()}
+
+    return app
+
+
+async def test_spans_are_nested_and_exported(tmp_path, monkeypatch):
+    exporter = JsonlTraceExporter(str(tmp_path / "t" / "traces.jsonl"), "test")
+    monkeypatch.setattr(tracing, "get_trace_exporter", lambda: exporter)
+    records = []
+    install_log_context()
+    sink = logger.add(records.append, format="{message}")
+
+    mw = TracingMiddleware(_app(), sample_rate=0.0)
+    try:
+        async with AsyncClient(transport=ASGITransport(app=mw), base_url="http://test") as ac:
+            r = await ac.get("/work/7", headers={"traceparent": f"00-{TRACE_ID}-{PARENT}-01"})
+            unsampled = await ac.get("/work/8")
+    finally:
+        logger.remove(sink)
+
+    assert r.status_code == 200
+    assert [s["name"] for s in r.json()["trace"]] == ["outer", "inner"]
+    assert r.headers["traceresponse"].startswith(f"00-{TRACE_ID}-")
+    assert unsampled.headers["traceresponse"].endswith("-00")
+
+    extra = records[0].record["extra"]
+    assert extra["trace_id"] == TRACE_ID and "span_id" in extra
+
+    await exporter.flush()
+    (line,) = (tmp_path / "t" / "traces.jsonl").read_text().splitlines()
+    spans = {s["name"]: s for s in json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"]}
+    root = spans["GET /work/{item_id}"]
+    assert root["traceId"] == TRACE_ID
+    assert root["parentSpanId"] == PARENT and root["kind"] == 2
+    assert spans["outer"]["parentSpanId"] == root["spanId"]
+    assert spans["inner"]["parentSpanId"] == spans["outer"]["spanId"]
+    assert {"key": "item", "value": {"stringValue": "7"}} in spans["outer"]["attributes"]
+    assert exporter.snapshot()["exported"] == 1
+
+
+def test_span_outside_request_is_noop():
+    with span("orphan") as s:
+        assert s is None
+    assert tracing.current_trace_id() is None
+
+
+async def test_diagnosis_stores_trace(
+    client,
+    sample_jpeg_bytes,
+    mock_storage_save,
+    mock_catalog,
+    mock_diagnosis_insert_many,
+    mock_inference_batch,
+):
+    files = [("images", ("a.jpg", sample_jpeg_bytes, "image/jpeg"))]
+    r = await client.post(
+        "/api/v1/diagnose/batch",
+        files=files,
+        data={"threshold": "0.5"},
+        headers={"traceparent": f"00-{TRACE_ID}-{PARENT}-00"},
+    )
+    assert r.status_code == 200, r.text
+
+    (doc,) = mock_diagnosis_insert_many
+    assert doc.trace_id == TRACE_ID
+    names = [s["name"] for s in doc.spans]
+    for name in ("upload", "storage.commit", "inference", "prediction_cache"):
+        assert name in names
+    assert all(s["duration_ms"] >= 0 for s in doc.spans)
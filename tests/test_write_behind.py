@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+from pymongo.errors import AutoReconnect, BulkWriteError, OperationFailure
+
+from app.services.write_behind import WriteBehindBuffer, WriteBufferFull
+
+
+class _Doc:
+    def __init__(self):
+        self.id = None
+
+
+class _Model:
+    __name__ = "Fake"
+
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.batches = []
+
+    async def insert_many(self, docs, ordered=True):
+        assert ordered is False
+        if self.failures:
+            raise self.failures.pop(0)
+        self.batches.append([d.id for d in docs])
+
+
+def _buffer(model, **kwargs):
+    opts = {"batch_size": 3, "flush_interval_s": 60.0, "max_pending": 10}
+    opts.update(kwargs)
+    return WriteBehindBuffer(model, backoff_s=0.0, **opts)
+
+
+async def test_submit_assigns_ids_and_flushes_in_batches():
+    model = _Model()
+    buf = _buffer(model)
+    docs = [_Doc() for _ in range(5)]
+
+    await buf.submit(docs)
+    assert all(d.id is not None for d in docs)
+    assert model.batches == [] and buf.depth() == 5
+
+    await buf.flush()
+    assert [len(b) for b in model.batches] == [3, 2]
+    stats = buf.snapshot()
+    assert stats["depth"] == 0
+    assert stats["written"] == 5 and stats["batches"] == 2
+
+
+async def test_background_flush_on_size_threshold():
+    model = _Model()
+    buf = _buffer(model)
+    await buf.start()
+    try:
+        await buf.submit([_Doc() for _ in range(3)])
+        for _ in range(50):
+            if model.batches:
+                break
+            await asyncio.sleep(0.01)
+        assert len(model.batches) == 1
+    finally:
+        await buf.stop()
+
+
+async def test_stop_drains_pending():
+    model = _Model()
+    buf = _buffer(model)
+    await buf.start()
+    await buf.submit([_Doc()])
+    await buf.stop()
+
+    assert len(model.batches) == 1
+    assert buf.depth() == 0
+
+
+async def test_transient_errors_are_retried():
+    model = _Model(failures=[AutoReconnect("down"), AutoReconnect("down")])
+    buf = _buffer(model, max_retries=3)
+    await buf.submit([_Doc()])
+    await buf.flush()
+
+    stats = buf.snapshot()
+    assert stats["retries"] == 2
+    assert stats["written"] == 1 and stats["dropped"] == 0
+
+
+async def test_permanent_errors_drop_documents():
+    model = _Model(failures=[OperationFailure("bad")])
+    buf = _buffer(model)
+    await buf.submit([_Doc(), _Doc()])
+    await buf.flush()
+
+    stats = buf.snapshot()
+    assert stats["dropped"] == 2 and stats["written"] == 0
+
+
+async def test_bulk_error_duplicates_count_as_written():
+    error = BulkWriteError(
+        {
+            "writeErrors": [
+                {"index": 0, "code": 11000, "errmsg": "dup"},
+                {"index": 1, "code": 2, "errmsg": "bad value"},
+            ]
+        }
+    )
+    buf = _buffer(_Model(failures=[error]))
+    await buf.submit([_Doc(), _Doc(), _Doc()])
+    await buf.flush()
+
+    stats = buf.snapshot()
+    assert stats["written"] == 2 and stats["dropped"] == 1
+
+
+async def test_full_buffer_rejects_when_mongo_is_down():
+    model = _Model(failures=[OperationFailure("down")] * 10)
+    buf = _buffer(model, max_pending=3)
+    await buf.submit([_Doc() for _ in range(3)])
+
+    # спершу синхронний flush звільняє місце (тут — через drop)
+    await buf.submit([_Doc()])
+    assert buf.snapshot()["dropped"] == 3
+
+    with pytest.raises(WriteBufferFull):
+        await buf.submit([_Doc() for _ in range(4)])